@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# app/api.py
+"""
+Headless REST API for VirusLens.
+
+Same engines (aggregate_scan) and the same SQLite file as the Streamlit UI,
+so scans made through the API show up in History and Reports and vice versa.
+
+    uvicorn app.api:app --host 0.0.0.0 --port 8000 --workers 4
+    python -m app.api                       # single worker, for development
+
+Endpoints:
+    GET    /health
+    POST   /scan                      {"ioc": "...", "type": "url|hash"?, "save": true}
+    GET    /scan/stream               ?ioc=&type=&format=sse|ndjson&save= - one event per engine, then the verdict
+    POST   /jobs                      {"items": [{"input": "...", "type": "..."?}, ...]}   -> 202
+    GET    /jobs/{id}                 status and counts
+    GET    /jobs/{id}/items           ?offset=&limit=&include_result=
+    DELETE /jobs/{id}                 cancel queued items
+    GET    /history                   ?type=&risk=&since=&until=&search=&sort=&order=&page=&page_size=
+    GET    /history/export            ?format=csv|jsonl (streamed)
+    GET    /history/{id}
+    GET    /reports/{id}.pdf
+
+Bulk jobs are stored in the database (app.utils.job_store) and every worker
+process drains the shared queue, so any worker can accept, report on or
+cancel any job.
+
+API scans are saved without pre-rendering their PDF (the UI's Scan page does
+that); /reports/{id}.pdf renders on first request and caches the file.
+
+/scan/stream sends an `engine` event as each provider finishes (VirusTotal is
+usually first) and a final `result` event with overall_risk and scan_id. A
+client that only needs the first verdict can disconnect; the providers still
+running for it are cancelled.
+
+Settings (environment):
+    VL_API_KEY            when set, every request except /health needs X-API-Key
+    VL_API_JOB_THREADS    job runner threads per worker (default 4)
+    VL_API_MAX_JOB_ITEMS  largest accepted bulk job (default 10000)
+
+Needs fastapi and uvicorn (pip install fastapi uvicorn); the Streamlit app
+does not.
+"""
+import os
+import hmac
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from scan import get_db_path, init_db, get_scan, query_scans, count_scans, SORT_KEYS
+from app.utils.job_store import init_jobs, create_job, get_job, job_items, cancel_job, JobRunner
+
+IOC_TYPES = ("url", "hash")  # the types some engine scans
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+MAX_JOB_ITEMS = _int_env("VL_API_MAX_JOB_ITEMS", 10000)
+
+# ---------- models ----------
+
+class ScanRequest(BaseModel):
+    ioc: str = Field(..., min_length=1, max_length=4096)
+    type: Optional[str] = Field(None, description="url or hash; detected when omitted")
+    save: bool = True
+
+class JobItem(BaseModel):
+    input: str = Field(..., max_length=4096)
+    type: Optional[str] = None
+
+class JobRequest(BaseModel):
+    items: List[JobItem] = Field(..., min_length=1)
+
+# ---------- app ----------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db_path = get_db_path()
+    init_db(db_path)
+    init_jobs(db_path)
+    runner = JobRunner(threads=_int_env("VL_API_JOB_THREADS", 4)).start()
+    app.state.runner = runner
+    try:
+        yield
+    finally:
+        runner.stop(timeout=5)
+
+def require_key(x_api_key: Optional[str] = Header(None)) -> None:
+    expected = os.getenv("VL_API_KEY")
+    if expected and not (x_api_key and hmac.compare_digest(x_api_key, expected)):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-API-Key")
+
+app = FastAPI(title="VirusLens API", version="1.0", lifespan=lifespan)
+AUTH = [Depends(require_key)]
+
+def _ioc_type(ioc: str, t: Optional[str]) -> str:
+    """The IOC's type; 422 unless some configured engine scans it (never a "Low" from zero engines)."""
+    from app.utils.engines import detect_ioc_type, planned_engines
+    if t and t not in IOC_TYPES:
+        raise HTTPException(status_code=422, detail=f"type must be one of {', '.join(IOC_TYPES)}")
+    t = t or detect_ioc_type(ioc)
+    if not planned_engines(ioc, t):
+        raise HTTPException(status_code=422, detail=f"No engine scans {ioc[:100]!r} (type {t}); "
+                                                    f"give a URL or an MD5/SHA-1/SHA-256 hash")
+    return t
+
+@app.get("/health")
+def health() -> Dict[str, Any]:
+    from app.utils.engines import is_mock_mode, active_engines
+    return {"status": "ok", "mock_mode": is_mock_mode(), "engines": [e.name for e in active_engines()]}
+
+# Plain `def` endpoints run in FastAPI's thread pool, so a scan waiting on the
+# providers does not block the event loop.
+@app.post("/scan", dependencies=AUTH)
+def scan(req: ScanRequest) -> Dict[str, Any]:
+    from app.utils.engines import aggregate_scan
+    from app.utils.scan_results import save_result
+    ioc = req.ioc.strip()
+    res = aggregate_scan(ioc, _ioc_type(ioc, req.type))
+    res["scan_id"] = save_result(res, ioc, prerender=False) if req.save else None
+    return res
+
+def _event(name: str, data: Dict[str, Any], fmt: str) -> str:
+    if fmt == "ndjson":
+        return json.dumps({"event": name, **data}) + "\n"
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+STREAM_MEDIA = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+@app.get("/scan/stream", dependencies=AUTH)
+async def scan_stream(
+    ioc: str = Query(..., min_length=1, max_length=4096),
+    type: Optional[str] = None,
+    format: Literal["sse", "ndjson"] = "sse",
+    save: bool = True,
+) -> StreamingResponse:
+    from app.integrations import iter_scan_async
+    from app.utils.engines import build_result, overall_risk
+    from app.utils.scan_results import save_result
+    ioc = ioc.strip()
+    t = _ioc_type(ioc, type)
+
+    async def events():
+        engines: List[Dict[str, Any]] = []
+        async for eng in iter_scan_async(ioc, t):
+            engines.append(eng)
+            yield _event("engine", {**eng, "overall_risk_so_far": overall_risk(engines)}, format)
+        res = build_result(ioc, t, engines)
+        res["scan_id"] = await asyncio.to_thread(save_result, res, ioc, prerender=False) if save else None
+        yield _event("result", res, format)
+
+    # no-cache / no proxy buffering, so each event reaches the client as it is sent
+    return StreamingResponse(events(), media_type=STREAM_MEDIA[format],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/jobs", status_code=202, dependencies=AUTH)
+def submit_job(req: JobRequest) -> Dict[str, Any]:
+    if len(req.items) > MAX_JOB_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_JOB_ITEMS} items per job")
+    rows = [{"input": i.input, "type": _ioc_type(i.input, i.type) if i.input.strip() else None} for i in req.items]
+    job_id = create_job(rows)
+    app.state.runner.wake()
+    return get_job(job_id)
+
+def _job_or_404(job_id: str) -> Dict[str, Any]:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}", dependencies=AUTH)
+def job_status(job_id: str) -> Dict[str, Any]:
+    return _job_or_404(job_id)
+
+@app.get("/jobs/{job_id}/items", dependencies=AUTH)
+def job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    include_result: bool = False,
+) -> Dict[str, Any]:
+    job = _job_or_404(job_id)
+    return {"job": job, "offset": offset, "items": job_items(job_id, offset, limit, include_result)}
+
+@app.delete("/jobs/{job_id}", dependencies=AUTH)
+def job_cancel(job_id: str) -> Dict[str, Any]:
+    if not cancel_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_or_404(job_id)
+
+@app.get("/history", dependencies=AUTH)
+def history(
+    type: Optional[List[str]] = Query(None),
+    risk: Optional[List[str]] = Query(None),
+    since: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    until: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    search: Optional[str] = None,
+    sort: str = "id",
+    order: Literal["asc", "desc"] = "desc",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+) -> Dict[str, Any]:
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=422, detail=f"sort must be one of {', '.join(SORT_KEYS)}")
+    total = count_scans(type, risk, since, until, search)
+    items = query_scans(type, risk, since, until, search, sort=sort, descending=order == "desc",
+                        limit=page_size, offset=(page - 1) * page_size)
+    return {"total": total, "page": page, "page_size": page_size, "items": items}
+
+@app.get("/history/export", dependencies=AUTH)
+def history_export(format: Literal["csv", "jsonl"] = "csv", since: Optional[str] = None):
+    from app.utils.export import FORMATS, iter_export
+    mime, ext = FORMATS[format]
+    return StreamingResponse(
+        iter_export(format, since=since),
+        media_type=mime,
+        headers={"Content-Disposition": f'attachment; filename="viruslens_history{ext}"'},
+    )
+
+@app.get("/history/{scan_id}", dependencies=AUTH)
+def history_item(scan_id: int) -> Dict[str, Any]:
+    scan_obj = get_scan(scan_id)
+    if not scan_obj:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return scan_obj
+
+@app.get("/reports/{scan_id}.pdf", dependencies=AUTH)
+def report(scan_id: int) -> Response:
+    from app.utils.report_cache import get_cached_report, store_report
+    scan_obj = get_scan(scan_id)
+    if not scan_obj:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    pdf = get_cached_report(scan_obj)
+    if pdf is None:
+        from app.report_pdf import build_report_pdf_bytes
+        pdf = build_report_pdf_bytes(scan_obj)
+        store_report(scan_obj, pdf)
+    return Response(
+        pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="viruslens_report_{scan_id}.pdf"'},
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("VL_API_HOST", "127.0.0.1"), port=int(os.getenv("VL_API_PORT", "8000")))
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# app/cli.py
+"""
+Command-line batch scanner.
+
+    python -m app.cli iocs.txt more.txt > results.ndjson
+    cat iocs.txt | python -m app.cli --concurrency 8 --rate 4/min
+    python -m app.cli big.txt --checkpoint big.ckpt --resume >> results.ndjson
+
+Reads one IOC per line (blank lines and # comments are skipped) from the
+given files, or stdin when none / "-" is given, scans them concurrently with
+the same engines as the UI and prints one JSON object per IOC to stdout as
+soon as it completes (completion order; "index" is the IOC's position in the
+input). Nothing from Streamlit is imported.
+
+Results are written to the VirusLens database in batches (one transaction per
+--batch-size results, or every --flush-seconds), so they appear in History
+and Reports; --no-save skips the database.
+
+Resume: with --checkpoint FILE the scanner records which inputs are finished
+(after their batch is committed) and --resume skips them on the next run with
+the same input files; stdin cannot be identified across runs, so it cannot
+be checkpointed. Failed IOCs are not checkpointed or saved, so a resumed run
+retries them; an IOC counts as failed when its scan raised or any engine
+reported an error (429, timeout, bad key), since its verdict would otherwise
+be a "Low" built from the engines that happened to answer. Output is
+at-least-once: an IOC printed just before a crash may be printed again after
+--resume.
+
+Pacing: --rate (or VL_CLI_RATE) caps IOCs started per unit of time, e.g.
+"4/min" for the VirusTotal public API; per-engine VL_RATE_* limits from
+app.utils.ratelimit apply on top.
+
+Exit status: 0 when every IOC was scanned, 1 when some failed, 2 on bad
+arguments or an unreadable input file, 130 when interrupted (after flushing
+what finished).
+"""
+import os
+import json
+import time
+import argparse
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+# ---------- input ----------
+
+def iter_iocs(streams: Iterable[TextIO]) -> Iterator[Tuple[int, str]]:
+    """(index, ioc) over all streams; the index counts IOCs, not lines."""
+    idx = 0
+    for fh in streams:
+        for line in fh:
+            ioc = line.strip()
+            if not ioc or ioc.startswith("#"):
+                continue
+            yield idx, ioc
+            idx += 1
+
+def _open_sources(paths: List[str]) -> Iterator[TextIO]:
+    for p in paths or ["-"]:
+        if p == "-":
+            yield sys.stdin
+        else:
+            with open(p, encoding="utf-8", errors="replace") as fh:
+                yield fh
+
+# ---------- checkpoint ----------
+
+class Checkpoint:
+    """
+    Finished input indexes, stored compactly as everything below `done_below`
+    plus the (usually small) set finished out of order above it.
+    """
+
+    def __init__(self, path: Optional[Path], sources: List[str]):
+        self.path = path
+        self.sources = [os.path.abspath(p) if p != "-" else "-" for p in sources or ["-"]]
+        self.done_below = 0
+        self.done: Set[int] = set()
+
+    def key(self) -> str:
+        return hashlib.sha256("\n".join(self.sources).encode("utf-8")).hexdigest()[:16]
+
+    def load(self) -> None:
+        """Read a previous run's state. Raises ValueError if it was made for other inputs."""
+        if not self.path or not self.path.exists():
+            return
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        if data.get("key") != self.key():
+            raise ValueError(f"{self.path} was written for different inputs: {data.get('sources')}")
+        self.done_below = int(data.get("done_below", 0))
+        self.done = set(data.get("done", []))
+
+    def skip(self, idx: int) -> bool:
+        return idx < self.done_below or idx in self.done
+
+    def mark(self, idx: int) -> None:
+        self.done.add(idx)
+        while self.done_below in self.done:
+            self.done.remove(self.done_below)
+            self.done_below += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({
+            "key": self.key(),
+            "sources": self.sources,
+            "done_below": self.done_below,
+            "done": sorted(self.done),
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+# ---------- scanning ----------
+
+def scan_one(ioc: str, ioc_type: Optional[str] = None) -> Dict[str, Any]:
+    from app.utils.engines import aggregate_scan, detect_ioc_type, planned_engines
+    t = ioc_type or detect_ioc_type(ioc)
+    if not planned_engines(ioc, t):
+        raise ValueError(f"no engine scans this IOC (type {t})")
+    return aggregate_scan(ioc, t)
+
+def output_record(idx: int, ioc: str, res: Optional[Dict[str, Any]], error: Optional[str], full: bool) -> Dict[str, Any]:
+    if error is not None:
+        return {"index": idx, "input": ioc, "error": error}
+    engines = res.get("engines", [])
+    if not full:
+        engines = [{"engine": e.get("engine"), "summary": e.get("summary", {})} for e in engines]
+    return {"index": idx, "input": ioc, "type": res.get("type"), "overall_risk": res.get("overall_risk"), "engines": engines}
+
+class Recorder:
+    """Buffers finished results; flush() commits them in one transaction, then checkpoints them."""
+
+    def __init__(self, checkpoint: Checkpoint, db_path: Optional[str], batch_size: int, flush_seconds: float):
+        self.checkpoint = checkpoint
+        self.db_path = db_path  # None = --no-save
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.pending: List[Tuple[int, Dict[str, Any]]] = []
+        self.last_flush = time.monotonic()
+        self.saved = 0
+
+    def add(self, idx: int, res: Dict[str, Any]) -> None:
+        self.pending.append((idx, res))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        if self.db_path is not None:
+            from app.utils.scan_results import save_results
+            save_results([res for _, res in self.pending], db_path=self.db_path)
+            self.saved += len(self.pending)
+        for idx, _ in self.pending:
+            self.checkpoint.mark(idx)
+        self.pending = []
+        self.checkpoint.save()
+
+def run(args: argparse.Namespace, out: TextIO = sys.stdout, err: TextIO = sys.stderr) -> int:
+    from app.utils.engines import engine_errors
+    from app.utils.ratelimit import TokenBucket
+
+    for p in args.inputs:
+        if p == "-":
+            continue
+        try:
+            with open(p, "rb"):
+                pass
+        except OSError as e:
+            print(f"error: cannot read {p}: {e.strerror or e}", file=err)
+            return 2
+    checkpoint = Checkpoint(args.checkpoint, args.inputs)
+    if args.resume:
+        try:
+            checkpoint.load()
+        except ValueError as e:
+            print(f"error: {e}", file=err)
+            return 2
+    db_path = None
+    if not args.no_save:
+        from scan import init_db, get_db_path
+        db_path = str(args.db or get_db_path())
+        init_db(db_path)
+    recorder = Recorder(checkpoint, db_path, args.batch_size, args.flush_seconds)
+    limiter = TokenBucket.parse(args.rate) if args.rate else None
+
+    stats = {"scanned": 0, "failed": 0, "skipped": 0}
+    started = time.monotonic()
+    inflight: Dict[Future, Tuple[int, str]] = {}
+    pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="vl-cli")
+
+    def drain(block_until: int) -> None:
+        # collect finished scans until at most `block_until` are still running
+        while len(inflight) > block_until:
+            finished, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                idx, ioc = inflight.pop(fut)
+                error = None if fut.exception() is None else str(fut.exception())
+                res = fut.result() if error is None else None
+                if res is not None:
+                    error = engine_errors(res)
+                out.write(json.dumps(output_record(idx, ioc, res, error, args.full)) + "\n")
+                out.flush()
+                if error is None:
+                    stats["scanned"] += 1
+                    recorder.add(idx, res)
+                else:
+                    stats["failed"] += 1
+
+    status = 0
+    try:
+        for idx, ioc in iter_iocs(_open_sources(args.inputs)):
+            if checkpoint.skip(idx):
+                stats["skipped"] += 1
+                continue
+            if limiter is not None:
+                limiter.acquire()
+            inflight[pool.submit(scan_one, ioc, args.type)] = (idx, ioc)
+            # keep a bounded window in flight, so huge inputs are never read ahead
+            drain(args.concurrency * 2 - 1)
+        drain(0)
+    except KeyboardInterrupt:
+        status = 130
+        for fut in inflight:
+            fut.cancel()
+    except BrokenPipeError:
+        status = 0  # downstream closed (e.g. `| head`); keep what finished
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())  # silence the flush at exit
+    except OSError as e:  # an input became unreadable mid-run; keep what finished
+        status = 2
+        print(f"error: {e}", file=err)
+    finally:
+        pool.shutdown(wait=status == 0, cancel_futures=True)
+        recorder.flush()
+
+    if not args.quiet:
+        elapsed = time.monotonic() - started
+        rate = stats["scanned"] / elapsed if elapsed > 0 else 0.0
+        print(f"scanned {stats['scanned']}, failed {stats['failed']}, skipped {stats['skipped']} (checkpoint), "
+              f"saved {recorder.saved} in {elapsed:.1f}s ({rate:.1f}/s)", file=err)
+    if status:
+        return status
+    return 1 if stats["failed"] else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m app.cli", description="Scan IOCs in bulk and stream NDJSON results to stdout.")
+    ap.add_argument("inputs", nargs="*", help="files with one IOC per line (default / '-': stdin)")
+    ap.add_argument("-t", "--type", choices=("url", "hash"), help="IOC type for every input (default: detect per line)")
+    ap.add_argument("-c", "--concurrency", type=int, default=int(os.getenv("VL_SCAN_WORKERS", "4")), help="IOCs scanned at once (default VL_SCAN_WORKERS or 4)")
+    ap.add_argument("--rate", default=os.getenv("VL_CLI_RATE"), help='max IOCs started, e.g. "4/min", "2/s" (default VL_CLI_RATE, unlimited)')
+    ap.add_argument("--db", type=Path, help="database file (default: the app's viruslens.db / VL_DB_FILE)")
+    ap.add_argument("--no-save", action="store_true", help="do not write results to the database")
+    ap.add_argument("--batch-size", type=int, default=100, help="results per database transaction (default 100)")
+    ap.add_argument("--flush-seconds", type=float, default=10.0, help="commit at least this often (default 10)")
+    ap.add_argument("--checkpoint", type=Path, help="file recording finished inputs (input files only, not stdin)")
+    ap.add_argument("--resume", action="store_true", help="skip inputs recorded in --checkpoint")
+    ap.add_argument("--full", action="store_true", help="include raw provider responses in the output")
+    ap.add_argument("-q", "--quiet", action="store_true", help="no summary line on stderr")
+    return ap
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if args.resume and not args.checkpoint:
+        ap.error("--resume needs --checkpoint")
+    if args.checkpoint and (not args.inputs or "-" in args.inputs):
+        # the key is the input paths; two piped runs would share one checkpoint
+        ap.error("--checkpoint needs input files, not stdin")
+    if args.concurrency < 1 or args.batch_size < 1:
+        ap.error("--concurrency and --batch-size must be at least 1")
+    if args.rate:
+        from app.utils.ratelimit import TokenBucket
+        try:
+            TokenBucket.parse(args.rate)
+        except ValueError as e:
+            ap.error(f"--rate: {e}")
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
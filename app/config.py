@@ -6,15 +6,27 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 # END: ensure project root is importable
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from functools import lru_cache
 
-class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+@lru_cache(maxsize=1)
+def get_settings():
+    """Build the settings on first use, so importing app.config does not load pydantic."""
+    from pydantic_settings import BaseSettings, SettingsConfigDict
+    from pydantic import AliasChoices, Field
 
-    VT_API_KEY: str | None = Field(default=None)
-    URLSCAN_API_KEY: str | None = Field(default=None)
-    OTX_API_KEY: str | None = Field(default=None)
-    MOCK_MODE: bool = Field(default=False)
+    class Settings(BaseSettings):
+        model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
-settings = Settings()
+        # the Streamlit side reads VIRUSTOTAL_API_KEY; accept either name
+        VT_API_KEY: str | None = Field(default=None, validation_alias=AliasChoices("VT_API_KEY", "VIRUSTOTAL_API_KEY"))
+        URLSCAN_API_KEY: str | None = Field(default=None)
+        OTX_API_KEY: str | None = Field(default=None)
+        MOCK_MODE: bool = Field(default=False)
+
+    return Settings()
+
+def __getattr__(name):
+    # keeps `from app.config import settings` working (resolved lazily)
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
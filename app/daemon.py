@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# app/daemon.py
+"""
+Local lookup daemon: cached verdicts over a Unix domain socket.
+
+    python -m app.daemon                      # serve on $VL_DAEMON_SOCKET
+    python -m app.daemon query https://example.com 44d88612fea8a8f36de82e1278abb02f
+    echo https://example.com | socat - UNIX-CONNECT:$XDG_RUNTIME_DIR/viruslens.sock
+
+The daemon keeps the result cache (latest verdict per IOC, loaded from the
+scan history and refreshed in the background), the HTTP connection pool and
+a scan pool in memory. A lookup is a dict access and never opens the database,
+so callers get answers in well under a millisecond instead of paying Python
+start-up and a DB open per invocation.
+
+Protocol: one request per line, one response line per request, in order
+(requests may be pipelined on one connection).
+
+    https://example.com                         -> {"ioc": ..., "type": ..., "overall_risk": "Low", ...}
+    {"id": 1, "iocs": ["...", "..."]}           -> {"id": 1, "ok": true, "results": [...]}
+    {"id": 2, "iocs": ["..."], "scan": true}    misses are scanned live before answering
+    {"id": 3, "iocs": ["..."], "scan": "async"} misses are queued; answered as "pending"
+    {"op": "stats"} / {"op": "ping"}
+
+Unknown IOCs have "overall_risk": null (or "pending" when queued). Live scans
+are saved to the database like any other scan, except when an engine reported
+an error: that IOC is answered with "overall_risk": null and an "error", and
+nothing is saved or cached, so the next lookup with "scan" tries again.
+
+Socket: VL_DAEMON_SOCKET, default $XDG_RUNTIME_DIR/viruslens.sock (or the
+temp directory); created with mode 0600, so only the owner can connect.
+"""
+import os
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+PENDING = "pending"
+
+def default_socket_path() -> str:
+    return os.getenv("VL_DAEMON_SOCKET") or os.path.join(
+        os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "viruslens.sock")
+
+class LookupService:
+    """Request handling, independent of the transport."""
+
+    def __init__(self, db_path: Optional[str] = None, workers: int = 4, refresh_seconds: float = 5.0):
+        from scan import get_db_path, init_db
+        from app.utils.result_cache import ResultCache
+        self.db_path = str(db_path or get_db_path())
+        init_db(self.db_path)
+        # refreshed by the daemon's background task, never on the lookup path
+        self.cache = ResultCache(self.db_path, refresh_seconds=float("inf"))
+        self.cache.refresh(force=True)
+        self.refresh_seconds = refresh_seconds
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vl-daemon-scan")
+        self.queued: Dict[Tuple[str, str], Any] = {}
+        self.started = time.time()
+        self.requests = 0
+
+    # ----- lookups -----
+
+    def _keys(self, iocs: List[str]) -> List[Tuple[str, str, Tuple[str, str]]]:
+        from app.utils.engines import detect_ioc_type
+        from app.utils.result_cache import normalize
+        out = []
+        for ioc in iocs:
+            ioc = str(ioc).strip()
+            t = detect_ioc_type(ioc)
+            out.append((ioc, t, normalize(ioc, t)))
+        return out
+
+    def lookup(self, iocs: List[str]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """Results for iocs in order, plus the (type, ioc) keys that were misses."""
+        keys = self._keys(iocs)
+        found = self.cache.lookup_many([k for _, _, k in keys])
+        results, misses = [], []
+        for ioc, t, k in keys:
+            v = found.get(k)
+            if v is not None:
+                results.append(v.as_dict())
+            else:
+                pending = k in self.queued
+                results.append({"ioc": ioc, "type": t, "overall_risk": PENDING if pending else None})
+                if t != "unknown" and not pending:
+                    misses.append(k)
+        return results, misses
+
+    # ----- live scans -----
+
+    def _scan(self, key: Tuple[str, str]) -> Dict[str, Any]:
+        from app.utils.engines import aggregate_scan, engine_errors
+        from app.utils.scan_results import save_result
+        res = aggregate_scan(key[1], key[0])
+        errors = engine_errors(res)
+        if errors:
+            # not a verdict: neither saved nor cached, the caller gets an error entry
+            raise RuntimeError(errors)
+        scan_id = None
+        try:
+            scan_id = save_result(res, key[1], db_path=self.db_path, prerender=False)
+        except Exception as e:
+            print(f"daemon: saving {key[1]} failed: {e}", file=sys.stderr)
+        return self.cache.put_result(res, scan_id).as_dict()
+
+    def queue_scan(self, key: Tuple[str, str]):
+        fut = self.queued.get(key)
+        if fut is None:
+            fut = self.queued[key] = self.pool.submit(self._scan, key)
+            # dequeued by a callback, not by _scan itself: a scan that finishes before
+            # the assignment above would otherwise leave the key "pending" for good
+            fut.add_done_callback(lambda _, key=key: self.queued.pop(key, None))
+        return fut
+
+    # ----- requests -----
+
+    async def handle(self, line: str) -> Dict[str, Any]:
+        self.requests += 1
+        line = line.strip()
+        if not line.startswith("{"):
+            results, _ = self.lookup([line])
+            return results[0]
+        try:
+            req = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"invalid JSON: {e}"}
+        rid = req.get("id")
+        op = req.get("op", "lookup")
+        if op == "ping":
+            return {"id": rid, "ok": True}
+        if op == "stats":
+            return {"id": rid, "ok": True, "stats": self.stats()}
+        if op != "lookup":
+            return {"id": rid, "ok": False, "error": f"unknown op {op!r}"}
+        iocs = req.get("iocs")
+        if iocs is None and "ioc" in req:
+            iocs = [req["ioc"]]
+        if not isinstance(iocs, list):
+            return {"id": rid, "ok": False, "error": "expected \"iocs\": [...]"}
+        results, misses = self.lookup(iocs)
+        scan = req.get("scan", False)
+        if misses and scan:
+            futures = {k: self.queue_scan(k) for k in misses}
+            if scan == "async":
+                for r in results:
+                    if r.get("overall_risk") is None and r["type"] != "unknown":
+                        r["overall_risk"] = PENDING
+            else:
+                loop = asyncio.get_running_loop()
+                done = await asyncio.gather(*(asyncio.wrap_future(f, loop=loop) for f in futures.values()),
+                                            return_exceptions=True)
+                by_key = dict(zip(futures, done))
+                for i, (ioc, t, k) in enumerate(self._keys(iocs)):
+                    got = by_key.get(k)
+                    if isinstance(got, dict):
+                        results[i] = got
+                    elif isinstance(got, BaseException):
+                        results[i] = {"ioc": ioc, "type": t, "overall_risk": None, "error": str(got)}
+        return {"id": rid, "ok": True, "results": results}
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "requests": self.requests, "scans_queued": len(self.queued),
+                "uptime": round(time.time() - self.started, 1)}
+
+# ---------- server ----------
+
+async def _client(service: LookupService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            resp = await service.handle(line.decode("utf-8", "replace"))
+            writer.write((json.dumps(resp) + "\n").encode("utf-8"))
+            await writer.drain()  # returns at once unless the client stopped reading
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def _refresher(service: LookupService) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(service.refresh_seconds)
+        await loop.run_in_executor(None, service.cache.refresh, True)
+
+def _claim_socket(path: str) -> None:
+    """Remove a stale socket file; refuse if another daemon is listening on it."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise SystemExit(f"daemon: another instance is listening on {path}")
+
+async def serve(path: str, service: LookupService) -> None:
+    _claim_socket(path)
+    old_umask = os.umask(0o177)  # socket file created as 0600
+    try:
+        server = await asyncio.start_unix_server(lambda r, w: _client(service, r, w), path=path, limit=1 << 22)
+    finally:
+        os.umask(old_umask)
+    refresher = asyncio.create_task(_refresher(service))
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"daemon: {len(service.cache)} cached verdicts, listening on {path}", file=sys.stderr)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        refresher.cancel()
+        service.pool.shutdown(wait=False, cancel_futures=True)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+# ---------- client ----------
+
+def query(requests: List[Dict[str, Any] | str], path: Optional[str] = None, timeout: float = 30.0) -> List[Dict[str, Any]]:
+    """Send requests over one connection and return the responses in order."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or default_socket_path())
+        payload = "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in requests)
+        sock.sendall(payload.encode("utf-8"))
+        fh = sock.makefile("r", encoding="utf-8")
+        return [json.loads(fh.readline()) for _ in requests]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.daemon", description="VirusLens lookup daemon (Unix socket).")
+    ap.add_argument("--socket", default=None, help="socket path (default VL_DAEMON_SOCKET or $XDG_RUNTIME_DIR/viruslens.sock)")
+    sub = ap.add_subparsers(dest="cmd")
+    srv = sub.add_parser("serve", help="run the daemon (default)")
+    srv.add_argument("--db", type=Path, help="database file (default: the app's viruslens.db / VL_DB_FILE)")
+    srv.add_argument("--workers", type=int, default=int(os.getenv("VL_SCAN_WORKERS", "4")), help="live scan threads")
+    srv.add_argument("--refresh-seconds", type=float, default=5.0, help="how often new history rows are loaded")
+    q = sub.add_parser("query", help="look IOCs up through a running daemon")
+    q.add_argument("iocs", nargs="+")
+    q.add_argument("--scan", action="store_true", help="scan misses live")
+    args = ap.parse_args(argv)
+    path = args.socket or default_socket_path()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("daemon: Unix domain sockets are not available on this platform", file=sys.stderr)
+        return 2
+    if args.cmd == "query":
+        try:
+            resp = query([{"iocs": args.iocs, "scan": args.scan}], path)[0]
+        except OSError as e:
+            print(f"daemon: cannot reach {path}: {e}", file=sys.stderr)
+            return 2
+        for r in resp.get("results", []):
+            print(json.dumps(r))
+        return 0 if resp.get("ok") else 1
+
+    service = LookupService(getattr(args, "db", None), workers=getattr(args, "workers", 4),
+                            refresh_seconds=getattr(args, "refresh_seconds", 5.0))
+    try:
+        asyncio.run(serve(path, service))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
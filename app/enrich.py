@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# app/enrich.py
+"""
+Log enrichment: annotate log lines / JSON events with VirusLens verdicts.
+
+    python -m app.enrich /var/log/squid/access.log mail.json   # tail -F the files
+    zcat proxy.log.gz | python -m app.enrich --no-scan           # one pass over stdin
+
+URLs and hashes are extracted from every line (engines.extract_iocs) and
+looked up in the in-memory result cache, which is loaded from the scan
+history (app.utils.result_cache). Each event is written to stdout as one JSON
+line: JSON objects get a "viruslens" key, other lines become
+{"source", "message", "viruslens"}:
+
+    "viruslens": {"overall_risk": "High",
+                  "iocs": [{"ioc": "...", "type": "url", "overall_risk": "High", "scan_id": 12}]}
+
+IOCs the cache does not know are queued for a background scan and reported
+as "pending"; once scanned, later events carrying them are annotated from the
+cache, and the scans are saved to the database in batches. A scan in which an
+engine errored is dropped, so the IOC stays pending and a later event queues
+it again. Events are never
+held back waiting for a scan.
+
+Lines are processed in batches (--batch-size lines or --batch-ms, whichever
+comes first) with one cache lookup and one stdout write per batch, and no
+database access on the hit path - that is what keeps cache hits in the tens
+of thousands of events per second.
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set, TextIO, Tuple
+
+RISK_RANK = {"High": 3, "Medium": 2, "Low": 1}
+PENDING = "pending"
+
+# ---------- input ----------
+
+class LineFeed:
+    """Lines from reader threads, handed to the main loop in batches."""
+
+    def __init__(self, max_buffered: int = 100_000):
+        self.lines: Deque[Tuple[str, str]] = deque()
+        self.ready = threading.Event()
+        self.max_buffered = max_buffered
+        self.stop = threading.Event()
+        self.open_readers = 0
+        self._lock = threading.Lock()
+
+    def push(self, source: str, line: str) -> None:
+        while len(self.lines) >= self.max_buffered and not self.stop.is_set():
+            time.sleep(0.01)  # back-pressure: the main loop is behind
+        self.lines.append((source, line))
+        self.ready.set()
+
+    def reader_started(self) -> None:
+        with self._lock:
+            self.open_readers += 1
+
+    def reader_done(self) -> None:
+        with self._lock:
+            self.open_readers -= 1
+        self.ready.set()
+
+    def exhausted(self) -> bool:
+        return self.open_readers == 0 and not self.lines
+
+    def batch(self, max_lines: int, max_wait: float) -> List[Tuple[str, str]]:
+        if not self.lines:
+            self.ready.wait(max_wait)
+            self.ready.clear()
+        out = []
+        pop = self.lines.popleft
+        while self.lines and len(out) < max_lines:
+            out.append(pop())
+        return out
+
+def read_stream(feed: LineFeed, fh: TextIO, name: str) -> None:
+    try:
+        for line in fh:
+            if feed.stop.is_set():
+                break
+            feed.push(name, line.rstrip("\r\n"))
+    finally:
+        feed.reader_done()
+
+def follow_file(feed: LineFeed, path: str, from_start: bool = False, poll: float = 0.2) -> None:
+    """tail -F: follow appends, reopen after rotation or truncation."""
+    fh = None
+    inode = None
+    partial = ""
+    try:
+        while not feed.stop.is_set():
+            if fh is None:
+                try:
+                    fh = open(path, encoding="utf-8", errors="replace")
+                    inode = os.fstat(fh.fileno()).st_ino
+                    if not from_start:
+                        fh.seek(0, os.SEEK_END)
+                    from_start = True  # files that appear later are read from their start
+                except OSError:
+                    time.sleep(poll)
+                    continue
+            line = fh.readline()
+            if line:
+                if line.endswith("\n"):
+                    feed.push(path, (partial + line).rstrip("\r\n"))
+                    partial = ""
+                else:
+                    partial += line
+                continue
+            try:
+                st = os.stat(path)
+                rotated = st.st_ino != inode or st.st_size < fh.tell()
+            except OSError:
+                rotated = True
+            if rotated:
+                fh.close()
+                fh = None
+                continue
+            time.sleep(poll)
+    finally:
+        if fh is not None:
+            fh.close()
+        feed.reader_done()
+
+# ---------- scanning misses ----------
+
+class MissScanner:
+    """Scans cache misses in the background, once per IOC, and saves them in batches."""
+
+    def __init__(self, cache, workers: int = 4, rate: Optional[str] = None,
+                 max_pending: int = 10_000, db_path: Optional[str] = None):
+        from app.utils.ratelimit import TokenBucket
+        self.cache = cache
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vl-enrich")
+        self.limiter = TokenBucket.parse(rate) if rate else None
+        self.max_pending = max_pending
+        self.db_path = db_path  # None = do not save
+        self.pending: Set[Tuple[str, str]] = set()
+        self.finished: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.scanned = 0
+        self._lock = threading.Lock()
+
+    def submit(self, key: Tuple[str, str]) -> bool:
+        """Queue one (ioc_type, ioc); False when it was already queued or the queue is full."""
+        with self._lock:
+            if key in self.pending:
+                return False
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending.add(key)
+        self.pool.submit(self._scan, key)
+        return True
+
+    def _scan(self, key: Tuple[str, str]) -> None:
+        from app.utils.engines import aggregate_scan, engine_errors
+        try:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            res = aggregate_scan(key[1], key[0])
+            errors = engine_errors(res)
+            if errors:
+                # not a verdict: neither cached nor saved, so the IOC stays pending and is retried
+                print(f"enrich: scan of {key[1]} failed: {errors}", file=sys.stderr)
+                return
+            self.cache.put_result(res)
+            with self._lock:
+                self.finished.append(res)
+                self.scanned += 1
+        except Exception as e:
+            print(f"enrich: scan of {key[1]} failed: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self.pending.discard(key)
+
+    def flush(self) -> None:
+        """Save finished scans in one transaction."""
+        with self._lock:
+            done, self.finished = self.finished, []
+        if done and self.db_path is not None:
+            from app.utils.scan_results import save_results
+            try:
+                save_results(done, db_path=self.db_path)
+            except Exception as e:
+                print(f"enrich: saving {len(done)} scans failed: {e}", file=sys.stderr)
+
+    def close(self, wait: bool = True) -> None:
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
+        self.flush()
+
+# ---------- enrichment ----------
+
+def enrich_batch(batch: List[Tuple[str, str]], cache, scanner: Optional[MissScanner], only_matches: bool = False) -> str:
+    """Enriched NDJSON for a batch of (source, line), with a single cache lookup."""
+    from app.utils.engines import extract_iocs
+    from app.utils.result_cache import normalize
+
+    extracted = [extract_iocs(line) for _, line in batch]
+    wanted = {(t, ioc) for iocs in extracted for ioc, t in iocs}
+    found = cache.lookup_many(wanted) if wanted else {}
+    if scanner is not None:
+        for key, verdict in found.items():
+            if verdict is None:
+                scanner.submit(key)
+
+    out = []
+    for (source, line), iocs in zip(batch, extracted):
+        if not iocs:
+            if only_matches:
+                continue
+            annotation = None
+        else:
+            items = []
+            worst = None
+            for ioc, t in iocs:
+                v = found.get(normalize(ioc, t))
+                risk = v.overall_risk if v is not None else PENDING
+                items.append({"ioc": ioc, "type": t, "overall_risk": risk, "scan_id": v.scan_id if v else None})
+                if RISK_RANK.get(risk, 0) > RISK_RANK.get(worst, 0):
+                    worst = risk
+            annotation = {"overall_risk": worst or PENDING, "iocs": items}
+        event = None
+        if line[:1] == "{":
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None
+        if not isinstance(event, dict):
+            event = {"source": source, "message": line}
+        if annotation is not None:
+            event["viruslens"] = annotation
+        out.append(json.dumps(event, ensure_ascii=False))
+    return "\n".join(out) + "\n" if out else ""
+
+def run(args: argparse.Namespace, out: TextIO = sys.stdout, err: TextIO = sys.stderr) -> int:
+    from scan import get_db_path
+    from app.utils.result_cache import result_cache
+
+    db_path = str(args.db or get_db_path())
+    cache = result_cache(db_path)
+    scanner = None
+    if not args.no_scan:
+        if not args.no_save:
+            from scan import init_db
+            init_db(db_path)
+        scanner = MissScanner(cache, workers=args.workers, rate=args.rate, max_pending=args.max_pending,
+                              db_path=None if args.no_save else db_path)
+
+    feed = LineFeed()
+    sources = args.inputs or ["-"]
+    for src in sources:
+        feed.reader_started()
+        if src == "-":
+            target, targs = read_stream, (feed, sys.stdin, "stdin")
+        else:
+            target, targs = follow_file, (feed, src, args.from_start)
+        threading.Thread(target=target, args=targs, name=f"vl-enrich-read-{src}", daemon=True).start()
+    if not args.quiet:
+        print(f"enrich: {len(cache)} cached verdicts, reading {', '.join(sources)}", file=err)
+
+    events = 0
+    started = last_report = time.monotonic()
+    status = 0
+    try:
+        while not feed.exhausted():
+            batch = feed.batch(args.batch_size, args.batch_ms / 1000)
+            if batch:
+                chunk = enrich_batch(batch, cache, scanner, args.only_matches)
+                if chunk:
+                    out.write(chunk)
+                    out.flush()
+                events += len(batch)
+            if scanner is not None:
+                scanner.flush()
+            now = time.monotonic()
+            if args.stats_seconds and now - last_report >= args.stats_seconds and not args.quiet:
+                rate = events / (now - started) if now > started else 0.0
+                pending = len(scanner.pending) if scanner else 0
+                print(f"enrich: {events} events ({rate:.0f}/s), {len(cache)} cached, {pending} scans pending", file=err)
+                last_report = now
+    except KeyboardInterrupt:
+        status = 130
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+    finally:
+        feed.stop.set()
+        if scanner is not None:
+            # on EOF let queued scans finish so their results are saved; on Ctrl-C drop them
+            scanner.close(wait=status == 0)
+
+    if not args.quiet:
+        elapsed = time.monotonic() - started
+        scanned = scanner.scanned if scanner else 0
+        dropped = scanner.dropped if scanner else 0
+        print(f"enrich: {events} events in {elapsed:.1f}s, {scanned} IOCs scanned, {dropped} misses dropped", file=err)
+    return status
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m app.enrich", description="Annotate log lines / JSON events with VirusLens verdicts.")
+    ap.add_argument("inputs", nargs="*", help="log files to follow (default / '-': read stdin until EOF)")
+    ap.add_argument("--from-start", action="store_true", help="read followed files from the beginning instead of the end")
+    ap.add_argument("--only-matches", action="store_true", help="drop events without URLs or hashes")
+    ap.add_argument("--no-scan", action="store_true", help="annotate from cache / history only; never scan misses")
+    ap.add_argument("--no-save", action="store_true", help="do not write scans of misses to the database")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("VL_SCAN_WORKERS", "4")), help="background scan threads")
+    ap.add_argument("--rate", default=os.getenv("VL_CLI_RATE"), help='max scans started, e.g. "4/min" (default VL_CLI_RATE, unlimited)')
+    ap.add_argument("--max-pending", type=int, default=10_000, help="misses queued at most; more are skipped (default 10000)")
+    ap.add_argument("--batch-size", type=int, default=5000, help="lines per batch (default 5000)")
+    ap.add_argument("--batch-ms", type=float, default=50.0, help="max wait for a batch to fill (default 50)")
+    ap.add_argument("--db", type=Path, help="database file (default: the app's viruslens.db / VL_DB_FILE)")
+    ap.add_argument("--stats-seconds", type=float, default=0.0, help="print throughput to stderr this often")
+    ap.add_argument("-q", "--quiet", action="store_true", help="no status lines on stderr")
+    return ap
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if args.workers < 1 or args.batch_size < 1 or args.max_pending < 1:
+        ap.error("--workers, --batch-size and --max-pending must be at least 1")
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,24 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 # END: ensure project root is importable
 
-import httpx
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
 from .services import virustotal, urlscan, otx
 
+# aggregate_scan() engine name -> app.services coroutine (URLs only)
+URL_CHECKS = {
+    "VirusTotal": virustotal.check_url,
+    "urlscan.io": urlscan.check_url,
+    "AlienVault OTX": otx.check_url,
+}
+
+def _to_int(value) -> int:
+    try:
+        return int(str(value).split(":")[-1])
+    except ValueError:
+        return 0
+
 def combine_verdicts(vt: str, us: str, pulses: int) -> str:
     v = [vt, us]
     if "malicious" in v:
@@ -30,6 +45,7 @@ def summarize(url: str, vt_score: str, us_res: str, pulses: int, verdict: str) -
     return "\n".join(lines)
 
 async def scan_url(url: str) -> dict:
+    import httpx  # only needed once a scan actually runs
     async with httpx.AsyncClient(follow_redirects=True) as session:
         vt = await virustotal.check_url(session, url)
         us = await urlscan.check_url(session, url)
@@ -37,7 +53,7 @@ async def scan_url(url: str) -> dict:
 
     vt_score = vt.get("score", "n/a")
     us_res = us.get("result", "n/a")
-    pulses = int(str(ot.get("pulses", "0")).split(":")[-1]) if isinstance(ot.get("pulses"), str) else int(ot.get("pulses", 0))
+    pulses = _to_int(ot.get("pulses", 0))
 
     verdict = combine_verdicts(vt.get("verdict", "unknown"), us.get("verdict", "unknown"), pulses)
     summary = summarize(url, vt_score, us_res, pulses, verdict)
@@ -49,3 +65,68 @@ async def scan_url(url: str) -> dict:
         "urlscan_result": us_res,
         "otx_pulses": str(pulses),
     }
+
+# ---------- async aggregate (per-engine streaming) ----------
+
+def engine_summary(name: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One app.services result in the aggregate_scan() engine shape, with
+    malicious/suspicious counts so engines.overall_risk() applies unchanged.
+    """
+    verdict = raw.get("verdict")
+    summary: Dict[str, Any] = {"verdict": verdict} if verdict else {}
+    if name == "VirusTotal":
+        score = str(raw.get("score", "")).split(":")[-1]
+        summary["score"] = raw.get("score")
+        summary["malicious"] = _to_int(score.split("/")[0]) if "/" in score else int(verdict == "malicious")
+    elif name == "urlscan.io":
+        summary["result"] = raw.get("result")
+        summary["malicious"] = int(verdict == "malicious")
+        summary["suspicious"] = int(verdict == "suspicious")
+    elif name == "AlienVault OTX":
+        summary["pulses"] = _to_int(raw.get("pulses", 0))
+        summary["suspicious"] = int(summary["pulses"] > 0)  # same rule as combine_verdicts
+    return {"engine": name, "summary": summary, "raw": raw}
+
+async def _check(name: str, check, session, url: str) -> Dict[str, Any]:
+    try:
+        return engine_summary(name, await check(session, url))
+    except Exception as e:
+        return {"engine": name, "summary": {"error": str(e)}}
+
+async def iter_scan_async(ioc: str, ioc_type: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async counterpart of engines.iter_scan(): yields each engine result as it
+    finishes. URLs go through the app.services httpx coroutines on one shared
+    client; other IOC types run the regular engines in worker threads.
+
+    Closing the generator early (e.g. the HTTP client disconnected) cancels
+    the engines still running.
+    """
+    from app.utils.engines import detect_ioc_type, planned_engines, _run_engine
+    t = ioc_type or detect_ioc_type(ioc)
+    plan = planned_engines(ioc, t)
+    if not plan:
+        return
+    session = None
+    if t == "url":
+        import httpx
+        session = httpx.AsyncClient(follow_redirects=True)
+        tasks = [asyncio.ensure_future(_check(name, URL_CHECKS[name], session, ioc))
+                 for name, _ in plan if name in URL_CHECKS]
+    else:
+        tasks = [asyncio.ensure_future(asyncio.to_thread(_run_engine, name, call)) for name, call in plan]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        if session is not None:
+            await session.aclose()
+
+async def aggregate_scan_async(ioc: str, ioc_type: Optional[str] = None) -> Dict[str, Any]:
+    """Async aggregate_scan(): same result shape, engines run concurrently."""
+    from app.utils.engines import detect_ioc_type, build_result
+    t = ioc_type or detect_ioc_type(ioc)
+    return build_result(ioc, t, [eng async for eng in iter_scan_async(ioc, t)])
@@ -10,13 +10,14 @@ if str(ROOT) not in sys.path:
 
 # app/pages/02_Bulk.py
 import io, csv
-import pandas as pd
 import streamlit as st
 
 from app.utils.ui import setup_page, apply_theme
 from app.utils.paths import ensure_dirs
-from app.utils.engines import aggregate_scan, detect_ioc_type
-from app.utils.secrets import get_vt_api_key
+from app.utils.engines import detect_ioc_type
+from app.utils.scan_jobs import submit_bulk
+from app.utils.resources import app_config
+from app.utils.export import ENGINE_COLUMNS, flatten_engines
 
 setup_page("VirusLens — Cyber Threat Analyzer")
 apply_theme()
@@ -55,10 +56,9 @@ with rcol:
     """, unsafe_allow_html=True)
 
 # API key check
-try:
-    _ = get_vt_api_key()
-except Exception as e:
-    st.error(str(e))
+config = app_config()
+if config.vt_error:
+    st.error(config.vt_error)
     st.stop()
 
 lc, rc = st.columns(2)
@@ -71,48 +71,118 @@ with rc:
     txt = st.text_area("One per line (URL or hash)", height=260, placeholder="https://example.com\n44d88612fea8a8f36de82e1278abb02f")
     run_txt = st.button("Scan Pasted", key="run_txt")
 
-def process_rows(items):
-    out = []
-    prog = st.progress(0)
-    for i, row in enumerate(items, start=1):
-        ioc = row.get("input", "").strip()
-        t = row.get("type") or detect_ioc_type(ioc)
-        if not ioc:
-            out.append({"input": "", "type": t, "overall_risk": "N/A", "engines": []})
-            continue
-        try:
-            res = aggregate_scan(ioc, t)
-            out.append({"input": ioc, "type": res["type"], "overall_risk": res["overall_risk"], "engines": res["engines"]})
-        except Exception as e:
-            out.append({"input": ioc, "type": t, "overall_risk": f"error: {e}", "engines": []})
-        prog.progress(min(i / len(items), 1.0))
-    return out
+use_cache = st.checkbox(
+    "Reuse recent verdicts from the scan history",
+    value=False,
+    help="IOCs scanned within VL_RESULT_CACHE_TTL (default 7 days) are answered from history without API calls.",
+)
+share_domains = st.checkbox(
+    "Share verdicts across URLs on the same domain",
+    help="Sites with many URLs get one domain report and a few sampled scans; "
+         "the other URLs on that domain are marked as inferred instead of scanned one by one.",
+)
+
+def results_csv(results) -> bytes:
+    """One row per IOC with flattened per-engine columns (no nested lists in cells)."""
+    flat = [{"input": r["input"], "name": r.get("name") or "", "type": r["type"], "overall_risk": r["overall_risk"],
+             "inferred_from": r.get("inferred") or "", **flatten_engines(r["engines"])} for r in results]
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=["input", "name", "type", "overall_risk", "inferred_from", *ENGINE_COLUMNS])
+    writer.writeheader()
+    writer.writerows(flat)
+    return buf.getvalue().encode("utf-8")
+
+def summary_rows(results):
+    return [{**({"file": r["name"]} if r.get("name") else {}),
+             "input": r["input"], "type": r["type"], "overall": r["overall_risk"], "basis": basis(r)} for r in results]
+
+def basis(r):
+    if r.get("inferred"):
+        return f"inferred from {r['inferred']}"
+    if r.get("cached"):
+        return f"history (scan #{r['cached']})"
+    if r.get("offline"):
+        return "threat feed"
+    return "scanned"
+
+# Bulk jobs run on the shared background pool; a fragment appends new rows each tick
+BULK_KEY = "bulk_job"
+VIEW_KEY = "bulk_view"
+POLL_SECONDS = 1.0
+
+def start_job(rows):
+    st.session_state[BULK_KEY] = submit_bulk(rows, share_domains=share_domains, use_cache=use_cache)
+
+def sync_view(job):
+    """Append only the results that arrived since the last tick."""
+    view = st.session_state.get(VIEW_KEY)
+    if view is None or view.get("job") != job.id:  # new job (here or from the Scan page's sample-set upload)
+        view = st.session_state[VIEW_KEY] = {"job": job.id, "cursor": 0, "rows": [], "hits": []}
+    new = job.results[view["cursor"]:]
+    view["cursor"] += len(new)
+    rows = summary_rows(new)
+    view["rows"].extend(rows)
+    view["hits"].extend(r for r in rows if r["overall"] == "High")
+    return view
+
+def _fmt_seconds(sec):
+    if sec is None:
+        return "—"
+    sec = int(round(sec))
+    return f"{sec // 60}m {sec % 60:02d}s" if sec >= 60 else f"{sec}s"
+
+def render_job(job):
+    view = sync_view(job)
+    done = len(view["rows"])
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Scanned", f"{done} / {job.total}")
+    m2.metric("High risk", len(view["hits"]))
+    m3.metric("Throughput", f"{job.throughput() * 60:.1f} / min")
+    m4.metric("ETA", "done" if job.done() else _fmt_seconds(job.eta()))
+    st.progress(min(done / job.total, 1.0) if job.total else 1.0)
+    if job.offline:
+        st.caption(f"{job.offline} item(s) answered offline from the threat feed, scan history or blank rows, no API quota used.")
+    if job.inferred:
+        st.caption(f"{job.inferred} URL(s) inferred from a near-duplicate URL or their domain's verdict, not scanned individually.")
+    if view["hits"]:
+        st.markdown("**🚨 High-risk hits so far**")
+        st.dataframe(view["hits"], use_container_width=True, hide_index=True)
+    st.dataframe(view["rows"], use_container_width=True, hide_index=True)
+
+@st.fragment(run_every=POLL_SECONDS)
+def poll_job():
+    job = st.session_state.get(BULK_KEY)
+    if job is None or job.done():
+        st.rerun()  # full rerun shows the final table and downloads, and stops polling
+    render_job(job)
+    if st.button("⏹ Stop after current item", key="bulk_stop"):
+        job.cancel()
 
 if run_csv and up is not None:
     try:
+        import pandas as pd  # only needed to parse the uploaded CSV
         df = pd.read_csv(up)
         if "input" not in df.columns:
             st.error("CSV must contain a column named 'input'. Optional column: 'type'.")
         else:
             rows = [{"input": str(r["input"]), "type": (str(r["type"]) if "type" in df.columns else "").strip() or None} for _, r in df.iterrows()]
-            with st.spinner("Processing CSV…"):
-                results = process_rows(rows)
-            # Show summary table
-            show = pd.DataFrame([{"input": r["input"], "type": r["type"], "overall": r["overall_risk"]} for r in results])
-            st.dataframe(show, use_container_width=True)
-            # Download results
-            outdf = pd.DataFrame(results)
-            csv_bytes = outdf.to_csv(index=False).encode("utf-8")
-            st.download_button("Download results CSV", data=csv_bytes, file_name="bulk_results.csv", mime="text/csv")
+            start_job(rows)
     except Exception as e:
         st.error(f"Failed to process: {e}")
 
 if run_txt and txt.strip():
     lines = [ln.strip() for ln in txt.splitlines() if ln.strip()]
-    rows = [{"input": ln, "type": detect_ioc_type(ln)} for ln in lines]
-    with st.spinner("Processing list…"):
-        results = process_rows(rows)
-    show = pd.DataFrame([{"input": r["input"], "type": r["type"], "overall": r["overall_risk"]} for r in results])
-    st.dataframe(show, use_container_width=True)
-    outdf = pd.DataFrame(results)
-    st.download_button("Download results CSV", data=outdf.to_csv(index=False).encode("utf-8"), file_name="bulk_results.csv", mime="text/csv")
+    start_job([{"input": ln, "type": detect_ioc_type(ln)} for ln in lines])
+
+job = st.session_state.get(BULK_KEY)
+if job is not None:
+    if not job.done():
+        poll_job()
+    else:
+        render_job(job)
+        if job.cancelled and len(job.results) < job.total:
+            st.warning(f"Stopped after {len(job.results)} of {job.total} items.")
+        if job.future.exception() is not None:
+            st.error(f"Failed to process: {job.future.exception()}")
+        # Download results
+        st.download_button("Download results CSV", data=results_csv(job.results), file_name="bulk_results.csv", mime="text/csv")
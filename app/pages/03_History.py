@@ -5,7 +5,9 @@ History page - lists recent scans recorded in the local DB.
 This file expects the following functions to be available from app/scan.py:
   - get_db_path()
   - init_db(db_path=None)
-  - list_scans(limit=200, db_path=None)
+  - query_scans(...) / count_scans(...) / scan_facets(db_path) - filtering, sorting
+    and paging run in SQL, so each rerun reads one page of rows
+  - get_scan(scan_id, db_path=None) - full record for the detail view
 
 If your scan module is in a different place adjust the import accordingly.
 """
@@ -16,14 +18,15 @@ from typing import List, Dict, Any
 # Import DB helpers from scan.py
 # ensure scan.py is in the python path or same package (app/scan.py recommended)
 try:
-    from scan import get_db_path, init_db, list_scans
+    from scan import get_db_path, get_scan, query_scans, count_scans, scan_facets
 except Exception as e:
     # Provide a helpful message if import fails
     st.error(f"Failed to import DB helpers from scan.py: {e}")
     raise
 
 # Import UI utilities
-from app.utils.ui import setup_page, apply_theme
+from app.utils.ui import setup_page, apply_theme, render_export_controls
+from app.utils.resources import database
 
 setup_page("History")
 apply_theme()
@@ -47,37 +50,85 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Responsive columns: stack on mobile
-col1, col2 = st.columns([2, 1])
-with col1:
-    limit = st.number_input("Show last N scans", min_value=1, max_value=10000, value=200, step=10, 
-                           help="Number of recent scans to display")
-
-if "history_refresh" not in st.session_state:
-    st.session_state.history_refresh = 0
-
-with col2:
-    if st.button("🔄 Refresh", use_container_width=True, type="secondary"):
-        st.session_state.history_refresh += 1
-        st.rerun()
-
 # Initialize DB (safe, idempotent)
 try:
     db_path = get_db_path()
-    # init_db will create file/tables if missing; pass the path so it's deterministic
-    init_db(db_path)
+    # init_db runs once per process for this path; pass the path so it's deterministic
+    database(str(db_path))
 except Exception as e:
     st.error(f"Failed to initialize DB at expected path: {e}")
     st.stop()
 
-# Read recent scans
-scans: List[Dict[str, Any]] = []
+if "history_refresh" not in st.session_state:
+    st.session_state.history_refresh = 0
+
+SORT_LABELS = {"Newest / ID": "id", "Timestamp": "timestamp", "Risk": "risk", "Type": "type", "Input": "input"}
+PAGE_SIZES = [25, 50, 100, 200]
+
+facets = scan_facets(db_path)
+
+# Filters - Responsive columns: stack on mobile
+f1, f2, f3 = st.columns([1, 1, 2])
+with f1:
+    types = st.multiselect("Type", facets["types"], key="history_types")
+with f2:
+    risks = st.multiselect("Risk", facets["risks"], key="history_risks")
+with f3:
+    search = st.text_input("Search input", placeholder="Part of a URL, file name or hash", key="history_search")
+
+f4, f5, f6, f7 = st.columns([2, 1, 1, 1])
+with f4:
+    dates = st.date_input("Date range (UTC)", value=(), key="history_dates",
+                          help="Pick a start and end date; leave empty for all dates")
+with f5:
+    sort_label = st.selectbox("Sort by", list(SORT_LABELS), key="history_sort")
+with f6:
+    order = st.selectbox("Order", ["Descending", "Ascending"], key="history_order")
+with f7:
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key="history_page_size")
+
+dates = tuple(dates) if isinstance(dates, (list, tuple)) else (dates,)
+filters = {
+    "scan_types": types or None,
+    "risks": risks or None,
+    "since": dates[0].isoformat() if len(dates) >= 1 else None,
+    "until": dates[1].isoformat() if len(dates) >= 2 else None,
+    "search": search.strip() or None,
+}
+
+# Back to page 1 whenever the filters or page size change
+signature = (repr(filters), page_size)
+if st.session_state.get("history_signature") != signature:
+    st.session_state.history_signature = signature
+    st.session_state.history_page = 1
+
+# Read one page of scans
 try:
-    scans = list_scans(limit=int(limit), db_path=db_path)
+    total = count_scans(db_path=db_path, **filters)
 except Exception as e:
     st.error(f"Failed to read scans from DB ({db_path}): {e}")
     st.stop()
 
+pages = max(1, -(-total // page_size))
+st.session_state.history_page = min(st.session_state.get("history_page", 1), pages)
+
+p1, p2 = st.columns([1, 2])
+with p1:
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="history_page")
+with p2:
+    if st.button("🔄 Refresh", use_container_width=True, type="secondary"):
+        st.session_state.history_refresh += 1
+        st.rerun()
+
+scans: List[Dict[str, Any]] = query_scans(
+    sort=SORT_LABELS[sort_label],
+    descending=(order == "Descending"),
+    limit=page_size,
+    offset=(int(page) - 1) * page_size,
+    db_path=db_path,
+    **filters,
+)
+
 # Optional: Clear history (dangerous, show confirm)
 def _clear_history():
     import sqlite3
@@ -99,8 +150,11 @@ def _clear_history():
     except Exception as ex:
         st.error(f"Failed to clear history: {ex}")
 
+with st.expander("📤 Export history (CSV / JSONL / Parquet)"):
+    render_export_controls(db_path, key="history_export")
+
 with st.expander("History controls"):
-    st.write("Adjust limit and refresh/clear history.")
+    st.write("Refresh or clear history.")
     if st.button("Clear history"):
         if st.confirm("Are you sure you want to permanently clear the stored history?"):
             _clear_history()
@@ -108,6 +162,9 @@ with st.expander("History controls"):
 
 # If no scans found, show info
 if not scans:
+    if any(filters.values()):
+        st.info("No scans match these filters.")
+        st.stop()
     st.markdown("""
     <div style="background: rgba(30, 41, 59, 0.6); backdrop-filter: blur(20px); 
                 border: 1px solid rgba(139, 92, 246, 0.2); border-radius: 16px; 
@@ -120,38 +177,31 @@ if not scans:
     st.stop()
 
 # Display the count - Responsive
+first = (int(page) - 1) * page_size + 1
 st.markdown(f"""
 <div style="background: rgba(139, 92, 246, 0.1); border: 1px solid rgba(139, 92, 246, 0.2); 
             border-radius: 12px; padding: clamp(0.75rem, 2vw, 1rem); margin-bottom: 1.5rem;
             display: flex; flex-wrap: wrap; align-items: center; gap: 0.5rem;">
-    <span style="color: #8b5cf6; font-weight: 600; font-size: clamp(0.95rem, 2.5vw, 1rem);">📈 Found {len(scans)} scans</span>
-    <span style="color: #94a3b8; font-size: clamp(0.85rem, 2vw, 0.9rem);">(showing up to {limit})</span>
+    <span style="color: #8b5cf6; font-weight: 600; font-size: clamp(0.95rem, 2.5vw, 1rem);">📈 Found {total} scans</span>
+    <span style="color: #94a3b8; font-size: clamp(0.85rem, 2vw, 0.9rem);">(showing {first}–{first + len(scans) - 1}, page {int(page)} of {pages})</span>
 </div>
 """, unsafe_allow_html=True)
 
 # Render a simple table: id | input | type | risk | summary | timestamp
-table_rows = []
-for s in scans:
-    # ensure keys exist regardless of source table
-    sid = s.get("id", "")
-    inp = s.get("input", s.get("input_value", "")) or ""
-    typ = s.get("type", s.get("scan_type", "")) or ""
-    risk = s.get("risk", "")
-    summary = s.get("summary", "")
-    ts = s.get("timestamp", "") or s.get("created_at", "")
-    table_rows.append({
-        "Scan ID": sid,
-        "Input": inp,
-        "Type": typ,
-        "Risk": risk,
-        "Summary": summary,
-        "Timestamp (UTC)": ts
-    })
+table_rows = [
+    {
+        "Scan ID": s["id"],
+        "Input": s["input"],
+        "Type": s["type"],
+        "Risk": s["risk"],
+        "Summary": s["summary"],
+        "Timestamp (UTC)": s["timestamp"],
+    }
+    for s in scans
+]
 
 # Streamlit can display a list-of-dicts as a dataframe-like table
-import pandas as pd
-df = pd.DataFrame(table_rows)
-st.dataframe(df, use_container_width=True)
+st.dataframe(table_rows, use_container_width=True, hide_index=True)
 
 # Optionally, allow the user to expand a single record for details
 st.markdown("---")
@@ -159,9 +209,9 @@ st.subheader("Details")
 sel = st.selectbox("Select scan (by id) to view full details", options=[r["Scan ID"] for r in table_rows], format_func=lambda v: f"Scan {v}" if v is not None else "(none)")
 
 if sel is not None:
-    # find object
-    found = next((x for x in scans if x.get("id") == sel or str(x.get("id")) == str(sel)), None)
+    # fetch just this record, including its vt_details
+    found = get_scan(int(sel), db_path=db_path)
     if found:
         st.json(found)
     else:
-        st.warning("Selected scan not found in the recent fetch — try Refresh.")
+        st.warning("Selected scan not found — it may have been deleted; try Refresh.")
@@ -6,25 +6,17 @@ Reports page for VirusLens.
 - All content placed inside tables (no raw JSON section)
 Notes:
 - st.set_page_config MUST be the first Streamlit command in this file.
-- The file locates a viruslens.db via st.secrets["VL_DB_FILE"], ENV VL_DB_FILE, or common paths.
+- The DB is located with scan.get_db_path(), the same file the Scan page writes to.
+- The schema probe is cached per DB file; each render runs one query for the picker
+  and one for the selected scan's details.
 """
 
-from pathlib import Path
-import os
-import io
-import sqlite3
-import datetime
-import json
-
 import streamlit as st
 
-# -------------- PDF libraries --------------
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from scan import init_db
-from app.utils.ui import setup_page, apply_theme
+from scan import get_db_path, list_scan_choices, get_scan_detail
+from app.utils.report_cache import get_cached_report, store_report
+from app.utils.ui import setup_page, apply_theme, render_export_controls
+from app.utils.resources import database
 
 # -------------- Streamlit page config (must be the first Streamlit command) --------------
 setup_page("Reports")
@@ -72,483 +64,6 @@ def safe_rerun():
         # nothing more to do
         pass
 
-def get_db_path() -> Path:
-    """
-    Locate the viruslens sqlite DB file robustly.
-    Search order:
-      1. st.secrets["VL_DB_FILE"] (if available)
-      2. ENV VL_DB_FILE
-      3. current working dir ./viruslens.db
-      4. project root (parent of app/) ../viruslens.db
-      5. app subfolder ./app/viruslens.db
-    Returns a Path (may not exist).
-    """
-    # 1) st.secrets if available (guarded)
-    secret_path = None
-    try:
-        if hasattr(st, "secrets") and st.secrets:
-            # st.secrets may be a SecretsSingleton or dict-like
-            try:
-                secret_path = st.secrets.get("VL_DB_FILE")
-            except Exception:
-                # fallback - try attribute-like access
-                secret_path = None
-    except Exception:
-        secret_path = None
-
-    # 2) environment variable
-    env_path = os.environ.get("VL_DB_FILE")
-
-    candidates = []
-    if secret_path:
-        candidates.append(Path(secret_path))
-    if env_path:
-        candidates.append(Path(env_path))
-
-    # cwd
-    candidates.append(Path.cwd() / "viruslens.db")
-
-    # project root (assume this file is app/pages/04_Reports.py)
-    this_file = Path(__file__).resolve()
-    maybe_project_root = this_file.parents[2] if len(this_file.parents) >= 3 else this_file.parent
-    candidates.append(maybe_project_root / "viruslens.db")
-    # app/ subfolder
-    candidates.append(maybe_project_root / "app" / "viruslens.db")
-    # local folder (rare)
-    candidates.append(this_file.parent / "viruslens.db")
-
-    # Return first existing file; if none exist return the canonical project root candidate
-    for p in candidates:
-        try:
-            if p.exists() and p.is_file():
-                return p
-        except Exception:
-            continue
-    return maybe_project_root / "viruslens.db"
-
-
-def fetch_rows_from_db(db_path: Path, limit: int = 200):
-    """
-    Fetch recent scans from the DB using several fallback queries.
-    Returns list[dict] sorted newest-first. If DB missing or unreadable -> [].
-    Each dict keys: id, input, type, risk, summary, timestamp, vt_details (optional dict)
-    """
-    out = []
-    if not db_path:
-        return out
-    if not db_path.exists():
-        return out
-
-    try:
-        conn = sqlite3.connect(str(db_path))
-        cur = conn.cursor()
-
-        # 1) Try 'history' table
-        try:
-            cur.execute("""
-                SELECT id,
-                       COALESCE(input_value, input, target, '') AS input_val,
-                       COALESCE(scan_type, type, '') AS scan_type,
-                       COALESCE(risk_score, status, '') AS risk,
-                       COALESCE(summary, result_json, '') AS summary,
-                       COALESCE(timestamp, created_at, updated_at, '') AS ts
-                FROM history
-                ORDER BY id DESC
-                LIMIT ?
-            """, (limit,))
-            rows = cur.fetchall()
-            if rows:
-                for r in rows:
-                    out.append({
-                        "id": r[0],
-                        "input": r[1],
-                        "type": r[2],
-                        "risk": r[3],
-                        "summary": r[4],
-                        "timestamp": r[5],
-                        "vt_details": {}  # placeholder
-                    })
-                conn.close()
-                return out
-        except Exception:
-            pass
-
-        # 2) Try 'scans' table
-        try:
-            # Check if vt_details column exists
-            cur.execute("PRAGMA table_info(scans)")
-            columns = [row[1] for row in cur.fetchall()]
-            has_vt_details = 'vt_details' in columns
-            has_summary = 'summary' in columns
-            has_risk_score = 'risk_score' in columns
-            
-            # Build query based on available columns
-            if has_vt_details and has_summary and has_risk_score:
-                cur.execute("""
-                    SELECT id,
-                           COALESCE(input, target, '') as input_val,
-                           COALESCE(scan_type, type, '') as scan_type,
-                           COALESCE(risk_score, status, '') as risk,
-                           COALESCE(summary, result_json, '') as summary_field,
-                           COALESCE(vt_details, '{}') as vt_details_json,
-                           COALESCE(created_at, updated_at, '') as ts
-                    FROM scans
-                    ORDER BY id DESC
-                    LIMIT ?
-                """, (limit,))
-            else:
-                cur.execute("""
-                    SELECT id,
-                           COALESCE(target, input, '') as input_val,
-                           COALESCE(scan_type, type, '') as scan_type,
-                           COALESCE(status, '') as status,
-                           COALESCE(result_json, '') as result_json,
-                           COALESCE(created_at, updated_at, '') as ts
-                    FROM scans
-                    ORDER BY id DESC
-                    LIMIT ?
-                """, (limit,))
-            
-            rows = cur.fetchall()
-            if rows:
-                for r in rows:
-                    if has_vt_details and has_summary and has_risk_score:
-                        # New schema with vt_details column
-                        vt_details = {}
-                        vt_details_json = r[5] or "{}"
-                        try:
-                            if vt_details_json and isinstance(vt_details_json, str):
-                                vt_details = json.loads(vt_details_json)
-                            elif isinstance(vt_details_json, dict):
-                                vt_details = vt_details_json
-                        except Exception:
-                            vt_details = {}
-                        
-                        out.append({
-                            "id": r[0],
-                            "input": r[1] or "",
-                            "type": r[2] or "",
-                            "risk": r[3] or "",
-                            "summary": r[4] or "",
-                            "timestamp": r[6] or "",
-                            "vt_details": vt_details
-                        })
-                    else:
-                        # Old schema - try to parse from result_json
-                        vt_details = {}
-                        summary_field = r[4] or ""
-                        try:
-                            parsed = json.loads(summary_field) if isinstance(summary_field, str) and summary_field.strip().startswith("{") else None
-                            if isinstance(parsed, dict):
-                                vt_details = parsed
-                                parsed_summary = parsed.get("summary") or parsed.get("result") or ""
-                            else:
-                                parsed_summary = summary_field
-                        except Exception:
-                            parsed_summary = summary_field
-                        out.append({
-                            "id": r[0],
-                            "input": r[1] or "",
-                            "type": r[2] or "",
-                            "risk": r[3] or "",
-                            "summary": parsed_summary or "",
-                            "timestamp": r[5] or "",
-                            "vt_details": vt_details
-                        })
-                conn.close()
-                return out
-        except Exception:
-            pass
-
-        # 3) Generic fallback: inspect tables and pick the first with rows
-        try:
-            cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [t[0] for t in cur.fetchall()]
-            candidates = ["history", "scans", "scan", "records", "results"]
-            for tbl in candidates:
-                if tbl in tables:
-                    try:
-                        cur.execute(f"SELECT * FROM {tbl} ORDER BY rowid DESC LIMIT ?", (limit,))
-                        rows = cur.fetchall()
-                        colnames = [d[0] for d in cur.description] if cur.description else []
-                        if rows:
-                            for r in rows:
-                                rowd = {colnames[i]: r[i] for i in range(len(colnames))}
-                                out.append({
-                                    "id": rowd.get("id") or rowd.get("rowid") or "",
-                                    "input": rowd.get("target") or rowd.get("input") or rowd.get("input_value") or "",
-                                    "type": rowd.get("scan_type") or rowd.get("type") or "",
-                                    "risk": rowd.get("status") or rowd.get("risk") or "",
-                                    "summary": rowd.get("result_json") or rowd.get("summary") or "",
-                                    "timestamp": rowd.get("created_at") or rowd.get("timestamp") or "",
-                                    "vt_details": {}
-                                })
-                            conn.close()
-                            return out
-                    except Exception:
-                        continue
-        except Exception:
-            pass
-
-        conn.close()
-        return out
-    except Exception:
-        try:
-            conn.close()
-        except Exception:
-            pass
-        return []
-
-
-# ---------------------------
-# PDF Builder
-# ---------------------------
-
-def _wrap_text(text: str, max_length: int = 100, style=None) -> Paragraph:
-    """
-    Wrap long text into a Paragraph that will fit within table cells.
-    Handles JSON strings and long text by formatting them appropriately.
-    """
-    if style is None:
-        styles = getSampleStyleSheet()
-        style = ParagraphStyle(
-            "CellText",
-            parent=styles["Normal"],
-            fontSize=10,
-            leading=12,
-            wordWrap='CJK'  # Enables word wrapping
-        )
-    
-    # Escape XML special characters for Paragraph
-    text = str(text) if text else ""
-    
-    # Try to format JSON strings more readably
-    if text.strip().startswith("{") or text.strip().startswith("["):
-        try:
-            import json
-            parsed = json.loads(text)
-            # Format JSON with line breaks for better readability
-            text = json.dumps(parsed, indent=2, ensure_ascii=False)
-        except (json.JSONDecodeError, ValueError):
-            pass  # Not valid JSON, use as-is
-    
-    # Replace special characters that might break XML parsing
-    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-    
-    # For very long text, truncate but keep it reasonable
-    # max_length * 3 allows for multi-line content but prevents excessive height
-    if len(text) > max_length * 4:
-        # Try to truncate at a word boundary if possible
-        truncated = text[:max_length * 4]
-        last_space = truncated.rfind(' ')
-        if last_space > max_length * 3:
-            text = truncated[:last_space] + "..."
-        else:
-            text = truncated + "..."
-    
-    return Paragraph(text, style)
-
-def _make_metadata_table(scan_obj: dict):
-    """
-    Return a ReportLab Table for Metadata exactly in tabular format.
-    Uses Paragraph objects to enable text wrapping within cells.
-    """
-    styles = getSampleStyleSheet()
-    cell_style = ParagraphStyle(
-        "CellText",
-        parent=styles["Normal"],
-        fontSize=10,
-        leading=12,
-        wordWrap='CJK',
-        spaceAfter=2
-    )
-    label_style = ParagraphStyle(
-        "LabelText",
-        parent=styles["Normal"],
-        fontSize=10,
-        leading=12,
-        wordWrap='CJK'
-    )
-    
-    scan_id = scan_obj.get("id", "")
-    input_val = scan_obj.get("input", "") or scan_obj.get("target", "")
-    scan_type = scan_obj.get("type", "")
-    risk = scan_obj.get("risk", "")
-    summary = scan_obj.get("summary", "") or ""
-    timestamp = scan_obj.get("timestamp", "") or ""
-
-    rows = [
-        [_wrap_text("Scan ID", style=label_style), _wrap_text(str(scan_id), style=cell_style)],
-        [_wrap_text("Input", style=label_style), _wrap_text(input_val, max_length=80, style=cell_style)],
-        [_wrap_text("Type", style=label_style), _wrap_text(scan_type, style=cell_style)],
-        [_wrap_text("Risk Score", style=label_style), _wrap_text(risk, style=cell_style)],
-        [_wrap_text("Summary", style=label_style), _wrap_text(summary if summary else "No summary available", max_length=120, style=cell_style)],
-        [_wrap_text("Timestamp (UTC)", style=label_style), _wrap_text(str(timestamp), style=cell_style)]
-    ]
-
-    tbl = Table(rows, colWidths=[180, 330])
-    tbl.setStyle(TableStyle([
-        ("GRID", (0,0), (-1,-1), 0.6, colors.black),
-        ("BACKGROUND", (0,0), (0,-1), colors.whitesmoke),
-        ("VALIGN", (0,0), (-1,-1), "TOP"),
-        ("LEFTPADDING", (0,0), (-1,-1), 6),
-        ("RIGHTPADDING", (0,0), (-1,-1), 6),
-        ("TOPPADDING", (0,0), (-1,-1), 4),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 4),
-    ]))
-    return tbl
-
-
-def _make_section_table(title: str, rows: list):
-    """
-    Create a two-column table for a section (title handled outside).
-    rows: list of [label, value] - values will be wrapped in Paragraphs
-    """
-    styles = getSampleStyleSheet()
-    cell_style = ParagraphStyle(
-        "SectionCellText",
-        parent=styles["Normal"],
-        fontSize=9,
-        leading=11,
-        wordWrap='CJK',
-        spaceAfter=2
-    )
-    label_style = ParagraphStyle(
-        "SectionLabelText",
-        parent=styles["Normal"],
-        fontSize=9,
-        leading=11,
-        wordWrap='CJK'
-    )
-    
-    # Convert all row values to Paragraphs for proper wrapping
-    wrapped_rows = []
-    for label, value in rows:
-        wrapped_label = _wrap_text(str(label), max_length=50, style=label_style)
-        wrapped_value = _wrap_text(str(value) if value else "Not available", max_length=100, style=cell_style)
-        wrapped_rows.append([wrapped_label, wrapped_value])
-    
-    tbl = Table(wrapped_rows, colWidths=[180, 330])
-    tbl.setStyle(TableStyle([
-        ("GRID", (0,0), (-1,-1), 0.4, colors.grey),
-        ("VALIGN", (0,0), (-1,-1), "TOP"),
-        ("LEFTPADDING", (0,0), (-1,-1), 6),
-        ("RIGHTPADDING", (0,0), (-1,-1), 6),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 4),
-        ("TOPPADDING", (0,0), (-1,-1), 4),
-        ("BACKGROUND", (0,0), (0,-1), colors.whitesmoke)
-    ]))
-    return tbl
-
-
-def build_report_pdf_bytes(scan_obj: dict) -> bytes:
-    """
-    Build and return PDF bytes for the given scan object.
-    The structure matches the report_14 style: metadata table + 10 sections, all tables.
-    """
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter, topMargin=36, bottomMargin=36, leftMargin=36, rightMargin=36)
-    styles = getSampleStyleSheet()
-    normal_style = styles["Normal"]
-    heading_style = ParagraphStyle("Heading", parent=styles["Heading2"], fontSize=12, spaceAfter=6)
-
-    story = []
-
-    # Title
-    title_style = ParagraphStyle("Title", parent=styles["Title"], fontSize=20, spaceAfter=12)
-    story.append(Paragraph("Metadata", title_style))
-    story.append(Spacer(1, 6))
-
-    # Metadata table
-    story.append(_make_metadata_table(scan_obj))
-    story.append(Spacer(1, 12))
-
-    # Sections: use vt_details dict when available
-    vt_details = {}
-    if isinstance(scan_obj.get("vt_details"), dict):
-        vt_details = scan_obj.get("vt_details")
-    
-    # Debug: Log what we're working with
-    import os
-    if os.getenv("DEBUG_REPORTS"):
-        print(f"DEBUG: scan_obj keys: {list(scan_obj.keys())}")
-        print(f"DEBUG: vt_details type: {type(scan_obj.get('vt_details'))}")
-        print(f"DEBUG: vt_details keys: {list(vt_details.keys()) if isinstance(vt_details, dict) else 'Not a dict'}")
-        print(f"DEBUG: Sample vt_details values: {dict(list(vt_details.items())[:5]) if isinstance(vt_details, dict) else 'N/A'}")
-
-    # Helper function to get value or default (handles empty strings)
-    def get_value(key: str, default: str) -> str:
-        val = vt_details.get(key, "")
-        return val if val and str(val).strip() else default
-    
-    # Sections list - 10 sections, each has label/value rows
-    sections = [
-        ("1. URL Reputation & Categorization", [
-            ["Reputation", get_value("reputation", "No reputation / categorization details available.")],
-            ["Category", get_value("category", "No category information available.")],
-            ["Harmless/Malicious Counts", get_value("counts", "Not available.")]
-        ]),
-        ("2. Domain & Hosting Information", [
-            ["Domain", get_value("domain", "No domain/hosting metadata available.")],
-            ["Registrar / WHOIS", get_value("whois", "No public ownership (WHOIS) details were found.")],
-            ["Hosting Country", get_value("country", "Hosting country not specified.")],
-            ["ASN / Network", get_value("asn", "Network/ASN not reported.")]
-        ]),
-        ("3. DNS Records & Network Artifacts", [
-            ["DNS Records", get_value("dns", "No DNS records were reported for this link.")],
-            ["IP Address candidates", get_value("ips", "No IP candidates available.")]
-        ]),
-        ("4. Static Content Inspection", [
-            ["HTML Title", get_value("html_title", "No static content inspection details available.")],
-            ["Detected Scripts / Links", get_value("scripts", "No scripts/resources reported.")],
-            ["Embedded Resources / Tags", get_value("resources", "No notable embedded resources.")]
-        ]),
-        ("5. Dynamic Behavioral Analysis", [
-            ["Redirect Chain", get_value("redirects", "Not reported.")],
-            ["Downloads Attempted", get_value("downloads", "None.")],
-            ["Execution Behavior", get_value("execution", "No suspicious behavior detected.")]
-        ]),
-        ("6. Connections & Relationships", [
-            ["Linked URLs / Files", get_value("linked", "None found.")],
-            ["Communicating Files", get_value("files", "None found.")],
-            ["Contacted Domains", get_value("domains", "None found.")]
-        ]),
-        ("7. SSL/TLS Certificate Information", [
-            ["Issuer", get_value("cert_issuer", "Not available.")],
-            ["Subject", get_value("cert_subject", "Not available.")],
-            ["Validity", get_value("cert_validity", "Not available.")]
-        ]),
-        ("8. Antivirus / Engine Detections", [
-            ["Last Analysis Stats", get_value("av_stats", "No engine detection stats available.")],
-            ["Malicious Engines", get_value("av_malicious", "None reported.")]
-        ]),
-        ("9. Heuristic & Machine Learning Scoring", [
-            ["ML/Heuristic Verdict", get_value("ml_verdict", "No ML verdict provided.")],
-            ["Heuristic Tags", get_value("ml_tags", "None")]
-        ]),
-        ("10. Historical & Community Data", [
-            ["Community Votes", get_value("community", "No community votes.")],
-            ["First Submission Date", get_value("first_seen", "Unknown")],
-            ["Last Analysis Date", get_value("last_seen", "Unknown")]
-        ])
-    ]
-
-    # Render sections as title + table
-    for title, rows in sections:
-        story.append(Paragraph(f"<b>{title}</b>", heading_style))
-        story.append(_make_section_table(title, rows))
-        story.append(Spacer(1, 12))
-
-    # Footer note
-    story.append(Spacer(1, 12))
-    story.append(Paragraph("Generated by VirusLens — Cyber Threat Analyzer", normal_style))
-
-    doc.build(story)
-    pdf_bytes = buf.getvalue()
-    buf.close()
-    return pdf_bytes
-
-
 # ---------------------------
 # Streamlit UI
 # ---------------------------
@@ -577,16 +92,19 @@ st.markdown("""
 limit = st.number_input("Show last N scans", min_value=1, max_value=1000, value=200, step=1,
                        help="Number of recent scans to display")
 
-# Initialize database
-init_db(get_db_path())
+# Initialize database (once per process)
+database(str(db_path))
 
 col1, col2 = st.columns([1, 4])
 with col1:
     if st.button("🔄 Refresh", use_container_width=True):
         safe_rerun()
 
-# Fetch scans from database
-scans = fetch_rows_from_db(db_path, limit=limit)
+with st.expander("📤 Export history (CSV / JSONL / Parquet)"):
+    render_export_controls(db_path, key="reports_export")
+
+# Fetch only id/input for the picker; details are loaded for the selected scan below
+scans = list_scan_choices(limit=int(limit), db_path=db_path)
 
 if not scans:
     st.markdown("""
@@ -617,8 +135,8 @@ selected_scan = st.selectbox(
     label_visibility="collapsed"
 )
 
-scan_obj = selected_scan
-scan_id = scan_obj.get("id", "")
+scan_id = selected_scan.get("id", "")
+scan_obj = get_scan_detail(scan_id, db_path=db_path) or dict(selected_scan)
 
 st.markdown(f"""
 <div style="background: rgba(139, 92, 246, 0.1); border: 1px solid rgba(139, 92, 246, 0.2); 
@@ -646,7 +164,15 @@ with st.expander("🔍 Debug: Scan Data (Click to view)", expanded=False):
 # Generate PDF button
 if st.button("📥 Generate Report PDF", use_container_width=True, type="primary"):
     try:
-        pdf_bytes = build_report_pdf_bytes(scan_obj)
+        # Served from the cache when the Scan page already pre-rendered it
+        pdf_bytes = get_cached_report(scan_obj)
+        if pdf_bytes is None:
+            from app.report_pdf import build_report_pdf_bytes  # reportlab loads only when rendering
+            pdf_bytes = build_report_pdf_bytes(scan_obj)
+            try:
+                store_report(scan_obj, pdf_bytes)
+            except OSError:
+                pass
         filename = f"report_{scan_id}.pdf"
         st.success(f"PDF generated: {filename}")
 
@@ -32,6 +32,8 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.rl_config import defaultPageSize
 
+from app.report_fragments import use_form
+
 # page constants
 PAGE_WIDTH, PAGE_HEIGHT = A4
 LEFT_MARGIN = 18 * mm
@@ -51,19 +53,44 @@ def _ensure_reports_dir():
     return out_dir
 
 
-def _draw_header(c, title):
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(LEFT_MARGIN, PAGE_HEIGHT - TOP_MARGIN, title)
-    # small divider line
-    c.setLineWidth(0.5)
-    c.line(LEFT_MARGIN, PAGE_HEIGHT - TOP_MARGIN - 6, PAGE_WIDTH - RIGHT_MARGIN, PAGE_HEIGHT - TOP_MARGIN - 6)
+# Header and the static part of the footer are identical on every page of a
+# report: they are painted once into PDF forms and referenced per page.
+FOOTER_FONT = ("Helvetica", 8)
+FOOTER_PAD = 3  # room below the baseline inside the footer form for descenders
 
 
-def _draw_footer(c, page_num):
-    c.setFont("Helvetica", 8)
-    footer_text = f"VirusLens — Generated {datetime.datetime.utcnow().isoformat(timespec='seconds')} UTC  •  page {page_num}"
-    c.drawRightString(PAGE_WIDTH - RIGHT_MARGIN, BOTTOM_MARGIN - 6, footer_text)
+def _draw_header(c, title):
+    def paint(fc):
+        fc.setFillColorRGB(0, 0, 0)
+        fc.setFont("Helvetica-Bold", 16)
+        fc.drawString(LEFT_MARGIN, PAGE_HEIGHT - TOP_MARGIN, title)
+        # small divider line
+        fc.setLineWidth(0.5)
+        fc.line(LEFT_MARGIN, PAGE_HEIGHT - TOP_MARGIN - 6, PAGE_WIDTH - RIGHT_MARGIN, PAGE_HEIGHT - TOP_MARGIN - 6)
+
+    use_form(c, "vl_page_header", PAGE_WIDTH, PAGE_HEIGHT, paint)
+
+
+def _draw_footer(c, page_num, generated=None):
+    generated = generated or datetime.datetime.utcnow().isoformat(timespec='seconds')
+    prefix = f"VirusLens — Generated {generated} UTC  •  page "
+    number = str(page_num)
+    prefix_w = c.stringWidth(prefix, *FOOTER_FONT)
+    x_right = PAGE_WIDTH - RIGHT_MARGIN - c.stringWidth(number, *FOOTER_FONT)
+    y = BOTTOM_MARGIN - 6
+
+    def paint(fc):
+        fc.setFillColorRGB(0, 0, 0)
+        fc.setFont(*FOOTER_FONT)
+        fc.drawString(0, FOOTER_PAD, prefix)
+
+    c.saveState()
+    c.translate(x_right - prefix_w, y - FOOTER_PAD)
+    use_form(c, "vl_page_footer", prefix_w, FOOTER_FONT[1] + FOOTER_PAD, paint)
+    c.restoreState()
+    # only the page number is drawn fresh on each page
+    c.setFont(*FOOTER_FONT)
+    c.drawString(x_right, y, number)
 
 
 def _available_height(c, y_cursor):
@@ -110,10 +137,11 @@ def create_pdf_for_scan(scan_id, repo_getter):
 
     page_num = 1
     y = PAGE_HEIGHT - TOP_MARGIN - HEADER_HEIGHT  # starting y after header
+    generated = datetime.datetime.utcnow().isoformat(timespec='seconds')
 
     # add header & footer for first page
     _draw_header(c, f"VirusLens — Scan Report (id: {scan_id})")
-    _draw_footer(c, page_num)
+    _draw_footer(c, page_num, generated)
 
     # small top spacing
     y -= 16
@@ -137,7 +165,7 @@ def create_pdf_for_scan(scan_id, repo_getter):
             page_num += 1
             y = PAGE_HEIGHT - TOP_MARGIN - HEADER_HEIGHT
             _draw_header(c, f"VirusLens — Scan Report (id: {scan_id})")
-            _draw_footer(c, page_num)
+            _draw_footer(c, page_num, generated)
             y -= 16
 
         # draw title
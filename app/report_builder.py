@@ -32,6 +32,8 @@ from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
 from reportlab.platypus.tables import LongTable, TableStyle
 from xml.sax.saxutils import escape as xml_escape
 
+from app.report_fragments import text_fragment
+
 
 # =============================== Styles ==================================== #
 
@@ -56,6 +58,38 @@ CELL_HEADER = ParagraphStyle(
     name="CellHeader", parent=BODY, fontName="Helvetica-Bold", fontSize=9, wordWrap="CJK"
 )
 
+LONG_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eeeeee")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, 0), 9),
+
+    ("GRID", (0, 0), (-1, -1), 0.3, colors.gray),
+    ("BOX", (0, 0), (-1, -1), 0.6, colors.gray),
+    ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+
+    ("WORDWRAP", (0, 0), (-1, -1), "CJK"),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("LEFTPADDING", (0, 0), (-1, -1), 6),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+    ("TOPPADDING", (0, 0), (-1, -1), 4),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+])
+
+
+# ======================= Static fragments (PDF forms) ======================= #
+# Section headings and the "Aspect | Details" header row are the same in every
+# report; they are drawn from form XObjects (see app/report_fragments.py)
+# instead of being re-parsed as Paragraphs for every table and page. A form is
+# a single unwrapped line, so caller text (the report title) stays a Paragraph.
+
+def _h2(text: str):
+    return text_fragment(text, H2.fontName, H2.fontSize, leading=H2.leading,
+                         space_before=H2.spaceBefore, space_after=H2.spaceAfter)
+
+def _header_cell(text: str):
+    return text_fragment(text, CELL_HEADER.fontName, CELL_HEADER.fontSize, leading=CELL_HEADER.leading)
+
 
 # ============================ Small helpers ================================= #
 
@@ -93,29 +127,13 @@ def _expand_row(label: str, value_text: str) -> List[List[Paragraph]]:
 
 def _make_long_table(rows: List[Tuple[str, str]], col_widths=(6 * cm, 10 * cm)) -> LongTable:
     """Build a LongTable with header and wrapped cells; rows can split across pages."""
-    header = [_p("Aspect", CELL_HEADER), _p("Details", CELL_HEADER)]
+    header = [_header_cell("Aspect"), _header_cell("Details")]
     body: List[List[Paragraph]] = []
     for label, text in rows:
         body.extend(_expand_row(label, text))
 
     t = LongTable([header] + body, colWidths=list(col_widths), repeatRows=1, splitByRow=1)
-    t.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eeeeee")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 9),
-
-        ("GRID", (0, 0), (-1, -1), 0.3, colors.gray),
-        ("BOX", (0, 0), (-1, -1), 0.6, colors.gray),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-
-        ("WORDWRAP", (0, 0), (-1, -1), "CJK"),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 6),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-        ("TOPPADDING", (0, 0), (-1, -1), 4),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-    ]))
+    t.setStyle(LONG_TABLE_STYLE)
     return t
 
 def _get(raw: Dict[str, Any], path: List[str]) -> Any:
@@ -307,7 +325,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story: List[Any] = []
 
     # Header
-    story.append(Paragraph(title, H1))
+    story.append(_p(title, H1))
     story.append(Paragraph(f"Generated: {datetime.utcnow().isoformat()}Z", BODY))
     story.append(Spacer(1, 0.5 * cm))
 
@@ -320,12 +338,12 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
         ("Summary", str(metadata.get("Summary", "—"))),
         ("Timestamp (UTC)", str(metadata.get("Timestamp (UTC)", "—"))),
     ]
-    story.append(Paragraph("Metadata", H2))
+    story.append(_h2("Metadata"))
     story.append(_make_long_table(meta_pairs))
     story.append(Spacer(1, 0.5 * cm))
 
     # 1) URL Reputation & Categorization
-    story.append(Paragraph("1. URL Reputation & Categorization", H2))
+    story.append(_h2("1. URL Reputation & Categorization"))
     sec1: List[Tuple[str, str]] = [
         ("Reputation", layman_reputation(_get(raw_json, ["data", "attributes", "reputation"]))),
         ("Category", layman_categories(_get(raw_json, ["data", "attributes", "categories"]))),
@@ -335,7 +353,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 2) Domain & Hosting Information
-    story.append(Paragraph("2. Domain & Hosting Information", H2))
+    story.append(_h2("2. Domain & Hosting Information"))
     sec2: List[Tuple[str, str]] = [
         ("Domain (ID/URL)", layman_domain_id(raw_json)),
         ("Registrar / WHOIS", layman_whois(raw_json)),
@@ -346,7 +364,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 3) DNS Records & Network Artifacts
-    story.append(Paragraph("3. DNS Records & Network Artifacts", H2))
+    story.append(_h2("3. DNS Records & Network Artifacts"))
     sec3: List[Tuple[str, str]] = [
         ("DNS Records", layman_dns(raw_json)),
         ("IP Address candidates", layman_ip_candidates(_get(raw_json, ["data", "attributes", "last_analysis_stats"]))),
@@ -355,7 +373,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 4) Static Content Inspection
-    story.append(Paragraph("4. Static Content Inspection", H2))
+    story.append(_h2("4. Static Content Inspection"))
     sec4: List[Tuple[str, str]] = [
         ("HTML Title", layman_html_title(raw_json)),
         ("Detected Scripts / Links", layman_scripts(raw_json)),
@@ -365,7 +383,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 5) Dynamic Behavioral Analysis
-    story.append(Paragraph("5. Dynamic Behavioral Analysis", H2))
+    story.append(_h2("5. Dynamic Behavioral Analysis"))
     sec5: List[Tuple[str, str]] = [
         ("Redirect Chain", layman_redirects(raw_json)),
         ("Downloads Attempted", layman_downloads(raw_json)),
@@ -375,7 +393,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 6) Connections & Relationships
-    story.append(Paragraph("6. Connections & Relationships", H2))
+    story.append(_h2("6. Connections & Relationships"))
     sec6: List[Tuple[str, str]] = [
         ("Linked URLs / Files", layman_relationships(raw_json, ["data", "relationships", "downloaded_files"], "items")),
         ("Communicating Files", layman_relationships(raw_json, ["data", "relationships", "communicating_files"], "files")),
@@ -385,7 +403,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 7) SSL/TLS Certificate Information
-    story.append(Paragraph("7. SSL/TLS Certificate Information", H2))
+    story.append(_h2("7. SSL/TLS Certificate Information"))
     sec7: List[Tuple[str, str]] = [
         ("Issuer", layman_cert_field(raw_json, "issuer", "Certificate issuer")),
         ("Subject", layman_cert_field(raw_json, "subject", "Certificate subject")),
@@ -395,7 +413,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 8) Antivirus / Engine Detections
-    story.append(Paragraph("8. Antivirus / Engine Detections", H2))
+    story.append(_h2("8. Antivirus / Engine Detections"))
     last_stats = _get(raw_json, ["data", "attributes", "last_analysis_stats"]) or {}
     last_results = _get(raw_json, ["data", "attributes", "last_analysis_results"]) or {}
     malicious_engs = [k for k, v in (last_results.items() if isinstance(last_results, dict) else []) if isinstance(v, dict) and v.get("category") == "malicious"]
@@ -407,7 +425,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 9) Heuristic & Machine Learning Scoring
-    story.append(Paragraph("9. Heuristic & Machine Learning Scoring", H2))
+    story.append(_h2("9. Heuristic & Machine Learning Scoring"))
     verdict = _get(raw_json, ["data", "attributes", "verdict"])
     tags = _get(raw_json, ["data", "attributes", "tags"]) or []
     plain_verdict = "No automated (ML/heuristic) verdict was provided." if not verdict else f"Automated verdict: {verdict}"
@@ -420,7 +438,7 @@ def make_pdf_report(path: str, title: str, metadata: Dict[str, Any], raw_json: D
     story.append(Spacer(1, 0.4 * cm))
 
     # 10) Historical & Community Data
-    story.append(Paragraph("10. Historical & Community Data", H2))
+    story.append(_h2("10. Historical & Community Data"))
     sec10: List[Tuple[str, str]] = [
         ("Community Votes", layman_votes(raw_json)),
         ("First Submission Date", layman_date_field(raw_json, ["data", "attributes", "first_submission_date"], "First seen")),
@@ -0,0 +1,116 @@
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# app/report_fragments.py
+"""
+Invariant report fragments rendered once as PDF form XObjects.
+
+Title blocks, section headings, table header cells and footers are identical
+from report to report. A fragment is painted into a named form the first time
+a document uses it and every later use is a single `doForm` reference, so the
+output carries one copy of the drawing and no Paragraph parsing or line
+breaking is repeated for it.
+
+Fragment *specs* (size, form name, painter) are cached module-wide; the
+Flowable wrapping a spec is created per use because platypus stores the
+canvas on the flowable while drawing, so instances must not be shared
+between concurrent builds.
+
+Public helpers:
+    use_form(canv, name, width, height, paint)   - define once per canvas, then doForm
+    text_fragment(text, font, size, leading, ...) -> Flowable
+    TextForm(...)                                 - canvas-level text form (headers/footers)
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Callable, NamedTuple
+
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus.flowables import Flowable
+
+
+def use_form(canv, name: str, width: float, height: float, paint: Callable) -> None:
+    """Draw form `name` at the current origin, painting it first if this canvas lacks it."""
+    if not canv.hasForm(name):
+        canv.beginForm(name, 0, 0, width, height)
+        paint(canv)
+        canv.endForm()
+    canv.doForm(name)
+
+
+class TextForm(NamedTuple):
+    """A single line of text as a form; origin is the bottom-left of its box."""
+    name: str
+    text: str
+    font: str
+    size: float
+    width: float
+    height: float
+    baseline: float
+    color: object
+
+    def paint(self, canv) -> None:
+        canv.setFillColor(self.color)
+        canv.setFont(self.font, self.size)
+        canv.drawString(0, self.baseline, self.text)
+
+    def draw(self, canv, x: float, y: float) -> None:
+        canv.saveState()
+        canv.translate(x, y)
+        use_form(canv, self.name, self.width, self.height, self.paint)
+        canv.restoreState()
+
+    def draw_right(self, canv, x_right: float, y: float) -> None:
+        self.draw(canv, x_right - self.width, y)
+
+
+@lru_cache(maxsize=512)
+def text_form(text: str, font: str = "Helvetica", size: float = 10, leading: float = 0,
+              color: object = colors.black) -> TextForm:
+    leading = leading or size * 1.2
+    digest = hashlib.sha1(f"{font}|{size}|{leading}|{color}|{text}".encode("utf-8")).hexdigest()[:12]
+    return TextForm(
+        name=f"vlfrag_{digest}",
+        text=text,
+        font=font,
+        size=size,
+        width=stringWidth(text, font, size),
+        height=leading,
+        # same first-baseline placement Paragraph uses: top of box minus font size
+        baseline=leading - size,
+        color=color,
+    )
+
+
+class FormFragment(Flowable):
+    """Flowable that draws a cached TextForm; cheap to create, nothing to lay out."""
+
+    def __init__(self, form: TextForm, space_before: float = 0, space_after: float = 0,
+                 h_align: str = "LEFT"):
+        super().__init__()
+        self.form = form
+        self.width = form.width
+        self.height = form.height
+        self.spaceBefore = space_before
+        self.spaceAfter = space_after
+        self.hAlign = h_align
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        use_form(self.canv, self.form.name, self.form.width, self.form.height, self.form.paint)
+
+
+def text_fragment(text: str, font: str = "Helvetica", size: float = 10, leading: float = 0,
+                  space_before: float = 0, space_after: float = 0, h_align: str = "LEFT",
+                  color: object = colors.black) -> FormFragment:
+    """One-line static text (heading, title, table header cell) as a form-backed flowable."""
+    return FormFragment(text_form(text, font, size, leading, color), space_before, space_after, h_align)
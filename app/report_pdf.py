@@ -0,0 +1,264 @@
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# app/report_pdf.py
+"""
+Tabular PDF report used by the Reports page.
+
+Builds the report_14-style layout (metadata table + 10 sections, all tables)
+from a scan dict as returned by scan.get_scan / scan.list_scans.
+
+Public function:
+    build_report_pdf_bytes(scan_obj) -> bytes
+"""
+
+import io
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+from app.report_fragments import text_fragment
+
+# ---------------------------
+# Styles (built once per process; ParagraphStyle/TableStyle are read-only during builds)
+# ---------------------------
+
+_styles = getSampleStyleSheet()
+
+CELL_STYLE = ParagraphStyle("CellText", parent=_styles["Normal"], fontSize=10, leading=12, wordWrap='CJK')
+META_CELL_STYLE = ParagraphStyle("MetaCellText", parent=_styles["Normal"], fontSize=10, leading=12,
+                                 wordWrap='CJK', spaceAfter=2)
+META_LABEL_STYLE = ParagraphStyle("MetaLabelText", parent=_styles["Normal"], fontSize=10, leading=12, wordWrap='CJK')
+SECTION_CELL_STYLE = ParagraphStyle("SectionCellText", parent=_styles["Normal"], fontSize=9, leading=11,
+                                    wordWrap='CJK', spaceAfter=2)
+SECTION_LABEL_STYLE = ParagraphStyle("SectionLabelText", parent=_styles["Normal"], fontSize=9, leading=11,
+                                     wordWrap='CJK')
+
+META_TABLE_STYLE = TableStyle([
+    ("GRID", (0,0), (-1,-1), 0.6, colors.black),
+    ("BACKGROUND", (0,0), (0,-1), colors.whitesmoke),
+    ("VALIGN", (0,0), (-1,-1), "TOP"),
+    ("LEFTPADDING", (0,0), (-1,-1), 6),
+    ("RIGHTPADDING", (0,0), (-1,-1), 6),
+    ("TOPPADDING", (0,0), (-1,-1), 4),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 4),
+])
+SECTION_TABLE_STYLE = TableStyle([
+    ("GRID", (0,0), (-1,-1), 0.4, colors.grey),
+    ("VALIGN", (0,0), (-1,-1), "TOP"),
+    ("LEFTPADDING", (0,0), (-1,-1), 6),
+    ("RIGHTPADDING", (0,0), (-1,-1), 6),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 4),
+    ("TOPPADDING", (0,0), (-1,-1), 4),
+    ("BACKGROUND", (0,0), (0,-1), colors.whitesmoke)
+])
+
+# Invariant text (title, headings, footer) is drawn from PDF form fragments;
+# these mirror the Title / Heading2 / Normal styles the Paragraphs used.
+def _title(text: str):
+    return text_fragment(text, "Helvetica-Bold", 20, leading=22, space_after=12, h_align="CENTER")
+
+def _heading(text: str):
+    return text_fragment(text, "Helvetica-Bold", 12, leading=18, space_before=12, space_after=6)
+
+def _footer_note(text: str):
+    return text_fragment(text, "Helvetica", 10, leading=12)
+
+# ---------------------------
+# PDF Builder
+# ---------------------------
+
+def _wrap_text(text: str, max_length: int = 100, style=None) -> Paragraph:
+    """
+    Wrap long text into a Paragraph that will fit within table cells.
+    Handles JSON strings and long text by formatting them appropriately.
+    """
+    if style is None:
+        style = CELL_STYLE
+    
+    # Escape XML special characters for Paragraph
+    text = str(text) if text else ""
+    
+    # Try to format JSON strings more readably
+    if text.strip().startswith("{") or text.strip().startswith("["):
+        try:
+            import json
+            parsed = json.loads(text)
+            # Format JSON with line breaks for better readability
+            text = json.dumps(parsed, indent=2, ensure_ascii=False)
+        except (json.JSONDecodeError, ValueError):
+            pass  # Not valid JSON, use as-is
+    
+    # Replace special characters that might break XML parsing
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    
+    # For very long text, truncate but keep it reasonable
+    # max_length * 3 allows for multi-line content but prevents excessive height
+    if len(text) > max_length * 4:
+        # Try to truncate at a word boundary if possible
+        truncated = text[:max_length * 4]
+        last_space = truncated.rfind(' ')
+        if last_space > max_length * 3:
+            text = truncated[:last_space] + "..."
+        else:
+            text = truncated + "..."
+    
+    return Paragraph(text, style)
+
+def _make_metadata_table(scan_obj: dict):
+    """
+    Return a ReportLab Table for Metadata exactly in tabular format.
+    Uses Paragraph objects to enable text wrapping within cells.
+    """
+    cell_style = META_CELL_STYLE
+    label_style = META_LABEL_STYLE
+
+    scan_id = scan_obj.get("id", "")
+    input_val = scan_obj.get("input", "") or scan_obj.get("target", "")
+    scan_type = scan_obj.get("type", "")
+    risk = scan_obj.get("risk", "")
+    summary = scan_obj.get("summary", "") or ""
+    timestamp = scan_obj.get("timestamp", "") or ""
+
+    rows = [
+        [_wrap_text("Scan ID", style=label_style), _wrap_text(str(scan_id), style=cell_style)],
+        [_wrap_text("Input", style=label_style), _wrap_text(input_val, max_length=80, style=cell_style)],
+        [_wrap_text("Type", style=label_style), _wrap_text(scan_type, style=cell_style)],
+        [_wrap_text("Risk Score", style=label_style), _wrap_text(risk, style=cell_style)],
+        [_wrap_text("Summary", style=label_style), _wrap_text(summary if summary else "No summary available", max_length=120, style=cell_style)],
+        [_wrap_text("Timestamp (UTC)", style=label_style), _wrap_text(str(timestamp), style=cell_style)]
+    ]
+
+    tbl = Table(rows, colWidths=[180, 330])
+    tbl.setStyle(META_TABLE_STYLE)
+    return tbl
+
+
+def _make_section_table(title: str, rows: list):
+    """
+    Create a two-column table for a section (title handled outside).
+    rows: list of [label, value] - values will be wrapped in Paragraphs
+    """
+    cell_style = SECTION_CELL_STYLE
+    label_style = SECTION_LABEL_STYLE
+
+    # Convert all row values to Paragraphs for proper wrapping
+    wrapped_rows = []
+    for label, value in rows:
+        wrapped_label = _wrap_text(str(label), max_length=50, style=label_style)
+        wrapped_value = _wrap_text(str(value) if value else "Not available", max_length=100, style=cell_style)
+        wrapped_rows.append([wrapped_label, wrapped_value])
+    
+    tbl = Table(wrapped_rows, colWidths=[180, 330])
+    tbl.setStyle(SECTION_TABLE_STYLE)
+    return tbl
+
+
+def build_report_pdf_bytes(scan_obj: dict) -> bytes:
+    """
+    Build and return PDF bytes for the given scan object.
+    The structure matches the report_14 style: metadata table + 10 sections, all tables.
+    """
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=letter, topMargin=36, bottomMargin=36, leftMargin=36, rightMargin=36)
+    story = []
+
+    # Title
+    story.append(_title("Metadata"))
+    story.append(Spacer(1, 6))
+
+    # Metadata table
+    story.append(_make_metadata_table(scan_obj))
+    story.append(Spacer(1, 12))
+
+    # Sections: use vt_details dict when available
+    vt_details = {}
+    if isinstance(scan_obj.get("vt_details"), dict):
+        vt_details = scan_obj.get("vt_details")
+    
+    # Debug: Log what we're working with
+    import os
+    if os.getenv("DEBUG_REPORTS"):
+        print(f"DEBUG: scan_obj keys: {list(scan_obj.keys())}")
+        print(f"DEBUG: vt_details type: {type(scan_obj.get('vt_details'))}")
+        print(f"DEBUG: vt_details keys: {list(vt_details.keys()) if isinstance(vt_details, dict) else 'Not a dict'}")
+        print(f"DEBUG: Sample vt_details values: {dict(list(vt_details.items())[:5]) if isinstance(vt_details, dict) else 'N/A'}")
+
+    # Helper function to get value or default (handles empty strings)
+    def get_value(key: str, default: str) -> str:
+        val = vt_details.get(key, "")
+        return val if val and str(val).strip() else default
+    
+    # Sections list - 10 sections, each has label/value rows
+    sections = [
+        ("1. URL Reputation & Categorization", [
+            ["Reputation", get_value("reputation", "No reputation / categorization details available.")],
+            ["Category", get_value("category", "No category information available.")],
+            ["Harmless/Malicious Counts", get_value("counts", "Not available.")]
+        ]),
+        ("2. Domain & Hosting Information", [
+            ["Domain", get_value("domain", "No domain/hosting metadata available.")],
+            ["Registrar / WHOIS", get_value("whois", "No public ownership (WHOIS) details were found.")],
+            ["Hosting Country", get_value("country", "Hosting country not specified.")],
+            ["ASN / Network", get_value("asn", "Network/ASN not reported.")]
+        ]),
+        ("3. DNS Records & Network Artifacts", [
+            ["DNS Records", get_value("dns", "No DNS records were reported for this link.")],
+            ["IP Address candidates", get_value("ips", "No IP candidates available.")]
+        ]),
+        ("4. Static Content Inspection", [
+            ["HTML Title", get_value("html_title", "No static content inspection details available.")],
+            ["Detected Scripts / Links", get_value("scripts", "No scripts/resources reported.")],
+            ["Embedded Resources / Tags", get_value("resources", "No notable embedded resources.")]
+        ]),
+        ("5. Dynamic Behavioral Analysis", [
+            ["Redirect Chain", get_value("redirects", "Not reported.")],
+            ["Downloads Attempted", get_value("downloads", "None.")],
+            ["Execution Behavior", get_value("execution", "No suspicious behavior detected.")]
+        ]),
+        ("6. Connections & Relationships", [
+            ["Linked URLs / Files", get_value("linked", "None found.")],
+            ["Communicating Files", get_value("files", "None found.")],
+            ["Contacted Domains", get_value("domains", "None found.")]
+        ]),
+        ("7. SSL/TLS Certificate Information", [
+            ["Issuer", get_value("cert_issuer", "Not available.")],
+            ["Subject", get_value("cert_subject", "Not available.")],
+            ["Validity", get_value("cert_validity", "Not available.")]
+        ]),
+        ("8. Antivirus / Engine Detections", [
+            ["Last Analysis Stats", get_value("av_stats", "No engine detection stats available.")],
+            ["Malicious Engines", get_value("av_malicious", "None reported.")]
+        ]),
+        ("9. Heuristic & Machine Learning Scoring", [
+            ["ML/Heuristic Verdict", get_value("ml_verdict", "No ML verdict provided.")],
+            ["Heuristic Tags", get_value("ml_tags", "None")]
+        ]),
+        ("10. Historical & Community Data", [
+            ["Community Votes", get_value("community", "No community votes.")],
+            ["First Submission Date", get_value("first_seen", "Unknown")],
+            ["Last Analysis Date", get_value("last_seen", "Unknown")]
+        ])
+    ]
+
+    # Render sections as title + table
+    for title, rows in sections:
+        story.append(_heading(title))
+        story.append(_make_section_table(title, rows))
+        story.append(Spacer(1, 12))
+
+    # Footer note
+    story.append(Spacer(1, 12))
+    story.append(_footer_note("Generated by VirusLens — Cyber Threat Analyzer"))
+
+    doc.build(story)
+    pdf_bytes = buf.getvalue()
+    buf.close()
+    return pdf_bytes
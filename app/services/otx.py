@@ -1,9 +1,14 @@
-import httpx
-from ..config import settings
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from ..config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
 
 BASE = "https://otx.alienvault.com/api/v1/indicators/url/{url}/general"
 
 async def check_url(session: httpx.AsyncClient, url: str) -> dict:
+    settings = get_settings()
     if settings.MOCK_MODE or not settings.OTX_API_KEY:
         return {"pulses": "mock:0"}
     headers = {"X-OTX-API-KEY": settings.OTX_API_KEY}
@@ -1,10 +1,15 @@
-import httpx
-from ..config import settings
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from ..config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
 
 SUBMIT = "https://urlscan.io/api/v1/scan/"
 RESULT = "https://urlscan.io/api/v1/result/{uuid}"
 
 async def check_url(session: httpx.AsyncClient, url: str) -> dict:
+    settings = get_settings()
     if settings.MOCK_MODE or not settings.URLSCAN_API_KEY:
         # mock: flag .exe/.zip as suspicious
         verdict = "suspicious" if any(url.endswith(x) for x in [".exe",".zip"]) else "clean"
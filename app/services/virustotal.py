@@ -1,9 +1,14 @@
-import httpx
-from ..config import settings
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from ..config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
 
 BASE = "https://www.virustotal.com/api/v3/urls"
 
 async def check_url(session: httpx.AsyncClient, url: str) -> dict:
+    settings = get_settings()
     if settings.MOCK_MODE or not settings.VT_API_KEY:
         # deterministic mock
         verdict = "malicious" if any(x in url for x in ["mal", "phish", "bad"]) else "clean"
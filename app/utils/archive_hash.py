@@ -0,0 +1,310 @@
+# app/utils/archive_hash.py
+"""
+Hash many uploaded files, and the members of zip / tar archives, on all cores.
+
+    entries = hash_uploads([("samples.zip", up.getbuffer()), ("a.exe", other.getbuffer())])
+    entries = hash_paths(["/cases/42/samples.tar.gz"])
+    # [{"name": "samples.zip/dropper.exe", "size": ..., "md5": ..., "sha1": ..., "sha256": ...}, ...]
+    job = submit_bulk(bulk_rows(entries), use_cache=True)
+
+Nothing is extracted to disk. Each upload is copied once into shared memory
+(files given by path are opened by path); worker processes attach to it, open
+the archive in place and stream every member through hashing.hash_stream(),
+so members are decompressed and hashed chunk by chunk in the workers:
+
+  zip                   members are split into batches by size; each worker
+                        opens the central directory and hashes its batch
+  tar                   member offsets are read in the parent; workers hash
+                        their byte ranges directly
+  tar.gz / .bz2 / .xz   one worker streams the archive front to back (a
+                        compressed tar has no random access)
+  anything else         hashed as one file
+
+Workers: VL_HASH_PROCESSES (default: CPU count). Small inputs (under
+INLINE_BYTES in total) are hashed in-process, where starting a pool would cost
+more than it saves. Nested archives are hashed as files, not expanded.
+Limits: VL_ARCHIVE_MAX_MEMBERS (default 10000) members per archive and
+VL_ARCHIVE_MAX_BYTES (default 4 GiB) of declared uncompressed size, so an
+archive bomb is rejected up front instead of hashed for hours.
+"""
+from __future__ import annotations
+import io
+import os
+import zlib
+import tarfile
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.utils.hashing import hash_stream
+
+INLINE_BYTES = 16 << 20
+BATCH_TARGET = 64 << 20  # zip / tar bytes per worker task
+# what a corrupt, truncated or encrypted member raises; recorded per entry, never raised
+MEMBER_ERRORS = (OSError, EOFError, RuntimeError, NotImplementedError, zlib.error,
+                 tarfile.TarError, zipfile.BadZipFile)
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+def _workers() -> int:
+    return _env_int("VL_HASH_PROCESSES", os.cpu_count() or 2)
+
+class Source(NamedTuple):
+    """Where a worker finds the bytes: a file path, or a shared-memory block of `size` bytes."""
+    name: str
+    path: Optional[str] = None
+    shm: Optional[str] = None
+    size: int = 0
+
+class _MemReader(io.RawIOBase):
+    """Seekable read-only file over a memoryview (zipfile / tarfile need seek and tell)."""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._view) - self._pos)
+        if n <= 0:
+            return 0
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        self._view = memoryview(b"")
+        super().close()
+
+class _Opened:
+    """Context manager: a binary file for a Source (attaching to shared memory when needed)."""
+
+    def __init__(self, src: Source):
+        self.src = src
+        self._shm = None
+        self._view = None
+        self._fh: Optional[BinaryIO] = None
+
+    def __enter__(self) -> BinaryIO:
+        if self.src.path is not None:
+            self._fh = open(self.src.path, "rb")
+        else:
+            self._shm = shared_memory.SharedMemory(name=self.src.shm)
+            self._view = self._shm.buf[:self.src.size]
+            self._fh = io.BufferedReader(_MemReader(self._view), buffer_size=1 << 20)
+        return self._fh
+
+    def __exit__(self, *exc) -> None:
+        self._fh.close()
+        if self._shm is not None:
+            self._view.release()
+            self._shm.close()
+
+# ---------- archive detection and planning (parent process) ----------
+
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+def _kind(fh: BinaryIO) -> str:
+    fh.seek(0)
+    head = fh.read(512)
+    fh.seek(0)
+    if zipfile.is_zipfile(fh):
+        fh.seek(0)
+        return "zip"
+    fh.seek(0)
+    if head.startswith(_COMPRESSED_MAGIC):
+        try:
+            with tarfile.open(fileobj=fh, mode="r:*") as tf:
+                tf.next()  # only the first header: the whole stream is read by the worker
+            return "tarstream"
+        except (tarfile.TarError, OSError, EOFError):
+            return "file"
+        finally:
+            fh.seek(0)
+    if len(head) >= 262 and head[257:262] == b"ustar":
+        return "tar"
+    return "file"
+
+def is_archive(fh: BinaryIO) -> bool:
+    """Whether fh holds a zip or tar archive (fh is left at position 0)."""
+    return _kind(fh) != "file"
+
+def _batches(items: List[Tuple[Any, int]]) -> List[List[Any]]:
+    """Group (item, size) into tasks of about BATCH_TARGET bytes, keeping order."""
+    out: List[List[Any]] = [[]]
+    acc = 0
+    for item, size in items:
+        if out[-1] and acc + size > BATCH_TARGET:
+            out.append([])
+            acc = 0
+        out[-1].append(item)
+        acc += size
+    return [b for b in out if b]
+
+def _check_limits(src: Source, count: int, total: int) -> None:
+    max_members = _env_int("VL_ARCHIVE_MAX_MEMBERS", 10000)
+    max_bytes = _env_int("VL_ARCHIVE_MAX_BYTES", 4 << 30)
+    if count > max_members:
+        raise ValueError(f"{src.name}: {count} members (limit {max_members}, VL_ARCHIVE_MAX_MEMBERS)")
+    if total > max_bytes:
+        raise ValueError(f"{src.name}: {total} bytes uncompressed (limit {max_bytes}, VL_ARCHIVE_MAX_BYTES)")
+
+def plan_tasks(src: Source) -> List[Tuple[str, Source, Any]]:
+    """Worker tasks for one source: ("file"|"zip"|"tar"|"tarstream", src, payload)."""
+    with _Opened(src) as fh:
+        kind = _kind(fh)
+        if kind == "zip":
+            with zipfile.ZipFile(fh) as zf:
+                infos = [i for i in zf.infolist() if not i.is_dir()]
+            _check_limits(src, len(infos), sum(i.file_size for i in infos))
+            return [("zip", src, batch) for batch in _batches([(i.filename, i.file_size) for i in infos])]
+        if kind == "tar":
+            with tarfile.open(fileobj=fh, mode="r:") as tf:
+                members = [m for m in tf.getmembers() if m.isfile()]
+            _check_limits(src, len(members), sum(m.size for m in members))
+            ranges = [((m.name, m.offset_data, m.size), m.size) for m in members]
+            return [("tar", src, batch) for batch in _batches(ranges)]
+    return [(kind, src, None)]
+
+# ---------- workers ----------
+
+def _entry(name: str, fh: BinaryIO) -> Dict[str, Any]:
+    return {"name": name, **hash_stream(fh).as_dict()}
+
+class _Range(io.RawIOBase):
+    """A byte range of another file (one member of a plain tar)."""
+
+    def __init__(self, fh: BinaryIO, offset: int, size: int):
+        self._fh, self._left = fh, size
+        fh.seek(offset)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._left <= 0:
+            return 0
+        n = self._fh.readinto(memoryview(b)[:min(len(b), self._left)])
+        self._left -= n or 0
+        return n or 0
+
+def _error(name: str, e: BaseException) -> Dict[str, Any]:
+    return {"name": name, "error": str(e) or type(e).__name__}
+
+def run_task(task: Tuple[str, Source, Any]) -> List[Dict[str, Any]]:
+    """
+    Hash one task. A member that cannot be read (corrupt, truncated,
+    encrypted) is recorded as {"name", "error"}; the rest are still hashed.
+    """
+    kind, src, payload = task
+    out: List[Dict[str, Any]] = []
+    try:
+        with _Opened(src) as fh:
+            if kind == "file":
+                out.append(_entry(src.name, fh))
+            elif kind == "zip":
+                with zipfile.ZipFile(fh) as zf:
+                    for member in payload:
+                        try:
+                            with zf.open(member) as mf:
+                                out.append(_entry(f"{src.name}/{member}", mf))
+                        except MEMBER_ERRORS as e:
+                            out.append(_error(f"{src.name}/{member}", e))
+            elif kind == "tar":
+                for member, offset, size in payload:
+                    try:
+                        out.append(_entry(f"{src.name}/{member}", _Range(fh, offset, size)))
+                    except MEMBER_ERRORS as e:
+                        out.append(_error(f"{src.name}/{member}", e))
+            elif kind == "tarstream":
+                _hash_tarstream(src, fh, out)
+    except MEMBER_ERRORS as e:
+        out.append(_error(src.name, e))  # the archive itself could not be opened
+    return out
+
+def _hash_tarstream(src: Source, fh: BinaryIO, out: List[Dict[str, Any]]) -> None:
+    max_members = _env_int("VL_ARCHIVE_MAX_MEMBERS", 10000)
+    name = src.name
+    try:
+        with tarfile.open(fileobj=fh, mode="r|*") as tf:
+            for m in tf:
+                if not m.isfile():
+                    continue
+                if len(out) >= max_members:
+                    out.append({"name": src.name, "error": f"stopped after {max_members} members"})
+                    break
+                name = f"{src.name}/{m.name}"
+                out.append(_entry(name, tf.extractfile(m)))
+                name = src.name
+    except MEMBER_ERRORS as e:
+        # a truncated stream ends the archive: what was hashed so far is kept
+        out.append(_error(name, e))
+
+# ---------- entry points ----------
+
+def _run(sources: List[Source], workers: Optional[int]) -> List[Dict[str, Any]]:
+    tasks: List[Tuple[str, Source, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for src in sources:
+        try:
+            tasks.extend(plan_tasks(src))
+        except (ValueError, OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+            errors.append({"name": src.name, "error": str(e)})
+    total = sum(s.size for s in sources)
+    workers = min(workers or _workers(), len(tasks))
+    if workers <= 1 or total < INLINE_BYTES:
+        results = [run_task(t) for t in tasks]
+    else:
+        # spawn, not fork: the Streamlit server is multithreaded (as in prerender.py)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(run_task, tasks))  # map keeps upload / member order
+    return errors + [e for batch in results for e in batch]
+
+def hash_uploads(files: Iterable[Tuple[str, Any]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    (name, bytes-like) pairs (e.g. UploadedFile.name, UploadedFile.getbuffer())
+    -> one entry per file or archive member, in upload order.
+    """
+    blocks: List[shared_memory.SharedMemory] = []
+    sources: List[Source] = []
+    try:
+        for name, data in files:
+            view = memoryview(data).cast("B")
+            shm = shared_memory.SharedMemory(create=True, size=max(1, len(view)))
+            blocks.append(shm)
+            shm.buf[:len(view)] = view
+            sources.append(Source(name=name, shm=shm.name, size=len(view)))
+        return _run(sources, workers)
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+def hash_paths(paths: Iterable[Path | str], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Like hash_uploads() for files on disk (archives are still not extracted)."""
+    sources = [Source(name=Path(p).name, path=str(p), size=Path(p).stat().st_size) for p in paths]
+    return _run(sources, workers)
+
+def bulk_rows(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bulk job rows for hashed entries: the SHA-256 as the IOC, the file name as its label."""
+    return [{"input": e["sha256"], "type": "hash", "label": e["name"]} for e in entries if "sha256" in e]
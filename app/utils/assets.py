@@ -0,0 +1,176 @@
+# app/utils/assets.py
+"""
+Static asset pipeline for the Streamlit UI.
+
+    python -m app.utils.assets          # or: make assets
+
+builds into static/dist/ (served by Streamlit at /app/static/dist/ when
+server.enableStaticServing is on):
+  - viruslens-bg.<hash>.webp        compressed background (+ .avif when Pillow supports it)
+  - viruslens-bg.<hash>.jpg         progressive JPEG fallback
+  - manifest.json                   logical name -> built files
+
+File names carry a content hash and URLs add ?v=<hash>; Streamlit's static
+handler (tornado) answers requests that carry `v` with a 10-year
+Cache-Control, so browsers fetch each version once.
+
+Streamlit serves anything that is not an image/PDF as text/plain with
+X-Content-Type-Options: nosniff, so browsers will not apply a stylesheet
+(or decode an .avif) from /app/static. The theme CSS is therefore injected
+inline, minified once per process, and no stylesheet is built; the .avif
+variant is for deployments that put a CDN or reverse proxy in front of the
+app. The background image is opt-in (VL_THEME_BACKGROUND=1), so by default
+the only saving is the smaller inline CSS: the theme is the plain gradient
+and no image is fetched.
+
+The built files are committed, since Streamlit Community Cloud has no build
+step; rebuild after changing the theme or the source images.
+"""
+from __future__ import annotations
+import re
+import sys
+import json
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+STATIC_DIR = ROOT / "static"          # next to main.py, the script `streamlit run` serves
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST = DIST_DIR / "manifest.json"
+STATIC_URL = "/app/static"
+
+# logical name -> source image
+IMAGES = {"viruslens-bg": STATIC_DIR / "img" / "viruslens-bg.jpg"}
+MAX_WIDTH = 1920
+WEBP_QUALITY = 78
+AVIF_QUALITY = 55
+JPEG_QUALITY = 80
+
+# ---------- CSS ----------
+
+_COMMENTS = re.compile(r"/\*.*?\*/", re.S)
+_SPACES = re.compile(r"\s+")
+_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_COLON = re.compile(r":\s+")  # never followed by whitespace in selectors
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace. Safe for the theme's CSS (no strings with braces)."""
+    css = _COMMENTS.sub("", css)
+    css = _SPACES.sub(" ", css)
+    css = _PUNCT.sub(r"\1", css)
+    css = _COLON.sub(":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+def _write_hashed(stem: str, ext: str, data: bytes) -> Dict[str, Any]:
+    h = _digest(data)
+    name = f"{stem}.{h}{ext}"
+    path = DIST_DIR / name
+    if not path.exists():
+        path.write_bytes(data)
+    return {"file": name, "hash": h, "bytes": len(data)}
+
+# ---------- images ----------
+
+def _avif_supported() -> bool:
+    try:
+        from PIL import Image
+        Image.init()
+        return "AVIF" in Image.SAVE
+    except Exception:
+        return False
+
+def _encode_image(src: Path) -> Dict[str, bytes]:
+    import io
+    from PIL import Image
+
+    source = src.read_bytes()
+    with Image.open(io.BytesIO(source)) as im:
+        resized = im.width > MAX_WIDTH
+        im = im.convert("RGB")
+        if resized:
+            im = im.resize((MAX_WIDTH, round(im.height * MAX_WIDTH / im.width)), Image.LANCZOS)
+        out: Dict[str, bytes] = {}
+        buf = io.BytesIO()
+        im.save(buf, "WEBP", quality=WEBP_QUALITY, method=6)
+        out[".webp"] = buf.getvalue()
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        # keep the original JPEG when re-encoding would not make it smaller
+        jpg = buf.getvalue()
+        out[".jpg"] = source if not resized and src.suffix.lower() in (".jpg", ".jpeg") and len(source) <= len(jpg) else jpg
+        if _avif_supported():
+            buf = io.BytesIO()
+            im.save(buf, "AVIF", quality=AVIF_QUALITY)
+            out[".avif"] = buf.getvalue()
+    return out
+
+# ---------- build ----------
+
+def build_assets() -> Dict[str, Any]:
+    """Build every asset into DIST_DIR, drop stale versions and write the manifest."""
+    DIST_DIR.mkdir(parents=True, exist_ok=True)
+    manifest: Dict[str, Any] = {"images": {}}
+    for name, src in IMAGES.items():
+        if not src.exists():
+            continue
+        variants = {ext.lstrip("."): _write_hashed(name, ext, data) for ext, data in _encode_image(src).items()}
+        variants["source_bytes"] = src.stat().st_size
+        manifest["images"][name] = variants
+
+    keep = {"manifest.json"}
+    keep |= {v["file"] for img in manifest["images"].values() for v in img.values() if isinstance(v, dict)}
+    for old in DIST_DIR.iterdir():
+        if old.is_file() and old.name not in keep:
+            old.unlink()
+    MANIFEST.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    load_manifest.cache_clear()
+    return manifest
+
+# ---------- runtime lookup ----------
+
+@lru_cache(maxsize=1)
+def load_manifest() -> Dict[str, Any]:
+    try:
+        return json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def static_serving_enabled() -> bool:
+    try:
+        import streamlit as st
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+def asset_url(entry: Dict[str, Any]) -> str:
+    return f"{STATIC_URL}/dist/{entry['file']}?v={entry['hash']}"
+
+def image_urls(name: str) -> Optional[Dict[str, str]]:
+    """{"webp": url, "jpg": url} for a built image, or None when unavailable / not served."""
+    img = load_manifest().get("images", {}).get(name)
+    if not img or not static_serving_enabled():
+        return None
+    # .avif is left out: Streamlit serves it as text/plain (see module docstring)
+    urls = {fmt: asset_url(img[fmt]) for fmt in ("webp", "jpg") if fmt in img}
+    return urls if "jpg" in urls else None
+
+def main(argv: Optional[List[str]] = None) -> int:
+    manifest = build_assets()
+    for name, variants in manifest["images"].items():
+        print(f"img/{name:18} {'(source)':36} {variants['source_bytes']:>8} B")
+        for fmt, entry in variants.items():
+            if isinstance(entry, dict):
+                print(f"    {fmt:18} {entry['file']:36} {entry['bytes']:>8} B")
+    if not _avif_supported():
+        print("AVIF skipped: this Pillow build has no AVIF encoder")
+    print(f"Wrote {MANIFEST}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+# app/utils/bulk_plan.py
+"""
+Planning for bulk scans: decide what needs the network before anything runs.
+
+    plan = plan_bulk(rows)                  # rows: [{"input", "type"}, ...]
+    plan.offline                            # results answered locally (threat feed, history, blank rows)
+    for group in plan.groups:               # one network scan per distinct IOC
+        res = scan_row(group[0]); ...       # then fan the result out to every row in the group
+
+Rows are grouped by normalised IOC so a list that repeats an indicator spends
+quota on it once, and every indicator listed in the offline threat feed is
+answered before the first provider call. With use_cache=True, IOCs with a
+recent verdict in the scan history (result_cache, VL_RESULT_CACHE_TTL) are
+answered from it as well, in one batched lookup. The groups left to scan are then
+ordered by the local URL pre-score (url_features.prescore, VL_BULK_PRESCORE)
+so likely-malicious items are scanned first within the rate limits. Planning
+is local and cheap: one pass over the rows, one feed probe per distinct IOC
+and one vectorised feature pass over the URLs.
+
+Domain sharing (plan_bulk(rows, share_domains=True), the Bulk page checkbox):
+URLs are grouped by registered domain (eTLD+1 from tldextract); a domain with
+at least VL_DOMAIN_SHARE_MIN distinct URLs (default 5) gets one VirusTotal
+domain report plus full scans of VL_DOMAIN_SAMPLES representative URLs
+(default 2: the highest pre-score and the shortest), and every other URL on it
+is given the combined verdict marked "inferred". Same-site lists then cost a
+handful of calls per site instead of one submit-poll-fetch cycle per URL.
+
+Near-duplicate clustering (on by default, VL_BULK_CLUSTER=0 turns it off):
+URLs are grouped by canonical form (tracking parameters stripped, query keys
+sorted) as exact duplicates, then by url_clusters.template_key() (host + path
+template with numeric / hex / UUID / token segments masked). One
+representative per cluster, the one with the highest pre-score, is scanned;
+the other rows carry "near_duplicate_of" and get its verdict marked
+"inferred". Both passes are a dict lookup per row, so planning stays linear on
+million-line feeds.
+
+Domain sharing runs before template clustering: it needs every distinct URL
+on a domain to reach VL_DOMAIN_SHARE_MIN, and clustering would first fold
+same-site URLs into a few groups. Clustering then folds what is left.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+Group = List[Dict[str, Any]]  # rows answered by one scan of group[0]
+NEAR_KEY = "near_duplicate_of"  # set on rows that reuse a near-duplicate's scan
+
+@dataclass
+class DomainShare:
+    """URLs on one registered domain: a few are scanned, the rest inherit the verdict."""
+    domain: str
+    samples: List[Group]
+    inferred: List[Group]
+
+@dataclass
+class BulkPlan:
+    offline: List[Dict[str, Any]] = field(default_factory=list)
+    groups: List[Group] = field(default_factory=list)
+    prescores: List[float] = field(default_factory=list)  # parallel to groups
+    shares: List[DomainShare] = field(default_factory=list)
+
+    @property
+    def to_scan(self) -> int:
+        return len(self.groups) + sum(len(d.samples) for d in self.shares)
+
+    @property
+    def duplicates(self) -> int:
+        return sum(len(g) - 1 for g in self.groups)
+
+    @property
+    def near_duplicates(self) -> int:
+        groups = self.groups + [g for d in self.shares for g in d.samples + d.inferred]
+        return sum(1 for g in groups for row in g if row.get(NEAR_KEY))
+
+def _row_type(row: Dict[str, Any]) -> str:
+    from app.utils.engines import detect_ioc_type
+    return row.get("type") or detect_ioc_type((row.get("input") or "").strip())
+
+def _row_key(row: Dict[str, Any]) -> Tuple[str, str]:
+    from app.utils.engines import detect_ioc_type
+    from app.utils.result_cache import normalize
+    from app.utils.url_clusters import canonical_url
+    ioc = (row.get("input") or "").strip()
+    t, key = normalize(ioc, row.get("type") or detect_ioc_type(ioc))
+    return (t, canonical_url(key)) if t == "url" and ioc else (t, key)
+
+def offline_result(ioc: str, ioc_type: str) -> Optional[Dict[str, Any]]:
+    """A scan_row()-shaped result when the threat feed lists the IOC, else None."""
+    from app.utils.engines import build_result
+    from app.utils.threat_feed import feed_engine_result, feed_match
+    hit = feed_match(ioc)
+    if hit is None:
+        return None
+    res = build_result(ioc, ioc_type, [feed_engine_result(hit)])
+    return {"input": ioc, "type": ioc_type, "overall_risk": res["overall_risk"], "engines": res["engines"], "offline": True}
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+def cluster_enabled() -> bool:
+    return os.getenv("VL_BULK_CLUSTER", "1").lower() not in ("0", "false", "no", "off")
+
+def answer_row(row: Dict[str, Any], res: Dict[str, Any]) -> Dict[str, Any]:
+    """res as the result for one input row (its own input text, plus its file name if it has one)."""
+    out = {**res, "input": (row.get("input") or "").strip()}
+    if row.get("label"):
+        out["name"] = row["label"]
+    return out
+
+def plan_bulk(rows: List[Dict[str, Any]], share_domains: bool = False, cluster: Optional[bool] = None,
+              use_cache: bool = False) -> BulkPlan:
+    """Split rows into offline answers and groups of identical IOCs to scan, most suspicious first."""
+    plan = BulkPlan()
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    answered: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for row in rows:
+        ioc = (row.get("input") or "").strip()
+        t, key_ioc = _row_key(row)
+        if not ioc:
+            plan.offline.append({"input": "", "type": t, "overall_risk": "N/A", "engines": []})
+            continue
+        key = (t, key_ioc)
+        if key in groups:
+            groups[key].append(row)
+            continue
+        if key not in answered:
+            answered[key] = offline_result(ioc, t) or {}
+        if answered[key]:
+            plan.offline.append(answer_row(row, answered[key]))
+        else:
+            groups[key] = [row]
+            plan.groups.append(groups[key])
+    if use_cache:
+        _answer_cached(plan)
+    _prioritize(plan)
+    if share_domains:
+        _share_domains(plan)
+    if cluster_enabled() if cluster is None else cluster:
+        _cluster(plan)
+    return plan
+
+def _answer_cached(plan: BulkPlan) -> None:
+    """Answer groups whose IOC has a fresh verdict in the scan history."""
+    from app.utils.result_cache import normalize, result_cache
+    keys = [(_row_type(g[0]), (g[0].get("input") or "").strip()) for g in plan.groups]
+    found = result_cache().lookup_many(keys)
+    kept: List[Group] = []
+    for group, (t, ioc) in zip(plan.groups, keys):
+        v = found.get(normalize(ioc, t))
+        if v is None:
+            kept.append(group)
+            continue
+        res = {"input": ioc, "type": t, "overall_risk": v.overall_risk, "engines": [], "cached": v.scan_id}
+        plan.offline.extend(answer_row(row, res) for row in group)
+    plan.groups = kept
+
+def _cluster(plan: BulkPlan) -> None:
+    """Fold URL groups with the same template key into the first (highest pre-score) such group."""
+    from app.utils.url_clusters import template_key
+    reps: Dict[str, Group] = {}
+    kept: List[int] = []
+    for i, group in enumerate(plan.groups):
+        head = group[0]
+        if _row_type(head) != "url":
+            kept.append(i)
+            continue
+        key = template_key((head.get("input") or "").strip())
+        rep = reps.get(key)
+        if rep is None:
+            reps[key] = group
+            kept.append(i)
+        else:
+            rep_ioc = (rep[0].get("input") or "").strip()
+            rep.extend({**row, NEAR_KEY: rep_ioc} for row in group)
+    plan.groups = [plan.groups[i] for i in kept]
+    plan.prescores = [plan.prescores[i] for i in kept]
+
+def _prioritize(plan: BulkPlan) -> None:
+    """Order groups by URL pre-score, highest first (stable, so ties keep input order)."""
+    from app.utils.url_features import prescore_enabled, prescore_rows
+    if not plan.groups or not prescore_enabled():
+        plan.prescores = [0.0] * len(plan.groups)
+        return
+    scores = prescore_rows([g[0] for g in plan.groups])
+    order = sorted(range(len(plan.groups)), key=lambda i: -scores[i])
+    plan.groups = [plan.groups[i] for i in order]
+    plan.prescores = [scores[i] for i in order]
+
+def _share_domains(plan: BulkPlan) -> None:
+    """Move URL groups on busy registered domains out of plan.groups into DomainShares."""
+    from app.utils.url_features import url_features
+    url_idx = [i for i, g in enumerate(plan.groups) if _row_type(g[0]) == "url"]
+    if not url_idx:
+        return
+    feats = url_features([(plan.groups[i][0].get("input") or "").strip() for i in url_idx])
+    by_domain: Dict[str, List[int]] = {}
+    for i, domain in zip(url_idx, feats["registered_domain"].tolist()):
+        if domain:
+            by_domain.setdefault(domain, []).append(i)
+    min_size = _env_int("VL_DOMAIN_SHARE_MIN", 5)
+    n_samples = _env_int("VL_DOMAIN_SAMPLES", 2)
+    shared = set()
+    for domain, members in by_domain.items():
+        if len(members) < min_size:
+            continue
+        # members are in pre-score order: the first is the most suspicious URL, add the shortest
+        picks = [members[0]]
+        for i in sorted(members, key=lambda i: len(plan.groups[i][0].get("input") or "")):
+            if len(picks) >= n_samples:
+                break
+            if i not in picks:
+                picks.append(i)
+        plan.shares.append(DomainShare(
+            domain=domain,
+            samples=[plan.groups[i] for i in picks],
+            inferred=[plan.groups[i] for i in members if i not in picks],
+        ))
+        shared.update(members)
+    keep = [i for i in range(len(plan.groups)) if i not in shared]
+    plan.groups = [plan.groups[i] for i in keep]
+    plan.prescores = [plan.prescores[i] for i in keep]
+
+def inferred_result(ioc: str, share: DomainShare, domain_engine: Dict[str, Any],
+                    samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A scan_row()-shaped result for a URL that was not scanned itself: the
+    domain report plus the sampled URLs' verdicts, marked "inferred".
+    """
+    from app.utils.engines import build_result
+    risks = [r.get("overall_risk") for r in samples]
+    sampled = {
+        "engine": "Domain samples",
+        "summary": {
+            "malicious": risks.count("High"),
+            "suspicious": risks.count("Medium"),
+            "sampled": [r.get("input") for r in samples],
+            "domain": share.domain,
+            "inferred": True,
+        },
+    }
+    domain_engine = {**domain_engine, "summary": {**(domain_engine.get("summary") or {}), "inferred": True}}
+    domain_engine.pop("raw", None)
+    res = build_result(ioc, "url", [domain_engine, sampled])
+    return {"input": ioc, "type": "url", "overall_risk": res["overall_risk"], "engines": res["engines"],
+            "inferred": share.domain}
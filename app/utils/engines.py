@@ -1,14 +1,68 @@
 # app/utils/engines.py
 from __future__ import annotations
 import os
+import re
 import time
 import json
-import hashlib
-import requests
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
 
 from app.utils.secrets import get_vt_api_key
 
+# ---------- HTTP transport ----------
+
+HTTP_TIMEOUT = float(os.getenv("VL_HTTP_TIMEOUT", "30"))
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+def http_session() -> requests.Session:
+    """
+    One pooled requests.Session per process, shared by every engine, page and
+    worker thread so TCP/TLS connections to the providers are reused. Engine
+    headers (API keys) are passed per request, never set on the session.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests  # imported on first provider call, not at page startup
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _SESSION = s
+        return _SESSION
+
+class EngineSession:
+    """
+    get/post on the shared session with one engine's headers bound. Every
+    request waits for the engine's VL_RATE_* limit, so a submit-poll-fetch
+    cycle is paced per HTTP call, not per scan.
+    """
+
+    def __init__(self, headers: Dict[str, str], engine: Optional[str] = None):
+        self.headers = dict(headers)
+        self.engine = engine
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        from app.utils.ratelimit import throttle
+        if self.engine:
+            throttle(self.engine)
+        kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        return http_session().request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
 # ---------- Helpers ----------
 
 def detect_ioc_type(value: str) -> str:
@@ -23,12 +77,29 @@ def detect_ioc_type(value: str) -> str:
         return "hash"
     return "unknown"
 
+# URLs and md5/sha1/sha256 hex digests inside free text (log lines, JSON events)
+_IOC_PATTERN = re.compile(
+    r"(?P<url>https?://[^\s\"'<>\\]+)|\b(?P<hash>[0-9a-fA-F]{64}|[0-9a-fA-F]{40}|[0-9a-fA-F]{32})\b"
+)
+_URL_TRAILING = ".,;:!?)]}'"
+
+def extract_iocs(text: str) -> List[Tuple[str, str]]:
+    """Distinct (ioc, ioc_type) pairs found in text, in order of appearance."""
+    found: Dict[str, str] = {}
+    for m in _IOC_PATTERN.finditer(text or ""):
+        ioc = m.group("url")
+        if ioc:
+            ioc = ioc.rstrip(_URL_TRAILING)
+        else:
+            ioc = m.group("hash").lower()
+        t = detect_ioc_type(ioc)
+        if t != "unknown" and ioc not in found:
+            found[ioc] = t
+    return list(found.items())
+
 def sha256_file(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    from app.utils.hashing import hash_file
+    return hash_file(path).sha256
 
 # ---------- VirusTotal ----------
 
@@ -50,8 +121,7 @@ def vt_url_report(url: str) -> Dict[str, Any]:
         }
     
     # VT needs an id = url_id (base64-url of the url). The simple "scan + fetch" route works too.
-    s = requests.Session()
-    s.headers.update(vt_headers())
+    s = EngineSession(vt_headers(), engine="VirusTotal")
 
     # submit (harmless if already known)
     submit = s.post("https://www.virustotal.com/api/v3/urls", data={"url": url})
@@ -112,8 +182,7 @@ def vt_hash_report(hash_value: str) -> Dict[str, Any]:
             "summary": {"malicious": 0, "suspicious": 0, "undetected": 0, "harmless": 90, "timeout": 0},
         }
     
-    s = requests.Session()
-    s.headers.update(vt_headers())
+    s = EngineSession(vt_headers(), engine="VirusTotal")
     r = s.get(f"https://www.virustotal.com/api/v3/files/{hash_value}")
     if r.status_code == 404:
         return {"engine": "VirusTotal", "raw": {}, "summary": {"error": "Hash not found"}}
@@ -135,6 +204,37 @@ def vt_hash_report(hash_value: str) -> Dict[str, Any]:
         },
     }
 
+def vt_domain_report(domain: str) -> Dict[str, Any]:
+    """VirusTotal's verdict on a whole domain (used to share it across many URLs on that domain)."""
+    if is_mock_mode():
+        return {
+            "engine": "VirusTotal domain",
+            "raw": {"data": {"id": domain, "attributes": {"last_analysis_stats": {"malicious": 0, "harmless": 90}}}},
+            "summary": {"malicious": 0, "suspicious": 0, "undetected": 0, "harmless": 90, "timeout": 0, "domain": domain},
+        }
+
+    s = EngineSession(vt_headers(), engine="VirusTotal")
+    r = s.get(f"https://www.virustotal.com/api/v3/domains/{domain}")
+    if r.status_code == 404:
+        return {"engine": "VirusTotal domain", "raw": {}, "summary": {"error": "Domain not found", "domain": domain}}
+    r.raise_for_status()
+    data = r.json()
+    attrs = data.get("data", {}).get("attributes", {}) or {}
+    stats = (attrs.get("last_analysis_stats") or {})
+    return {
+        "engine": "VirusTotal domain",
+        "raw": data,
+        "summary": {
+            "malicious": int(stats.get("malicious", 0)),
+            "suspicious": int(stats.get("suspicious", 0)),
+            "undetected": int(stats.get("undetected", 0)),
+            "harmless": int(stats.get("harmless", 0)),
+            "timeout": int(stats.get("timeout", 0)),
+            "domain": domain,
+            "reputation": attrs.get("reputation"),
+        },
+    }
+
 # ---------- urlscan.io (optional) ----------
 
 def urlscan_enabled() -> bool:
@@ -144,8 +244,7 @@ def urlscan_report(url: str) -> Dict[str, Any]:
     api = os.getenv("URLSCAN_API_KEY")
     if not api:
         return {"engine": "urlscan.io", "summary": {"skipped": "no API key"}}
-    s = requests.Session()
-    s.headers.update({"API-Key": api, "Content-Type": "application/json"})
+    s = EngineSession({"API-Key": api, "Content-Type": "application/json"}, engine="urlscan.io")
     sub = s.post("https://urlscan.io/api/v1/scan/", data=json.dumps({"url": url, "public": "off"}))
     sub.raise_for_status()
     result = sub.json()
@@ -189,8 +288,7 @@ def otx_report(ioc: str, ioc_type: str) -> Dict[str, Any]:
     api = os.getenv("OTX_API_KEY")
     if not api:
         return {"engine": "AlienVault OTX", "summary": {"skipped": "no API key"}}
-    s = requests.Session()
-    s.headers.update({"X-OTX-API-KEY": api})
+    s = EngineSession({"X-OTX-API-KEY": api}, engine="AlienVault OTX")
     if ioc_type == "url":
         endpoint = "indicators/url"
     elif ioc_type == "hash":
@@ -215,34 +313,65 @@ def otx_report(ioc: str, ioc_type: str) -> Dict[str, Any]:
 
 # ---------- Aggregation ----------
 
-def aggregate_scan(ioc: str, ioc_type: Optional[str] = None) -> Dict[str, Any]:
-    t = ioc_type or detect_ioc_type(ioc)
-    engines: List[Dict[str, Any]] = []
+class EngineSpec(NamedTuple):
+    name: str
+    ioc_types: Tuple[str, ...]  # empty = every type
+    enabled: Callable[[], bool]
+    report: Callable[[str, str], Dict[str, Any]]  # (ioc, ioc_type) -> engine result
 
+# Engine registry; order is the display / storage order in a combined result
+ENGINES: Tuple[EngineSpec, ...] = (
     # VirusTotal (required key)
+    EngineSpec("VirusTotal", ("url", "hash"), lambda: True,
+               lambda ioc, t: vt_url_report(ioc) if t == "url" else vt_hash_report(ioc)),
+    # urlscan.io (optional, URL only)
+    EngineSpec("urlscan.io", ("url",), urlscan_enabled, lambda ioc, t: urlscan_report(ioc)),
+    # OTX (optional)
+    EngineSpec("AlienVault OTX", ("url", "hash"), otx_enabled, otx_report),
+)
+ENGINE_ORDER = tuple(e.name for e in ENGINES)
+
+def active_engines() -> List[EngineSpec]:
+    """Registered engines whose API key / switch is configured."""
+    return [e for e in ENGINES if e.enabled()]
+
+def planned_engines(ioc: str, ioc_type: str) -> List[Tuple[str, Callable[[], Dict[str, Any]]]]:
+    """(engine name, zero-arg report call) for every engine that applies to this IOC."""
+    return [
+        (e.name, (lambda e=e: e.report(ioc, ioc_type)))
+        for e in active_engines()
+        if not e.ioc_types or ioc_type in e.ioc_types
+    ]
+
+def _run_engine(name: str, call: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
     try:
-        if t == "url":
-            engines.append(vt_url_report(ioc))
-        elif t == "hash":
-            engines.append(vt_hash_report(ioc))
+        return call()
     except Exception as e:
-        engines.append({"engine": "VirusTotal", "summary": {"error": str(e)}})
+        return {"engine": name, "summary": {"error": str(e)}}
 
-    # urlscan.io (optional, URL only)
-    if t == "url" and urlscan_enabled():
-        try:
-            engines.append(urlscan_report(ioc))
-        except Exception as e:
-            engines.append({"engine": "urlscan.io", "summary": {"error": str(e)}})
-
-    # OTX (optional)
-    if otx_enabled():
-        try:
-            engines.append(otx_report(ioc, t))
-        except Exception as e:
-            engines.append({"engine": "AlienVault OTX", "summary": {"error": str(e)}})
+def iter_scan(ioc: str, ioc_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run the applicable engines concurrently and yield each engine result as
+    soon as it finishes (VirusTotal usually first, urlscan.io last). IOCs in
+    the offline threat feed yield a single "Threat feed" result instead.
+    """
+    from app.utils.threat_feed import feed_engine_result, feed_match
+    t = ioc_type or detect_ioc_type(ioc)
+    hit = feed_match(ioc)
+    if hit is not None:
+        # listed in the offline threat feed: answered locally, no provider calls
+        yield feed_engine_result(hit)
+        return
+    plan = planned_engines(ioc, t)
+    if not plan:
+        return
+    with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix="vl-engine") as pool:
+        futures = [pool.submit(_run_engine, name, call) for name, call in plan]
+        for f in as_completed(futures):
+            yield f.result()
 
-    # Simple combined risk score
+def overall_risk(engines: List[Dict[str, Any]]) -> str:
+    """Simple combined risk score; valid for a partial list of engines too."""
     total_mal = 0
     total_susp = 0
     for e in engines:
@@ -250,15 +379,34 @@ def aggregate_scan(ioc: str, ioc_type: Optional[str] = None) -> Dict[str, Any]:
         total_mal += int(s.get("malicious", 0) or 0)
         total_susp += int(s.get("suspicious", 0) or 0)
 
-    overall = "Low"
     if total_mal >= 1:
-        overall = "High"
-    elif total_susp >= 1:
-        overall = "Medium"
+        return "High"
+    if total_susp >= 1:
+        return "Medium"
+    return "Low"
 
+def build_result(ioc: str, ioc_type: str, engines: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combined result in the aggregate_scan() shape, engines in ENGINE_ORDER."""
+    rank = {name: i for i, name in enumerate(ENGINE_ORDER)}
+    ordered = sorted(engines, key=lambda e: rank.get(e.get("engine"), len(rank)))
     return {
         "input": ioc,
-        "type": t,
-        "overall_risk": overall,
-        "engines": engines,
+        "type": ioc_type,
+        "overall_risk": overall_risk(ordered),
+        "engines": ordered,
     }
+
+def engine_errors(res: Dict[str, Any]) -> Optional[str]:
+    """
+    The engines' error summaries joined into one message, or None when every
+    engine answered. A result with errors is not a verdict: its "Low" only
+    reflects the engines that happened to answer, so it must not be saved or
+    cached as one.
+    """
+    errors = [f"{e.get('engine')}: {e['summary']['error']}" for e in res.get("engines", [])
+              if (e.get("summary") or {}).get("error")]
+    return "; ".join(errors) or None
+
+def aggregate_scan(ioc: str, ioc_type: Optional[str] = None) -> Dict[str, Any]:
+    t = ioc_type or detect_ioc_type(ioc)
+    return build_result(ioc, t, list(iter_scan(ioc, t)))
@@ -0,0 +1,248 @@
+# app/utils/export.py
+"""
+Streaming export of scan history to CSV, JSON Lines or Parquet.
+
+Rows are read from the scans table with a single cursor in batches, flattened
+(engine summaries and vt_details become plain columns) and written batch by
+batch, so memory stays flat however large the history grows. Engine columns
+come from the untruncated summaries stored in vt_details; only scans saved
+before those were stored fall back to parsing the display summary.
+
+    export_history("history.parquet", "parquet")
+    for chunk in iter_export("csv"): ...      # bytes chunks, e.g. for HTTP streaming
+
+Parquet needs pyarrow (optional dependency).
+"""
+from __future__ import annotations
+import io
+import csv
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# format -> (mime type, file extension)
+FORMATS: Dict[str, tuple] = {
+    "csv": ("text/csv", ".csv"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+BATCH_SIZE = 1000
+
+BASE_COLUMNS = ("id", "input", "type", "risk", "timestamp", "summary")
+
+# engine name -> (column prefix, summary fields exported)
+ENGINE_FIELDS = {
+    "VirusTotal": ("vt", ("malicious", "suspicious", "undetected", "harmless", "timeout", "error")),
+    "urlscan.io": ("urlscan", ("score", "malicious", "error", "skipped")),
+    "AlienVault OTX": ("otx", ("pulses", "malicious", "error", "skipped")),
+}
+ENGINE_COLUMNS = tuple(f"{prefix}_{f}" for prefix, fields in ENGINE_FIELDS.values() for f in fields)
+
+# vt_details keys written by the Scan page (see _extract_vt_details)
+DETAIL_KEYS = (
+    "reputation", "category", "counts", "domain", "whois", "country", "asn", "dns", "ips",
+    "html_title", "scripts", "resources", "redirects", "downloads", "execution", "linked",
+    "files", "domains", "cert_issuer", "cert_subject", "cert_validity", "av_stats",
+    "av_malicious", "ml_verdict", "ml_tags", "community", "first_seen", "last_seen",
+)
+DETAIL_COLUMNS = tuple(f"detail_{k}" for k in DETAIL_KEYS)
+
+COLUMNS = BASE_COLUMNS + ENGINE_COLUMNS + DETAIL_COLUMNS
+
+_NUMERIC = {"malicious", "suspicious", "undetected", "harmless", "timeout", "score", "pulses"}
+
+# ---------- flattening ----------
+
+def _int_or_none(v: Any) -> Optional[int]:
+    try:
+        return int(v) if v is not None and v != "" else None
+    except (TypeError, ValueError):
+        return None
+
+def flatten_engines(engines: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn an aggregate_scan() engines list into flat vt_*/urlscan_*/otx_* columns."""
+    out: Dict[str, Any] = {c: None for c in ENGINE_COLUMNS}
+    for eng in engines or []:
+        spec = ENGINE_FIELDS.get(eng.get("engine"))
+        if not spec:
+            continue
+        prefix, fields = spec
+        summary = eng.get("summary") or {}
+        for f in fields:
+            v = summary.get(f)
+            out[f"{prefix}_{f}"] = _int_or_none(v) if f in _NUMERIC else (str(v) if v else None)
+    return out
+
+def parse_summary_engines(summary: str) -> List[Dict[str, Any]]:
+    """
+    Recover engine summaries from the stored summary text
+    ("VirusTotal: {...} | AlienVault OTX: {...}"), for scans saved before
+    vt_details carried them. The text is capped at SUMMARY_LIMIT characters,
+    so cut-off and unparseable parts are skipped.
+    """
+    engines = []
+    for part in (summary or "").split(" | "):
+        name, sep, blob = part.partition(": ")
+        if not sep or name not in ENGINE_FIELDS:
+            continue
+        try:
+            parsed = json.loads(blob)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            engines.append({"engine": name, "summary": parsed})
+    return engines
+
+def flatten_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one stored scan (id, input, type, risk, timestamp, summary, vt_details)."""
+    from app.utils.scan_results import ENGINE_SUMMARIES_KEY
+    out = {c: row.get(c) for c in BASE_COLUMNS}
+    details = row.get("vt_details")
+    if isinstance(details, str):
+        try:
+            details = json.loads(details) if details else {}
+        except ValueError:
+            details = {}
+    details = details if isinstance(details, dict) else {}
+    summaries = details.get(ENGINE_SUMMARIES_KEY)
+    if isinstance(summaries, dict):
+        engines = [{"engine": name, "summary": s} for name, s in summaries.items() if isinstance(s, dict)]
+    else:
+        engines = parse_summary_engines(row.get("summary") or "")
+    out.update(flatten_engines(engines))
+    for k in DETAIL_KEYS:
+        v = details.get(k)
+        out[f"detail_{k}"] = str(v) if v not in (None, "") else None
+    return out
+
+# ---------- reading ----------
+
+def iter_scan_batches(
+    db_path: Optional[Path | str] = None,
+    batch_size: int = BATCH_SIZE,
+    since: Optional[str] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield lists of flattened rows, oldest first, reading with fetchmany() so
+    only one batch is held in memory. `since` filters on the timestamp column
+    ("YYYY-MM-DD[ HH:MM:SS]").
+    """
+    from scan import probe_schema, get_db_path
+
+    dbp = Path(db_path) if db_path is not None else get_db_path()
+    plan = probe_schema(dbp)
+    if not plan:
+        return
+    sql = (
+        f"SELECT {plan['id']} AS id, {plan['input']} AS input, {plan['type']} AS type, "
+        f"{plan['risk']} AS risk, {plan['timestamp']} AS timestamp, {plan['summary']} AS summary, "
+        f"{plan['details']} AS vt_details FROM {plan['table']}"
+    )
+    params: tuple = ()
+    if since:
+        sql += f" WHERE {plan['timestamp']} >= ?"
+        params = (since,)
+    sql += f" ORDER BY {plan['id']}"
+
+    conn = sqlite3.connect(str(dbp))
+    conn.row_factory = sqlite3.Row
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [flatten_row(dict(r)) for r in rows]
+    finally:
+        conn.close()
+
+# ---------- writers ----------
+
+def iter_csv(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def iter_jsonl(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch).encode("utf-8")
+
+def parquet_available() -> bool:
+    """True when pyarrow is installed; checked without importing it."""
+    import importlib.util
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _parquet_schema():
+    import pyarrow as pa
+    fields = []
+    for c in COLUMNS:
+        numeric_engine_col = c in ENGINE_COLUMNS and c.rsplit("_", 1)[-1] in _NUMERIC
+        if c == "id" or numeric_engine_col:
+            fields.append(pa.field(c, pa.int64()))
+        else:
+            fields.append(pa.field(c, pa.string()))
+    return pa.schema(fields)
+
+def write_parquet(batches: Iterable[List[Dict[str, Any]]], path: Path | str) -> int:
+    """Write one row group per batch. Returns the number of rows written."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from e
+    schema = _parquet_schema()
+    n = 0
+    with pq.ParquetWriter(str(path), schema, compression="zstd") as writer:
+        for batch in batches:
+            cols = {}
+            for f in schema:
+                vals = [r.get(f.name) for r in batch]
+                if pa.types.is_string(f.type):
+                    vals = [None if v is None else str(v) for v in vals]
+                cols[f.name] = vals
+            writer.write_table(pa.Table.from_pydict(cols, schema=schema))
+            n += len(batch)
+    return n
+
+def iter_export(
+    fmt: str,
+    db_path: Optional[Path | str] = None,
+    batch_size: int = BATCH_SIZE,
+    since: Optional[str] = None,
+) -> Iterator[bytes]:
+    """Byte chunks of a CSV or JSONL export (Parquet needs a seekable file - use export_history)."""
+    batches = iter_scan_batches(db_path, batch_size=batch_size, since=since)
+    if fmt == "csv":
+        return iter_csv(batches)
+    if fmt == "jsonl":
+        return iter_jsonl(batches)
+    raise ValueError(f"Streaming is only supported for csv/jsonl, not {fmt!r}")
+
+def export_history(
+    path: Path | str,
+    fmt: str,
+    db_path: Optional[Path | str] = None,
+    batch_size: int = BATCH_SIZE,
+    since: Optional[str] = None,
+) -> Path:
+    """Stream the scan history into `path` in the given format and return the path."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        write_parquet(iter_scan_batches(db_path, batch_size=batch_size, since=since), out)
+        return out
+    with open(out, "wb") as fh:
+        for chunk in iter_export(fmt, db_path, batch_size=batch_size, since=since):
+            fh.write(chunk)
+    return out
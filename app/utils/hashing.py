@@ -0,0 +1,89 @@
+# app/utils/hashing.py
+"""
+Single-pass, constant-memory file hashing.
+
+    d = hash_stream(uploaded_file)          # any binary file object
+    d = hash_file("/samples/big.iso")
+    d.md5, d.sha1, d.sha256, d.size, d.fuzzy
+    d.label("big.iso")                      # "big.iso (SHA256: …, SHA1: …, MD5: …)"
+
+The input is read in CHUNK_SIZE pieces with readinto() into one reusable
+buffer and every chunk is fed, as a memoryview slice, to MD5, SHA-1 and
+SHA-256 at once. Nothing but that buffer is held, so memory stays at one chunk
+whatever the sample size, and each byte is read exactly once. hashlib releases
+the GIL on large updates, so hashing in a worker thread does not stall the UI.
+
+Fuzzy hashing (ssdeep) is optional: with fuzzy=True and the `ssdeep` package
+installed the same pass also produces an ssdeep hash; otherwise d.fuzzy is None.
+
+The stored input of a file scan is d.label(name), which carries all three
+digests, so the result cache can answer later lookups by MD5, SHA-1 or SHA-256.
+"""
+from __future__ import annotations
+import os
+import hashlib
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, NamedTuple, Optional
+
+def _chunk_size() -> int:
+    try:
+        return max(64 * 1024, int(os.getenv("VL_HASH_CHUNK", str(1 << 20))))
+    except ValueError:
+        return 1 << 20
+
+CHUNK_SIZE = _chunk_size()
+
+class Digests(NamedTuple):
+    md5: str
+    sha1: str
+    sha256: str
+    size: int
+    fuzzy: Optional[str] = None  # ssdeep, when requested and available
+
+    def as_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    def label(self, name: Optional[str] = None) -> str:
+        """Stored input for a file scan: name plus all three digests."""
+        digests = f"SHA256: {self.sha256}, SHA1: {self.sha1}, MD5: {self.md5}"
+        return f"{name} ({digests})" if name else digests
+
+def _fuzzy_hasher():
+    try:
+        import ssdeep
+    except ImportError:
+        return None
+    return ssdeep.Hash()
+
+def hash_stream(fh: BinaryIO, fuzzy: bool = False, chunk_size: Optional[int] = None) -> Digests:
+    """Digests of everything readable from fh (read from its current position)."""
+    buf = bytearray(chunk_size or CHUNK_SIZE)
+    view = memoryview(buf)
+    md5 = hashlib.md5(usedforsecurity=False)
+    sha1 = hashlib.sha1(usedforsecurity=False)
+    sha256 = hashlib.sha256()
+    fz = _fuzzy_hasher() if fuzzy else None
+    readinto = getattr(fh, "readinto", None)
+    size = 0
+    while True:
+        if readinto is not None:
+            n = readinto(buf)
+        else:  # plain read(): copy into the buffer so the loop below is the same
+            data = fh.read(len(buf))
+            n = len(data)
+            view[:n] = data
+        if not n:
+            break
+        chunk = view[:n]
+        md5.update(chunk)
+        sha1.update(chunk)
+        sha256.update(chunk)
+        if fz is not None:
+            fz.update(bytes(chunk))
+        size += n
+    return Digests(md5.hexdigest(), sha1.hexdigest(), sha256.hexdigest(), size,
+                   fz.digest() if fz is not None else None)
+
+def hash_file(path: Path | str, fuzzy: bool = False) -> Digests:
+    with open(path, "rb", buffering=0) as fh:  # readinto() straight into our buffer
+        return hash_stream(fh, fuzzy=fuzzy)
@@ -0,0 +1,278 @@
+# app/utils/job_store.py
+"""
+Bulk scan jobs persisted in SQLite, for the REST API.
+
+The Bulk page keeps its BulkJob in memory, which is fine for one Streamlit
+process. The API runs under several uvicorn workers, so a job submitted to one
+worker must be visible to (and progress on) all of them. Jobs and their items
+live in two tables next to `scans` in the same database file:
+
+    api_jobs(id, status, total, created_at, updated_at)
+    api_job_items(job_id, idx, input, type, status, overall_risk, scan_id, result, error, lease_until)
+
+Every worker runs a few JobRunner threads that claim one queued item at a
+time with an atomic UPDATE ... RETURNING, scan it with aggregate_scan(), save
+it with save_result() and mark it done. A claim is a lease: items whose
+worker died are claimed again once VL_API_JOB_LEASE seconds have passed.
+
+    job_id = create_job([{"input": "https://example.com"}, ...])
+    get_job(job_id)                 # status + counts
+    job_items(job_id, offset, limit)
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# item / job states
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+def _lease_seconds() -> float:
+    try:
+        return max(5.0, float(os.getenv("VL_API_JOB_LEASE", "300")))
+    except ValueError:
+        return 300.0
+
+def _connect(db_path: Optional[Path | str] = None) -> sqlite3.Connection:
+    from scan import get_db_path
+    conn = sqlite3.connect(str(db_path or get_db_path()), timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_jobs(db_path: Optional[Path | str] = None) -> None:
+    """Create the job tables (idempotent). WAL lets workers read while one writes."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+        CREATE TABLE IF NOT EXISTS api_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now'))
+        );
+        CREATE TABLE IF NOT EXISTS api_job_items (
+            job_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            input TEXT NOT NULL,
+            type TEXT,
+            status TEXT NOT NULL,
+            overall_risk TEXT,
+            scan_id INTEGER,
+            result TEXT,               -- JSON aggregate_scan() result
+            error TEXT,
+            lease_until REAL,
+            PRIMARY KEY (job_id, idx)
+        );
+        CREATE INDEX IF NOT EXISTS idx_api_job_items_status ON api_job_items(status, lease_until);
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+def create_job(rows: List[Dict[str, Any]], db_path: Optional[Path | str] = None) -> str:
+    """Queue rows ({"input", "type"?}) as a new job and return its id."""
+    from app.utils.engines import detect_ioc_type
+    job_id = uuid.uuid4().hex[:16]
+    items = []
+    for i, row in enumerate(rows):
+        ioc = (row.get("input") or "").strip()
+        items.append((job_id, i, ioc, row.get("type") or detect_ioc_type(ioc), QUEUED if ioc else DONE))
+    conn = _connect(db_path)
+    try:
+        with conn:
+            pending = any(item[4] == QUEUED for item in items)
+            conn.execute("INSERT INTO api_jobs (id, status, total) VALUES (?, ?, ?)",
+                         (job_id, QUEUED if pending else DONE, len(items)))
+            conn.executemany(
+                "INSERT INTO api_job_items (job_id, idx, input, type, status) VALUES (?, ?, ?, ?, ?)", items)
+    finally:
+        conn.close()
+    return job_id
+
+def get_job(job_id: str, db_path: Optional[Path | str] = None) -> Optional[Dict[str, Any]]:
+    """{"id", "status", "total", "counts": {status: n}, "created_at", "updated_at"} or None."""
+    conn = _connect(db_path)
+    try:
+        job = conn.execute("SELECT * FROM api_jobs WHERE id = ?", (job_id,)).fetchone()
+        if not job:
+            return None
+        counts = {r["status"]: r["n"] for r in conn.execute(
+            "SELECT status, COUNT(*) AS n FROM api_job_items WHERE job_id = ? GROUP BY status", (job_id,))}
+    finally:
+        conn.close()
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "total": job["total"],
+        "completed": counts.get(DONE, 0) + counts.get(FAILED, 0),
+        "counts": counts,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+def job_items(
+    job_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    include_result: bool = False,
+    db_path: Optional[Path | str] = None,
+) -> List[Dict[str, Any]]:
+    """Items of a job in submission order; `result` (full engine output) only when asked for."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT idx, input, type, status, overall_risk, scan_id, error, result FROM api_job_items "
+            "WHERE job_id = ? ORDER BY idx LIMIT ? OFFSET ?",
+            (job_id, int(limit), max(0, int(offset))),
+        ).fetchall()
+    finally:
+        conn.close()
+    out = []
+    for r in rows:
+        item = {k: r[k] for k in ("idx", "input", "type", "status", "overall_risk", "scan_id", "error")}
+        if include_result:
+            item["result"] = json.loads(r["result"]) if r["result"] else None
+        out.append(item)
+    return out
+
+def cancel_job(job_id: str, db_path: Optional[Path | str] = None) -> bool:
+    """Drop the job's queued items; items already running finish. False if the job does not exist."""
+    conn = _connect(db_path)
+    try:
+        with conn:
+            cur = conn.execute(
+                "UPDATE api_jobs SET status = ?, updated_at = datetime('now') WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, job_id, QUEUED, RUNNING))
+            conn.execute("UPDATE api_job_items SET status = ? WHERE job_id = ? AND status = ?",
+                         (CANCELLED, job_id, QUEUED))
+            exists = cur.rowcount or conn.execute("SELECT 1 FROM api_jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return bool(exists)
+
+# ---------- workers ----------
+
+def claim_item(db_path: Optional[Path | str] = None) -> Optional[Dict[str, Any]]:
+    """Atomically lease the oldest runnable item (queued, or running with an expired lease)."""
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        with conn:
+            row = conn.execute(
+                """
+                UPDATE api_job_items SET status = ?, lease_until = ?
+                WHERE rowid = (
+                    SELECT rowid FROM api_job_items
+                    WHERE status = ? OR (status = ? AND lease_until < ?)
+                    ORDER BY rowid LIMIT 1
+                )
+                RETURNING job_id, idx, input, type
+                """,
+                (RUNNING, now + _lease_seconds(), QUEUED, RUNNING, now),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE api_jobs SET status = ?, updated_at = datetime('now') WHERE id = ? AND status = ?",
+                             (RUNNING, row["job_id"], QUEUED))
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+def finish_item(
+    item: Dict[str, Any],
+    result: Optional[Dict[str, Any]] = None,
+    scan_id: Optional[int] = None,
+    error: Optional[str] = None,
+    db_path: Optional[Path | str] = None,
+) -> None:
+    """Record an item's outcome and close its job when nothing is left to run."""
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE api_job_items SET status = ?, overall_risk = ?, scan_id = ?, result = ?, error = ?, "
+                "lease_until = NULL WHERE job_id = ? AND idx = ?",
+                (FAILED if error else DONE, (result or {}).get("overall_risk"), scan_id,
+                 json.dumps(result) if result else None, error, item["job_id"], item["idx"]),
+            )
+            conn.execute(
+                "UPDATE api_jobs SET updated_at = datetime('now'), status = CASE WHEN NOT EXISTS ("
+                "  SELECT 1 FROM api_job_items WHERE job_id = ?1 AND status IN (?2, ?3)"
+                ") AND status != ?4 THEN ?5 ELSE status END WHERE id = ?1",
+                (item["job_id"], QUEUED, RUNNING, CANCELLED, DONE),
+            )
+    finally:
+        conn.close()
+
+def run_item(item: Dict[str, Any], db_path: Optional[Path | str] = None) -> None:
+    """
+    Scan and save one claimed item; errors are recorded on the item, not
+    raised. An item whose engines reported errors is FAILED and not saved:
+    its "Low" would only reflect the engines that answered.
+    """
+    from app.utils.engines import aggregate_scan, engine_errors
+    from app.utils.scan_results import save_result
+    try:
+        res = aggregate_scan(item["input"], item["type"])
+    except Exception as e:
+        finish_item(item, error=str(e), db_path=db_path)
+        return
+    errors = engine_errors(res)
+    if errors:
+        finish_item(item, error=errors, db_path=db_path)
+        return
+    scan_id = None
+    try:
+        # no per-item report pre-render: a large job would queue one PDF per item
+        scan_id = save_result(res, item["input"], db_path=db_path, prerender=False)
+    except Exception:
+        pass  # the scan itself succeeded; the item still carries the result
+    finish_item(item, result=res, scan_id=scan_id, db_path=db_path)
+
+class JobRunner:
+    """
+    Threads that drain the shared queue in one process. wake() after queueing
+    work to skip the idle poll; stop() lets the threads exit after their item.
+    """
+
+    def __init__(self, threads: int = 4, idle_seconds: float = 1.0, db_path: Optional[Path | str] = None):
+        self.threads = max(1, threads)
+        self.idle_seconds = idle_seconds
+        self.db_path = db_path
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def start(self) -> "JobRunner":
+        for i in range(self.threads):
+            t = threading.Thread(target=self._loop, name=f"vl-api-job-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._workers:
+            t.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                item = claim_item(self.db_path)
+            except sqlite3.Error:
+                item = None  # locked by another worker; try again shortly
+            if item is None:
+                self._wake.wait(self.idle_seconds)
+                self._wake.clear()
+                continue
+            run_item(item, self.db_path)
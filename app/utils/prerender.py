@@ -0,0 +1,75 @@
+# app/utils/prerender.py
+"""
+Background pre-rendering of report PDFs.
+
+After a scan is saved the Scan page calls queue_report(); the report is laid
+out in a single worker process running at idle priority and written into the
+report cache, so the Reports page can serve it without rendering at click time.
+
+Disable with VL_PRERENDER_REPORTS=false.
+"""
+from __future__ import annotations
+import os
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_LOCK = threading.Lock()
+
+def prerender_enabled() -> bool:
+    return os.getenv("VL_PRERENDER_REPORTS", "true").lower() in ("1", "true", "yes")
+
+def _lower_priority() -> None:
+    """Worker initializer: run at idle priority so interactive scans always win the CPU."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))  # Linux
+        return
+    except Exception:
+        pass
+    try:
+        os.nice(19)  # other POSIX
+    except Exception:
+        pass  # Windows: no portable equivalent, single worker still bounds the cost
+
+def _render_into_cache(scan_id: int, db_path: Optional[str]) -> Optional[str]:
+    # Imported here so the parent process never pays for reportlab on scan pages
+    from scan import get_scan
+    from app.report_pdf import build_report_pdf_bytes
+    from app.utils.report_cache import get_cached_report, store_report, cache_path
+
+    scan_obj = get_scan(scan_id, db_path=db_path)
+    if not scan_obj:
+        return None
+    if get_cached_report(scan_obj) is not None:
+        return str(cache_path(scan_obj))
+    return str(store_report(scan_obj, build_report_pdf_bytes(scan_obj)))
+
+def _executor() -> ProcessPoolExecutor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority,
+            )
+        return _EXECUTOR
+
+def queue_report(scan_id: int, db_path: Optional[Path | str] = None) -> Optional[Future]:
+    """
+    Queue report rendering for a saved scan. Returns the Future, or None when
+    pre-rendering is disabled or the worker could not be started. Never raises.
+    """
+    global _EXECUTOR
+    if not prerender_enabled() or not scan_id:
+        return None
+    try:
+        return _executor().submit(_render_into_cache, int(scan_id), str(db_path) if db_path else None)
+    except Exception:
+        # e.g. BrokenProcessPool after the worker died - start fresh next time
+        with _LOCK:
+            _EXECUTOR = None
+        return None
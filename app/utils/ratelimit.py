@@ -0,0 +1,108 @@
+# app/utils/ratelimit.py
+"""
+Token-bucket rate limiting for provider calls.
+
+Free API tiers are metered (VirusTotal public: 4 requests/minute), so batch
+tools must pace themselves rather than burn through the quota and collect
+429s. A bucket holds up to `capacity` tokens and refills at `rate` tokens per
+second; acquire() takes one, sleeping until it is available.
+
+    bucket = TokenBucket.parse("4/min")
+    bucket.acquire()
+
+Per-engine limits apply to every scan in the process (UI, API, CLI) once
+configured, e.g. VL_RATE_VIRUSTOTAL=4/min, VL_RATE_URLSCAN_IO=60/min,
+VL_RATE_ALIENVAULT_OTX=10/s. A token is taken per HTTP request (engines'
+EngineSession calls throttle()), so a URL scan's submit, polls and fetch each
+count against the quota. Engines without a setting are not limited, and mock
+mode never is.
+"""
+from __future__ import annotations
+import os
+import re
+import time
+import threading
+from typing import Dict, Optional
+
+_UNITS = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0, "hour": 3600.0}
+
+class TokenBucket:
+    """Thread-safe token bucket; `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str) -> "TokenBucket":
+        """"4/min", "10/s", "0.5" (per second); an optional ":burst" suffix sets the capacity."""
+        spec, _, burst = spec.strip().partition(":")
+        count, _, unit = spec.partition("/")
+        per = _UNITS.get(unit.strip().lower() or "s")
+        if per is None:
+            raise ValueError(f"Unknown rate unit in {spec!r}")
+        count_f = float(count)
+        return cls(count_f / per, float(burst) if burst else max(1.0, count_f))
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available. False if `timeout` seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+# ---------- per-engine limits ----------
+
+_LIMITERS: Dict[str, Optional[TokenBucket]] = {}
+_LOCK = threading.Lock()
+
+def _env_name(engine: str) -> str:
+    return "VL_RATE_" + re.sub(r"[^A-Z0-9]+", "_", engine.upper()).strip("_")
+
+def engine_limiter(engine: str) -> Optional[TokenBucket]:
+    """The process-wide bucket for an engine, or None when it is not limited."""
+    with _LOCK:
+        if engine not in _LIMITERS:
+            spec = os.getenv(_env_name(engine))
+            try:
+                _LIMITERS[engine] = TokenBucket.parse(spec) if spec else None
+            except ValueError:
+                _LIMITERS[engine] = None
+        return _LIMITERS[engine]
+
+def throttle(engine: str) -> None:
+    """Wait for the engine's rate limit, if one is configured (never in mock mode)."""
+    from app.utils.engines import is_mock_mode
+    limiter = None if is_mock_mode() else engine_limiter(engine)
+    if limiter is not None:
+        limiter.acquire()
+
+def reset_limiters() -> None:
+    with _LOCK:
+        _LIMITERS.clear()
@@ -0,0 +1,70 @@
+# app/utils/report_cache.py
+"""
+On-disk cache of rendered report PDFs.
+
+Entries live under reports/cache/ and are keyed by scan id plus a digest of
+the scan content, so a report is re-rendered only when the scan data changes.
+"""
+from __future__ import annotations
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.paths import REPORTS_DIR
+
+CACHE_DIR: Path = REPORTS_DIR / "cache"
+MAX_ENTRIES = 200
+
+def _normalize(scan_obj: Dict[str, Any]) -> Dict[str, Any]:
+    # get_scan() returns vt_details=None where the page uses {} - same report either way
+    obj = dict(scan_obj or {})
+    if not obj.get("vt_details"):
+        obj["vt_details"] = {}
+    return obj
+
+def cache_key(scan_obj: Dict[str, Any]) -> str:
+    blob = json.dumps(_normalize(scan_obj), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+def cache_path(scan_obj: Dict[str, Any]) -> Path:
+    safe = str(scan_obj.get("id", "")).replace("/", "_").replace("\\", "_")
+    return CACHE_DIR / f"report_{safe}_{cache_key(scan_obj)}.pdf"
+
+def get_cached_report(scan_obj: Dict[str, Any]) -> Optional[bytes]:
+    """Return cached PDF bytes for this scan, or None on a miss."""
+    p = cache_path(scan_obj)
+    try:
+        return p.read_bytes()
+    except OSError:
+        return None
+
+def store_report(scan_obj: Dict[str, Any], pdf_bytes: bytes) -> Path:
+    """Atomically write PDF bytes into the cache and drop stale entries for the same scan."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    p = cache_path(scan_obj)
+    tmp = p.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(pdf_bytes)
+    os.replace(tmp, p)
+    prefix = p.name.rsplit("_", 1)[0] + "_"
+    for old in CACHE_DIR.glob(f"{prefix}*.pdf"):
+        if old != p:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+    prune()
+    return p
+
+def prune(max_entries: int = MAX_ENTRIES) -> None:
+    """Keep only the most recently written `max_entries` reports."""
+    try:
+        files = sorted(CACHE_DIR.glob("report_*.pdf"), key=lambda f: f.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for f in files[max_entries:]:
+        try:
+            f.unlink()
+        except OSError:
+            pass
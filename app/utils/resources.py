@@ -0,0 +1,115 @@
+# app/utils/resources.py
+"""
+Process-wide resources shared by every Streamlit session.
+
+Each accessor is wrapped in st.cache_resource, so it is built on first use and
+then returned as-is to all sessions and reruns; a rerun only pays for the
+page-specific work.
+
+    app_config()          - resolved configuration (API key, mock mode, engines, DB path)
+    database(db_path)     - initialised DB handle (init_db / migration run once per file)
+    http_transport()      - pooled requests.Session used by all engines
+    engine_registry()     - names of the engines configured in this process
+    theme_css()           - rendered theme stylesheet
+
+Code outside the Streamlit runtime (worker threads, scripts) uses the plain
+helpers these wrap (scan.init_db, engines.http_session, ...) and gets the same
+per-process objects where one exists.
+
+Cached values are not refreshed automatically: after changing keys or
+secrets.toml, restart the app or call clear_resources(). The one exception is
+a configuration whose VirusTotal key could not be resolved: it is never kept,
+so adding the key takes effect on the next rerun.
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+import streamlit as st
+
+@dataclass(frozen=True)
+class AppConfig:
+    vt_api_key: Optional[str]
+    vt_error: Optional[str]  # why the key could not be resolved, if it could not
+    mock_mode: bool
+    engines: Tuple[str, ...]
+    db_path: Path
+
+class Database:
+    """
+    An initialised SQLite file. scan.init_db() (CREATE TABLE + PRAGMA
+    migration) runs once when the handle is built; connection() hands out
+    one connection per thread, since sqlite3 connections are thread-bound.
+    """
+
+    def __init__(self, path: Path | str):
+        from scan import init_db
+        self.path = Path(path)
+        init_db(self.path)
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path))
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+def app_config() -> AppConfig:
+    config = _load_config()
+    if config.vt_error is not None:
+        _load_config.clear()  # keep only a resolved config; look for the key again next time
+    return config
+
+@st.cache_resource(show_spinner=False)
+def _load_config() -> AppConfig:
+    from scan import get_db_path
+    from app.utils.engines import is_mock_mode
+    from app.utils.secrets import get_vt_api_key
+
+    key, error = None, None
+    try:
+        key = get_vt_api_key()
+    except Exception as e:
+        error = str(e)
+    return AppConfig(
+        vt_api_key=key,
+        vt_error=error,
+        mock_mode=is_mock_mode(),
+        engines=engine_registry(),
+        db_path=get_db_path(),
+    )
+
+@st.cache_resource(show_spinner=False)
+def database(db_path: Optional[str] = None) -> Database:
+    """Pass str(path); the argument is the cache key."""
+    if db_path is None:
+        from scan import get_db_path
+        db_path = str(get_db_path())
+    return Database(db_path)
+
+@st.cache_resource(show_spinner=False)
+def http_transport():
+    from app.utils.engines import http_session
+    return http_session()
+
+@st.cache_resource(show_spinner=False)
+def engine_registry() -> Tuple[str, ...]:
+    from app.utils.engines import active_engines
+    return tuple(e.name for e in active_engines())
+
+@st.cache_resource(show_spinner=False)
+def theme_css() -> str:
+    from app.utils.ui import build_theme_css
+    return build_theme_css()
+
+def clear_resources() -> None:
+    """Drop every cached resource; the next access rebuilds it."""
+    from app.utils.secrets import reset_secrets_cache
+    reset_secrets_cache()
+    for fn in (_load_config, database, http_transport, engine_registry, theme_css):
+        fn.clear()
@@ -0,0 +1,188 @@
+# app/utils/result_cache.py
+"""
+In-memory verdict cache backed by the scan history.
+
+Bulk consumers (log enrichment, the lookup daemon, the client SDK) ask "what
+do we already know about these IOCs?" far more often than they scan. Opening
+the database per question does not scale, so the cache loads the latest
+verdict per (type, IOC) from the scans table in one pass, answers batched
+lookups from a dict, and picks up newer scans incrementally (rows with a
+higher id) at most every `refresh_seconds`.
+
+    cache = result_cache()                    # process-wide, history loaded on first use
+    hits = cache.lookup_many([("url", "https://example.com"), ("hash", "44d8...")])
+    cache.put_result(aggregate_scan(ioc, t))  # fresh scans go straight in
+
+A verdict older than VL_RESULT_CACHE_TTL seconds (default 7 days, 0 = never
+expires) counts as a miss, so callers rescan it. Scans in which an engine
+reported an error (timeouts, 429s, 5xx) are not verdicts and are never
+indexed: their "Low" would otherwise hide a threat for the whole TTL.
+"""
+from __future__ import annotations
+import os
+import re
+import time
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+CacheKey = Tuple[str, str]  # (ioc_type, normalised ioc)
+
+# file scans are stored as "name.exe (SHA256: <hex>, SHA1: <hex>, MD5: <hex>)" - index them by each hash too
+_STORED_DIGEST = re.compile(r"\b(?:SHA256|SHA1|MD5):\s*([0-9a-fA-F]{32,64})\b")
+
+class Verdict(NamedTuple):
+    ioc: str
+    ioc_type: str
+    overall_risk: str
+    scan_id: Optional[int]
+    scanned_at: float  # unix time
+    source: str  # "history" or "scan"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ioc": self.ioc,
+            "type": self.ioc_type,
+            "overall_risk": self.overall_risk,
+            "scan_id": self.scan_id,
+            "scanned_at": datetime.datetime.fromtimestamp(self.scanned_at, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "source": self.source,
+        }
+
+def _ttl_seconds() -> float:
+    try:
+        return max(0.0, float(os.getenv("VL_RESULT_CACHE_TTL", str(7 * 24 * 3600))))
+    except ValueError:
+        return 7 * 24 * 3600.0
+
+def normalize(ioc: str, ioc_type: str) -> CacheKey:
+    ioc = (ioc or "").strip()
+    return (ioc_type, ioc.lower() if ioc_type == "hash" else ioc)
+
+def _timestamp(value: Any) -> float:
+    try:
+        return datetime.datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S").replace(
+            tzinfo=datetime.timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+def _has_engine_error(summary: Optional[str]) -> bool:
+    # summarize_engines() text, 'VirusTotal: {"error": "status 429"} | ...'; also
+    # catches an error in a part cut off at SUMMARY_LIMIT
+    return '"error": ' in (summary or "")
+
+class ResultCache:
+    """Thread-safe map CacheKey -> newest Verdict, fed from the scans table and from live scans."""
+
+    def __init__(self, db_path: Optional[Path | str] = None, ttl: Optional[float] = None,
+                 refresh_seconds: float = 5.0):
+        self.db_path = db_path
+        self.ttl = _ttl_seconds() if ttl is None else ttl
+        self.refresh_seconds = refresh_seconds
+        self._verdicts: Dict[CacheKey, Verdict] = {}
+        self._last_id = 0
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._verdicts)
+
+    # ----- history index -----
+
+    def refresh(self, force: bool = False) -> int:
+        """Load scans newer than the last one seen (all of them the first time). Returns rows read."""
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_seconds:
+            return 0
+        # one refresh at a time; concurrent callers answer from what is loaded
+        if not self._refreshing.acquire(blocking=force):
+            return 0
+        try:
+            self._last_refresh = now
+            return self._load_new()
+        finally:
+            self._refreshing.release()
+
+    def _load_new(self) -> int:
+        from scan import get_db_path
+        try:
+            conn = sqlite3.connect(str(self.db_path or get_db_path()), timeout=10)
+        except sqlite3.Error:
+            return 0
+        try:
+            rows = conn.execute(
+                "SELECT id, input, scan_type, risk_score, created_at, summary FROM scans WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+        except sqlite3.Error:
+            return 0  # no scans table yet
+        finally:
+            conn.close()
+        with self._lock:
+            for scan_id, ioc, scan_type, risk, created, summary in rows:
+                self._last_id = scan_id
+                if not ioc or not risk or _has_engine_error(summary):
+                    continue
+                ts = _timestamp(created)
+                keys = [(scan_type or "unknown", ioc)] + [("hash", d) for d in _STORED_DIGEST.findall(ioc)]
+                for key in keys:
+                    k = normalize(key[1], key[0])
+                    self._verdicts[k] = Verdict(k[1], k[0], risk, scan_id, ts, "history")
+        return len(rows)
+
+    # ----- lookups -----
+
+    def _fresh(self, v: Optional[Verdict], now: float) -> Optional[Verdict]:
+        if v is None or (self.ttl and now - v.scanned_at > self.ttl):
+            return None
+        return v
+
+    def lookup(self, ioc_type: str, ioc: str) -> Optional[Verdict]:
+        return self.lookup_many([(ioc_type, ioc)]).get(normalize(ioc, ioc_type))
+
+    def lookup_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[CacheKey, Optional[Verdict]]:
+        """(ioc_type, ioc) pairs -> Verdict or None (unknown / expired). One history refresh at most."""
+        self.refresh()
+        now = time.time()
+        wanted = [normalize(ioc, t) for t, ioc in keys]
+        get = self._verdicts.get
+        return {k: self._fresh(get(k), now) for k in wanted}
+
+    # ----- live results -----
+
+    def put_result(self, res: Dict[str, Any], scan_id: Optional[int] = None) -> Optional[Verdict]:
+        """Record an aggregate_scan() result; None (nothing cached) when an engine reported an error."""
+        from app.utils.engines import engine_errors
+        if engine_errors(res):
+            return None
+        k = normalize(res.get("input", ""), res.get("type", "unknown"))
+        v = Verdict(k[1], k[0], res.get("overall_risk", ""), scan_id, time.time(), "scan")
+        with self._lock:
+            self._verdicts[k] = v
+        return v
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._verdicts), "last_scan_id": self._last_id, "ttl": self.ttl}
+
+_CACHES: Dict[str, ResultCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+def result_cache(db_path: Optional[Path | str] = None) -> ResultCache:
+    """The process-wide cache for a database file (default: the app's database)."""
+    from scan import get_db_path
+    key = str(db_path or get_db_path())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = ResultCache(key)
+            cache.refresh(force=True)
+    return cache
+
+def split_hits(found: Dict[CacheKey, Optional[Verdict]]) -> Tuple[List[Verdict], List[CacheKey]]:
+    """(hits, misses) of a lookup_many() answer."""
+    hits = [v for v in found.values() if v is not None]
+    misses = [k for k, v in found.items() if v is None]
+    return hits, misses
@@ -0,0 +1,218 @@
+# app/utils/scan_jobs.py
+"""
+Background execution of interactive scans.
+
+The Scan page used to call aggregate_scan() in the Streamlit script thread,
+which froze the page for the whole provider round trip and threw the work away
+whenever a widget triggered a rerun. Scans now go to one process-wide thread
+pool; the page keeps the returned ScanHandle in st.session_state and polls it
+from a fragment, so reruns neither cancel nor repeat a scan that is in flight.
+
+    handle = submit_scan("https://example.com", "url")
+    handle.done() / handle.result() / handle.error()
+    handle.partial() / handle.pending()      # per-engine results while running
+
+    job = submit_bulk([{"input": "https://example.com", "type": "url"}, ...])
+    job.results[cursor:] / job.throughput() / job.eta()   # rows so far, appended as they finish
+
+Pool size: VL_SCAN_WORKERS (default 4). The work is network-bound, so threads
+are enough and results need no pickling.
+"""
+from __future__ import annotations
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+
+def _workers() -> int:
+    try:
+        return max(1, int(os.getenv("VL_SCAN_WORKERS", "4")))
+    except ValueError:
+        return 4
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="vl-scan")
+        return _EXECUTOR
+
+@dataclass
+class ScanHandle:
+    """An in-flight or finished scan. Lives in st.session_state across reruns."""
+    ioc: str
+    ioc_type: str
+    label: str
+    # engine names that will report, and results in arrival order
+    expected: List[str] = field(default_factory=list)
+    engines: List[Dict[str, Any]] = field(default_factory=list)
+    future: Optional[Future] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # set by the page once the result is stored, so it is saved exactly once
+    scan_id: Optional[int] = None
+    saved: bool = False
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.submitted_at
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The aggregate_scan() result, or None while running or after a failure."""
+        if not self.done() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+    def error(self) -> Optional[BaseException]:
+        return self.future.exception() if self.done() else None
+
+    def partial(self) -> Dict[str, Any]:
+        """Result built from the engines that have reported so far."""
+        from app.utils.engines import build_result
+        return build_result(self.ioc, self.ioc_type, list(self.engines))
+
+    def pending(self) -> List[str]:
+        arrived = {e.get("engine") for e in list(self.engines)}
+        return [name for name in self.expected if name not in arrived]
+
+def _run(handle: ScanHandle) -> Dict[str, Any]:
+    from app.utils.engines import iter_scan, build_result
+    for eng in iter_scan(handle.ioc, handle.ioc_type):
+        handle.engines.append(eng)  # list.append is atomic; the page reads copies
+    return build_result(handle.ioc, handle.ioc_type, list(handle.engines))
+
+def submit_scan(ioc: str, ioc_type: str, label: Optional[str] = None) -> ScanHandle:
+    """Queue the engines for (ioc, ioc_type) on the shared pool and return the handle."""
+    from app.utils.engines import planned_engines
+    handle = ScanHandle(
+        ioc=ioc,
+        ioc_type=ioc_type,
+        label=label or ioc,
+        expected=[name for name, _ in planned_engines(ioc, ioc_type)],
+    )
+
+    def _stamp(_f: Future) -> None:
+        handle.finished_at = time.time()
+
+    handle.future = _executor().submit(_run, handle)
+    handle.future.add_done_callback(_stamp)
+    return handle
+
+# ---------- bulk jobs ----------
+
+def scan_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """One Bulk page row -> {"input", "type", "overall_risk", "engines"}; errors are recorded, not raised."""
+    from app.utils.engines import aggregate_scan, detect_ioc_type
+    ioc = (row.get("input") or "").strip()
+    t = row.get("type") or detect_ioc_type(ioc)
+    if not ioc:
+        return {"input": "", "type": t, "overall_risk": "N/A", "engines": []}
+    try:
+        res = aggregate_scan(ioc, t)
+        return {"input": ioc, "type": res["type"], "overall_risk": res["overall_risk"], "engines": res["engines"]}
+    except Exception as e:
+        return {"input": ioc, "type": t, "overall_risk": f"error: {e}", "engines": []}
+
+@dataclass
+class BulkJob:
+    """A list of IOCs scanned one after another; results are appended as each finishes."""
+    rows: List[Dict[str, Any]]
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    future: Optional[Future] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    cancelled: bool = False
+    offline: int = 0  # rows answered without a provider call (feed, history, blank)
+    share_domains: bool = False
+    use_cache: bool = False
+    inferred: int = 0  # rows given a near-duplicate's or their registered domain's verdict
+
+    @property
+    def total(self) -> int:
+        return len(self.rows)
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def cancel(self) -> None:
+        """Stop after the row in flight; results so far are kept."""
+        self.cancelled = True
+
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.submitted_at
+
+    def throughput(self) -> float:
+        """Completed rows per second."""
+        elapsed = self.elapsed()
+        return len(self.results) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Optional[float]:
+        """Seconds until the remaining rows finish at the current rate, None before the first result."""
+        rate = self.throughput()
+        if self.done():
+            return 0.0
+        return (self.total - len(self.results)) / rate if rate > 0 else None
+
+def _emit(job: BulkJob, group: List[Dict[str, Any]], res: Dict[str, Any]) -> None:
+    from app.utils.bulk_plan import NEAR_KEY, answer_row
+    for row in group:
+        out = answer_row(row, res)
+        if row.get(NEAR_KEY) and not res.get("inferred"):
+            out["inferred"] = row[NEAR_KEY]  # verdict of a near-duplicate URL
+            job.inferred += 1
+        job.results.append(out)
+
+def _run_share(job: BulkJob, share) -> None:
+    """One domain report and the sample scans for a DomainShare, then the inferred rows."""
+    from app.utils.bulk_plan import inferred_result
+    from app.utils.engines import _run_engine, vt_domain_report
+    domain_engine = _run_engine("VirusTotal", lambda: vt_domain_report(share.domain))
+    domain_engine["engine"] = "VirusTotal domain"
+    samples = []
+    for group in share.samples:
+        if job.cancelled:
+            return
+        res = scan_row(group[0])
+        samples.append(res)
+        _emit(job, group, res)
+    for group in share.inferred:
+        _emit(job, group, inferred_result((group[0].get("input") or "").strip(), share, domain_engine, samples))
+    job.inferred += sum(len(g) for g in share.inferred)
+
+def _run_bulk(job: BulkJob) -> int:
+    from app.utils.bulk_plan import plan_bulk
+    # threat-feed / history hits and blank rows first, then shared-domain groups (few calls,
+    # many rows), then one scan per remaining distinct IOC
+    plan = plan_bulk(job.rows, share_domains=job.share_domains, use_cache=job.use_cache)
+    job.offline = len(plan.offline)
+    job.results.extend(plan.offline)
+    for share in plan.shares:
+        if job.cancelled:
+            break
+        _run_share(job, share)
+    for group in plan.groups:
+        if job.cancelled:
+            break
+        _emit(job, group, scan_row(group[0]))
+    return len(job.results)
+
+def submit_bulk(rows: List[Dict[str, Any]], share_domains: bool = False, use_cache: bool = False) -> BulkJob:
+    """Queue a bulk scan on the shared pool and return its job (see bulk_plan for the options)."""
+    job = BulkJob(rows=list(rows), share_domains=share_domains, use_cache=use_cache)
+
+    def _stamp(_f: Future) -> None:
+        job.finished_at = time.time()
+
+    job.future = _executor().submit(_run_bulk, job)
+    job.future.add_done_callback(_stamp)
+    return job
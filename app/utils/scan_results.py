@@ -0,0 +1,278 @@
+# app/utils/scan_results.py
+"""
+Turning aggregate_scan() results into stored scans, outside any UI.
+
+The Scan page, the REST API and the command-line tools all save results the
+same way: a one-line engine summary, the vt_details extracted for reports,
+one row via scan.record_search() and (optionally) a queued report render.
+
+The summary text is for display and capped at SUMMARY_LIMIT characters, so the
+engine summaries are also kept whole in vt_details["engine_summaries"]
+({engine name: summary dict}); exports read them from there.
+
+    scan_id = save_result(aggregate_scan(ioc, t), input_value=ioc)
+"""
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SUMMARY_LIMIT = 1000
+ENGINE_SUMMARIES_KEY = "engine_summaries"  # vt_details key holding the untruncated engine summaries
+
+def extract_vt_details(res: Dict[str, Any], warn: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+    """
+    Extract detailed information from engine responses for report generation.
+    warn, if given, receives a message when the VirusTotal payload is incomplete.
+    """
+    vt_details = {
+        "overall_risk": res.get("overall_risk", ""),
+        "type": res.get("type", ""),
+    }
+    
+    # Extract data from VirusTotal raw response
+    for eng in res.get("engines", []):
+        if eng.get("engine") == "VirusTotal":
+            raw = eng.get("raw", {})
+            if not raw:
+                # Debug: log that raw is empty
+                if warn:
+                    warn("⚠️ VirusTotal raw data is empty!")
+                continue
+                
+            data = raw.get("data", {})
+            if not data:
+                # Debug: log structure issue
+                if warn:
+                    warn(f"⚠️ VirusTotal data structure issue. Raw keys: {list(raw.keys())}")
+                continue
+                
+            attrs = data.get("attributes", {})
+            if not attrs:
+                # Debug: log attributes issue
+                if warn:
+                    warn(f"⚠️ VirusTotal attributes missing. Data keys: {list(data.keys())}")
+                continue
+            
+            # URL Reputation & Categorization
+            vt_details["reputation"] = str(attrs.get("reputation", "")) if attrs.get("reputation") else ""
+            categories = attrs.get("categories", {})
+            if isinstance(categories, dict) and categories:
+                unique_cats = sorted(set(str(v) for v in categories.values() if v))
+                vt_details["category"] = ", ".join(unique_cats[:5])  # Limit to 5 categories
+            else:
+                vt_details["category"] = ""
+            
+            stats = attrs.get("last_analysis_stats", {}) or attrs.get("stats", {})
+            if stats:
+                harmless = stats.get("harmless", 0)
+                malicious = stats.get("malicious", 0)
+                suspicious = stats.get("suspicious", 0)
+                undetected = stats.get("undetected", 0)
+                total = harmless + malicious + suspicious + undetected
+                vt_details["counts"] = f"Clean: {harmless}, Malicious: {malicious}, Suspicious: {suspicious}, Undetected: {undetected} (Total: {total})"
+            else:
+                vt_details["counts"] = ""
+            
+            # Domain & Hosting Information
+            vt_details["domain"] = str(data.get("id", "")) or ""
+            vt_details["whois"] = "Available" if attrs.get("whois") else ""
+            vt_details["country"] = str(attrs.get("country", "")) if attrs.get("country") else ""
+            asn = attrs.get("asn")
+            vt_details["asn"] = f"AS{asn}" if asn else ""
+            
+            # DNS Records & Network Artifacts
+            dns_records = attrs.get("last_dns_records") or attrs.get("dns_records")
+            vt_details["dns"] = "Available" if dns_records else ""
+            ip_addrs = []
+            if dns_records:
+                for record_type, records in (dns_records.items() if isinstance(dns_records, dict) else []):
+                    if isinstance(records, list):
+                        for rec in records:
+                            if isinstance(rec, dict) and rec.get("value"):
+                                ip_addrs.append(str(rec.get("value")))
+            vt_details["ips"] = ", ".join(ip_addrs[:5]) if ip_addrs else ""
+            
+            # Static Content Inspection
+            vt_details["html_title"] = str(attrs.get("title", "")) if attrs.get("title") else ""
+            outgoing_links = attrs.get("outgoing_links", [])
+            if isinstance(outgoing_links, list) and outgoing_links:
+                vt_details["scripts"] = f"{len(outgoing_links)} external resources found"
+            else:
+                vt_details["scripts"] = ""
+            tags = attrs.get("tags", [])
+            if isinstance(tags, list) and tags:
+                vt_details["resources"] = ", ".join([str(t) for t in tags[:8]])
+            else:
+                vt_details["resources"] = ""
+            
+            # Dynamic Behavioral Analysis
+            redirect_chain = attrs.get("redirection_chain", [])
+            if isinstance(redirect_chain, list) and redirect_chain:
+                vt_details["redirects"] = f"{len(redirect_chain)} redirect(s)"
+            else:
+                vt_details["redirects"] = ""
+            downloads = attrs.get("downloaded_files", [])
+            vt_details["downloads"] = f"{len(downloads)} file(s)" if downloads else ""
+            behavior = attrs.get("behaviour_summary")
+            vt_details["execution"] = "Behavior captured" if behavior else ""
+            
+            # Connections & Relationships
+            relationships = data.get("relationships", {})
+            linked_files = relationships.get("downloaded_files", {}).get("data", [])
+            vt_details["linked"] = f"{len(linked_files)} items" if linked_files else ""
+            comm_files = relationships.get("communicating_files", {}).get("data", [])
+            vt_details["files"] = f"{len(comm_files)} files" if comm_files else ""
+            contacted_domains = relationships.get("contacted_domains", {}).get("data", [])
+            vt_details["domains"] = f"{len(contacted_domains)} domains" if contacted_domains else ""
+            
+            # SSL/TLS Certificate Information
+            cert = attrs.get("last_https_certificate", {})
+            if isinstance(cert, dict):
+                vt_details["cert_issuer"] = str(cert.get("issuer", "")) if cert.get("issuer") else ""
+                vt_details["cert_subject"] = str(cert.get("subject", "")) if cert.get("subject") else ""
+                validity = cert.get("validity")
+                if validity:
+                    vt_details["cert_validity"] = f"Valid from {validity.get('not_before', '')} to {validity.get('not_after', '')}"
+                else:
+                    vt_details["cert_validity"] = ""
+            else:
+                vt_details["cert_issuer"] = ""
+                vt_details["cert_subject"] = ""
+                vt_details["cert_validity"] = ""
+            
+            # Antivirus / Engine Detections
+            if stats:
+                vt_details["av_stats"] = vt_details.get("counts", "")
+            else:
+                vt_details["av_stats"] = ""
+            last_results = attrs.get("last_analysis_results", {})
+            malicious_engs = []
+            if isinstance(last_results, dict):
+                for eng_name, result in last_results.items():
+                    if isinstance(result, dict) and result.get("category") == "malicious":
+                        malicious_engs.append(eng_name)
+            vt_details["av_malicious"] = ", ".join(malicious_engs[:10]) if malicious_engs else ""
+            
+            # Heuristic & Machine Learning Scoring
+            verdict = attrs.get("verdict")
+            vt_details["ml_verdict"] = str(verdict) if verdict else ""
+            ml_tags = attrs.get("tags", [])
+            if isinstance(ml_tags, list) and ml_tags:
+                vt_details["ml_tags"] = ", ".join([str(t) for t in ml_tags[:12]])
+            else:
+                vt_details["ml_tags"] = ""
+            
+            # Historical & Community Data
+            votes = attrs.get("total_votes", {})
+            if isinstance(votes, dict):
+                harmless_votes = votes.get("harmless", 0)
+                malicious_votes = votes.get("malicious", 0)
+                if harmless_votes or malicious_votes:
+                    vt_details["community"] = f"Safe: {harmless_votes}, Unsafe: {malicious_votes}"
+                else:
+                    vt_details["community"] = ""
+            else:
+                vt_details["community"] = ""
+            
+            first_sub = attrs.get("first_submission_date")
+            if first_sub:
+                try:
+                    from datetime import datetime
+                    dt = datetime.fromtimestamp(first_sub)
+                    vt_details["first_seen"] = dt.isoformat() + "Z"
+                except:
+                    vt_details["first_seen"] = str(first_sub)
+            else:
+                vt_details["first_seen"] = ""
+            
+            last_analysis = attrs.get("last_analysis_date")
+            if last_analysis:
+                try:
+                    from datetime import datetime
+                    dt = datetime.fromtimestamp(last_analysis)
+                    vt_details["last_seen"] = dt.isoformat() + "Z"
+                except:
+                    vt_details["last_seen"] = str(last_analysis)
+            else:
+                vt_details["last_seen"] = ""
+            
+            break  # Only process first VirusTotal engine
+    
+    # Extract data from urlscan.io if available
+    for eng in res.get("engines", []):
+        if eng.get("engine") == "urlscan.io":
+            raw = eng.get("raw", {})
+            # urlscan provides additional context that can supplement VT data
+            verdicts = raw.get("verdicts", {})
+            if verdicts:
+                overall = verdicts.get("overall", {})
+                if overall.get("malicious"):
+                    if not vt_details.get("reputation"):
+                        vt_details["reputation"] = "High risk (urlscan.io flagged)"
+            break
+    
+    # Extract data from OTX if available
+    for eng in res.get("engines", []):
+        if eng.get("engine") == "AlienVault OTX":
+            summary = eng.get("summary", {})
+            pulses = summary.get("pulses", 0)
+            if pulses and pulses > 0:
+                if not vt_details.get("reputation"):
+                    vt_details["reputation"] = f"Risk detected ({pulses} threat intelligence pulse(s))"
+            break
+    
+    return vt_details
+
+def engine_summaries(res: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """{engine name: summary} for every engine that produced one (no raw payloads)."""
+    return {eng.get("engine", "Unknown"): eng["summary"] for eng in res.get("engines", []) if eng.get("summary")}
+
+def summarize_engines(res: Dict[str, Any]) -> str:
+    """"VirusTotal: {...} | AlienVault OTX: {...}", capped at SUMMARY_LIMIT characters."""
+    parts = []
+    for eng in res.get("engines", []):
+        eng_summary = eng.get("summary", {})
+        if eng_summary:
+            parts.append(f"{eng.get('engine', 'Unknown')}: {json.dumps(eng_summary)}")
+    summary = " | ".join(parts) if parts else json.dumps(res)
+    return summary[:SUMMARY_LIMIT]
+
+def scan_record(
+    res: Dict[str, Any],
+    input_value: Optional[str] = None,
+    vt_details: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """record_search() keyword arguments for one result."""
+    details = extract_vt_details(res) if vt_details is None else vt_details
+    if isinstance(details, dict):
+        details = {**details, ENGINE_SUMMARIES_KEY: engine_summaries(res)}
+    return {
+        "scan_type": res.get("type", "unknown"),
+        "input_value": input_value or res.get("input", ""),
+        "summary": summarize_engines(res),
+        "risk_score": res.get("overall_risk", ""),
+        "vt_details": details,
+    }
+
+def save_result(
+    res: Dict[str, Any],
+    input_value: Optional[str] = None,
+    vt_details: Optional[Dict[str, Any]] = None,
+    db_path: Optional[Path | str] = None,
+    prerender: bool = True,
+) -> int:
+    """Store one scan result and return its id. Raises on database errors."""
+    from scan import record_search, get_db_path
+    db_path = db_path or get_db_path()
+    scan_id = record_search(**scan_record(res, input_value, vt_details), db_path=db_path)
+    # Pre-render the report in the background so Reports can serve it instantly
+    if scan_id and prerender:
+        from app.utils.prerender import queue_report
+        queue_report(scan_id, db_path)
+    return scan_id
+
+def save_results(results: List[Dict[str, Any]], db_path: Optional[Path | str] = None) -> List[int]:
+    """Store many results in one transaction (no report pre-rendering). Raises on database errors."""
+    from scan import record_searches
+    return record_searches([scan_record(res) for res in results], db_path=db_path)
@@ -33,7 +33,22 @@ def _ensure_dotenv_loaded() -> None:
     _ENV_LOADED = True
 
 
+# Resolved once per process; a missing key is not cached so it is retried
+_VT_API_KEY: str | None = None
+
 def get_vt_api_key() -> str:
+    """Cached VirusTotal API key; see _resolve_vt_api_key for the lookup order."""
+    global _VT_API_KEY
+    if _VT_API_KEY is None:
+        _VT_API_KEY = _resolve_vt_api_key()
+    return _VT_API_KEY
+
+def reset_secrets_cache() -> None:
+    """Forget the resolved key (after changing the environment or secrets.toml)."""
+    global _VT_API_KEY
+    _VT_API_KEY = None
+
+def _resolve_vt_api_key() -> str:
     """
     Resolve VirusTotal API key without surfacing Streamlit 'No secrets found' errors.
 
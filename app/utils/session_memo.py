@@ -0,0 +1,66 @@
+# app/utils/session_memo.py
+"""
+Per-session memo of recent scan results.
+
+Streamlit reruns the page on every widget change. The Scan page keeps each
+scan's handle here, keyed by (IOC type, IOC, engine set), so expanders,
+debug views and repeat clicks render from memory instead of calling the
+providers again. Entries are evicted least-recently-used beyond
+VL_SESSION_MEMO_SIZE (default 32) per session.
+
+    memo = session_memo()
+    key = memo_key("https://example.com", "url", ["VirusTotal", "urlscan.io"])
+    memo.get(key) / memo.put(key, handle)
+"""
+from __future__ import annotations
+import os
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple
+
+MemoKey = Tuple[str, str, Tuple[str, ...]]
+
+def _max_entries() -> int:
+    try:
+        return max(1, int(os.getenv("VL_SESSION_MEMO_SIZE", "32")))
+    except ValueError:
+        return 32
+
+def memo_key(ioc: str, ioc_type: str, engines: Iterable[str]) -> MemoKey:
+    return (ioc_type, ioc.strip(), tuple(sorted(engines)))
+
+class ResultMemo:
+    """Bounded LRU mapping MemoKey -> value (the Scan page stores ScanHandles)."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or _max_entries()
+        self._items: "OrderedDict[MemoKey, Any]" = OrderedDict()
+
+    def get(self, key: MemoKey) -> Optional[Any]:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: MemoKey, value: Any) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def drop(self, key: MemoKey) -> None:
+        self._items.pop(key, None)
+
+    def recent(self) -> List[Tuple[MemoKey, Any]]:
+        """Entries, most recently used first."""
+        return list(reversed(self._items.items()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+def session_memo(state_key: str = "result_memo") -> ResultMemo:
+    """The memo stored in this browser session's st.session_state."""
+    import streamlit as st
+    memo = st.session_state.get(state_key)
+    if not isinstance(memo, ResultMemo):
+        memo = st.session_state[state_key] = ResultMemo()
+    return memo
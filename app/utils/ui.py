@@ -1,5 +1,6 @@
 # app/utils/ui.py
 from __future__ import annotations
+import os
 import streamlit as st
 
 # Modern Gen Z Color Palette
@@ -17,6 +18,10 @@ SUCCESS = "#10b981"
 WARNING = "#f59e0b"
 ERROR = "#ef4444"
 
+# Linked from the page rather than @import-ed in the theme, so the theme
+# applies at once and Inter swaps in when it arrives (system fonts until then)
+FONT_CSS_URL = "https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap"
+
 def setup_page(title: str = "VirusLens — Cyber Threat Analyzer") -> None:
     """Must be the first Streamlit call on every page."""
     st.set_page_config(
@@ -29,16 +34,39 @@ def setup_page(title: str = "VirusLens — Cyber Threat Analyzer") -> None:
 
 def apply_theme(title_note: str = "VirusLens") -> None:
     """Modern Gen Z minimalist theme with glassmorphism and smooth animations."""
+    from app.utils.resources import theme_css  # built once per process, shared by all sessions
+    st.markdown(theme_css(), unsafe_allow_html=True)
+
+def build_theme_css() -> str:
+    """Viewport meta + minified theme stylesheet as one HTML snippet (see resources.theme_css)."""
+    from app.utils.assets import minify_css, image_urls
+
+    css = theme_stylesheet()
+    bg = image_urls("viruslens-bg") if theme_background_enabled() else None
+    if bg:
+        # content-hashed, long-cached background from static/dist (make assets)
+        css += f"""
+        .stApp {{
+            background: linear-gradient(135deg, rgba(10, 14, 39, 0.92) 0%, rgba(26, 31, 58, 0.92) 100%), url("{bg['jpg']}") center / cover fixed no-repeat;
+            background: linear-gradient(135deg, rgba(10, 14, 39, 0.92) 0%, rgba(26, 31, 58, 0.92) 100%), image-set(url("{bg['webp']}") type("image/webp"), url("{bg['jpg']}") type("image/jpeg")) center / cover fixed no-repeat;
+        }}
+        """
     # Add viewport meta for mobile
-    st.markdown("""
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, user-scalable=yes">
-    """, unsafe_allow_html=True)
-    
-    st.markdown(
-        f"""
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-        
+    return (
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, user-scalable=yes">'
+        '<link rel="preconnect" href="https://fonts.googleapis.com">'
+        '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+        f'<link rel="stylesheet" href="{FONT_CSS_URL}">'
+        f"<style>{minify_css(css)}</style>"
+    )
+
+def theme_background_enabled() -> bool:
+    """VL_THEME_BACKGROUND=1 adds the photo background from static/dist (off by default)."""
+    return os.getenv("VL_THEME_BACKGROUND", "0").lower() in ("1", "true", "yes", "on")
+
+def theme_stylesheet() -> str:
+    """The theme CSS, unminified (source for build_theme_css and the asset pipeline)."""
+    return f"""
         * {{
             font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
         }}
@@ -571,7 +599,48 @@ def apply_theme(title_note: str = "VirusLens") -> None:
         .main .block-container {{
             animation: fadeIn 0.5s ease-out;
         }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
+
+def render_export_controls(db_path, key: str = "history_export") -> None:
+    """
+    History export widget: streams the scans table to a file, then offers it
+    for download. st.download_button reads the file into memory (it takes
+    bytes, not a path), so each export is held in the server's memory for the
+    session; for very large histories use GET /history/export or
+    app.utils.export from a script instead.
+    """
+    import tempfile
+    from app.utils.export import FORMATS, export_history, parquet_available
+    from app.utils.paths import DATA_DIR
+
+    formats = [f for f in FORMATS if f != "parquet" or parquet_available()]
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        fmt = st.selectbox("Export format", formats, key=f"{key}_fmt", format_func=str.upper)
+    with c2:
+        prepare = st.button("📤 Prepare export", key=f"{key}_btn", use_container_width=True)
+    if not prepare:
+        return
+    mime, ext = FORMATS[fmt]
+    out_dir = DATA_DIR / "exports"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=ext, dir=out_dir)
+    os.close(fd)
+    try:
+        with st.spinner(f"Exporting history as {fmt.upper()}…"):
+            export_history(tmp, fmt, db_path=db_path)
+        with open(tmp, "rb") as fh:
+            st.download_button(
+                f"Download {fmt.upper()}",
+                data=fh,
+                file_name=f"viruslens_history{ext}",
+                mime=mime,
+                key=f"{key}_dl",
+            )
+    except Exception as e:
+        st.error(f"Export failed: {e}")
+    finally:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
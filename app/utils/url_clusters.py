@@ -0,0 +1,96 @@
+# app/utils/url_clusters.py
+"""
+URL canonicalisation and near-duplicate keys for bulk planning.
+
+    canonical_url("HTTPS://Example.com/a?b=2&utm_source=x&a=1")
+        -> "https://example.com/a?a=1&b=2"
+    template_key("https://example.com/u/12345/reset?token=9f86d081884c7d65&lang=en")
+        -> "example.com/u/{n}/reset?lang=en&token={hex}"
+
+canonical_url() lowercases scheme and host, drops default ports, fragments and
+known tracking parameters (utm_*, gclid, fbclid, ...) and sorts the remaining
+query keys, so URLs that differ only in those are the same resource.
+template_key() goes further for clustering: numeric, hex, UUID and long
+high-entropy path segments and query values are masked, so phishing-kit
+URLs that differ only in a victim id or token share one key. Segments that
+look like file names (an extension) or carry a dotted / dashed version
+("jquery-3.6.0.min.js", "setup-2-1") are never masked: different files in
+one directory must not share a verdict.
+
+Both are a single pass over the URL text; clustering a feed is one dict pass,
+linear in its size.
+"""
+from __future__ import annotations
+import re
+import math
+from collections import Counter
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+TRACKING_PARAMS = frozenset({
+    "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "igshid", "twclid", "ttclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "vero_id", "oly_enc_id",
+    "oly_anon_id", "ref_src", "spm", "trk", "wickedid", "s_cid",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+_UUID = re.compile(r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$", re.I)
+_NUMBER = re.compile(r"^\d+$")
+_HEX = re.compile(r"^(?=[0-9a-f]*\d)[0-9a-f]{8,}$", re.I)
+# 16+ chars of url-safe base64 with both letters and digits: session ids, tokens
+_TOKEN = re.compile(r"^(?=.*\d)(?=.*[a-zA-Z])[A-Za-z0-9_\-=%]{16,}$")
+_FILE_EXT = re.compile(r"\.[A-Za-z][A-Za-z0-9]{0,5}$")
+_VERSION = re.compile(r"\d+(?:[.\-_]\d+)+")
+TOKEN_MIN_ENTROPY = 3.5  # bits per character; random base64 ids sit near 4-6
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def _split(url: str) -> Tuple[str, str, str, List[Tuple[str, str]]]:
+    """(scheme, host[:port], path, raw query pairs without tracking parameters)."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = parts.netloc.rpartition("@")[2].lower()
+    default = DEFAULT_PORTS.get(scheme)
+    if default and host.endswith(":" + default):
+        host = host[:-len(default) - 1]
+    host = host.rstrip(".")
+    query = []
+    for pair in parts.query.split("&"):
+        if pair:
+            k, _, v = pair.partition("=")
+            if not is_tracking_param(k):
+                query.append((k, v))
+    return scheme, host, parts.path or "/", query
+
+def canonical_url(url: str) -> str:
+    scheme, host, path, query = _split(url)
+    q = "&".join(f"{k}={v}" for k, v in sorted(query))
+    return f"{scheme}://{host}{path}" + (f"?{q}" if q else "")
+
+def _entropy(text: str) -> float:
+    n = len(text)
+    return -sum(c / n * math.log2(c / n) for c in Counter(text).values()) if n else 0.0
+
+def mask(segment: str) -> str:
+    """Placeholder for an id-like path segment or query value, else the value itself."""
+    if _NUMBER.match(segment):
+        return "{n}"
+    if _UUID.match(segment):
+        return "{uuid}"
+    if _FILE_EXT.search(segment) or _VERSION.search(segment):
+        return segment  # a file name or versioned artefact, not an id
+    if _HEX.match(segment):
+        return "{hex}"
+    if _TOKEN.match(segment) and _entropy(segment) >= TOKEN_MIN_ENTROPY:
+        return "{token}"
+    return segment
+
+def template_key(url: str) -> str:
+    """Host + masked path template + sorted query keys with masked values."""
+    _, host, path, query = _split(url)
+    tpath = "/".join(mask(seg) for seg in path.split("/"))
+    q = "&".join(f"{k}={mask(v)}" for k, v in sorted(query))
+    return f"{host}{tpath}" + (f"?{q}" if q else "")
@@ -1,6 +1,5 @@
 from __future__ import annotations
 import re
-import hashlib
 import requests
 from typing import Any, Dict, Optional
 from app.utils.secrets import get_vt_api_key
@@ -12,11 +11,8 @@ def is_hash(s: str) -> bool:
     return bool(HASH_RE.match(s or ""))
 
 def file_hash_sha256(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    from app.utils.hashing import hash_file
+    return hash_file(path).sha256
 
 class VTClient:
     def __init__(self, api_key: Optional[str] = None, base_url: str = "https://www.virustotal.com/api/v3"):
@@ -0,0 +1,263 @@
+# benchmarks/bench_reports.py
+"""
+Offline benchmark for the three report renderers:
+
+  - app.report_builder.make_pdf_report   (layman report from raw VT JSON)
+  - app.report_pdf.build_report_pdf_bytes (Reports page tables from vt_details)
+  - app.pdf.create_pdf_for_scan           (canvas report)
+
+Synthetic VirusTotal payloads are generated locally (a few engines up to 90,
+with long outgoing_links / tags lists), so no network or API key is needed.
+
+Usage:
+    python -m benchmarks.bench_reports                       # print timings
+    python -m benchmarks.bench_reports --save-baseline       # record benchmarks/baseline.json
+    python -m benchmarks.bench_reports --threshold 1.25      # exit 1 if >25% slower / bigger than baseline
+
+Baselines are machine-specific; record one on the machine that runs the check.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# name -> (engines, outgoing_links, tags)
+SIZES: Dict[str, Tuple[int, int, int]] = {
+    "small": (5, 0, 2),
+    "medium": (40, 60, 20),
+    "large": (90, 600, 150),
+}
+
+CATEGORIES = ("malicious", "suspicious", "harmless", "undetected", "timeout")
+
+# ---------- synthetic payloads ----------
+
+def make_vt_payload(engines: int, links: int, tags: int, seed: int = 7) -> Dict[str, Any]:
+    """A VT URL object shaped like vt_url_report()['raw']."""
+    rnd = random.Random(seed)
+    results = {}
+    for i in range(engines):
+        cat = rnd.choices(CATEGORIES, weights=(2, 1, 10, 6, 1))[0]
+        results[f"Engine{i:02d}"] = {"category": cat, "result": cat, "method": "blacklist", "engine_name": f"Engine{i:02d}"}
+    stats = {c: sum(1 for r in results.values() if r["category"] == c) for c in CATEGORIES}
+    return {
+        "data": {
+            "id": "b1946ac92492d2347c6235b4d2611184" * 2,
+            "type": "url",
+            "links": {"self": "https://www.virustotal.com/api/v3/urls/bench"},
+            "attributes": {
+                "reputation": rnd.randint(-10, 10),
+                "categories": {f"Vendor{i}": rnd.choice(("phishing", "malware", "news", "ads")) for i in range(min(engines, 12))},
+                "last_analysis_stats": stats,
+                "last_analysis_results": results,
+                "outgoing_links": [f"https://cdn{i}.example.test/assets/{'x' * 40}/script{i}.js" for i in range(links)],
+                "tags": [f"tag-{i}-{'y' * 12}" for i in range(tags)],
+                "redirection_chain": [f"https://r{i}.example.test/" for i in range(min(links, 8))],
+                "last_dns_records": [{"type": "A", "value": f"10.0.{i // 256}.{i % 256}"} for i in range(min(links, 30))],
+                "last_https_certificate": {"issuer": {"CN": "Bench CA"}, "subject": {"CN": "example.test"},
+                                           "validity": {"not_before": "2024-01-01", "not_after": "2026-01-01"}},
+                "total_votes": {"harmless": rnd.randint(0, 50), "malicious": rnd.randint(0, 50)},
+                "first_submission_date": 1700000000,
+                "last_analysis_date": 1710000000,
+                "title": "Bench page " + "z" * 60,
+                "whois": "Registrar: Bench\n" * 20,
+                "country": "US",
+                "asn": 64500,
+            },
+            "relationships": {"contacted_domains": {"data": [{"id": f"d{i}.test"} for i in range(min(links, 25))]}},
+        }
+    }
+
+def make_vt_details(raw: Dict[str, Any]) -> Dict[str, str]:
+    """The flattened vt_details strings the Scan page stores for a payload."""
+    attrs = raw["data"]["attributes"]
+    stats = attrs["last_analysis_stats"]
+    malicious = [k for k, v in attrs["last_analysis_results"].items() if v["category"] == "malicious"]
+    counts = ", ".join(f"{k}: {v}" for k, v in stats.items())
+    return {
+        "reputation": str(attrs["reputation"]),
+        "category": ", ".join(sorted(set(attrs["categories"].values()))),
+        "counts": counts,
+        "domain": raw["data"]["id"],
+        "whois": "Available",
+        "country": attrs["country"],
+        "asn": f"AS{attrs['asn']}",
+        "dns": "Available",
+        "ips": ", ".join(r["value"] for r in attrs["last_dns_records"][:5]),
+        "html_title": attrs["title"],
+        "scripts": f"{len(attrs['outgoing_links'])} external resources found",
+        "resources": ", ".join(attrs["tags"][:8]),
+        "redirects": f"{len(attrs['redirection_chain'])} redirect(s)",
+        "av_stats": counts,
+        "av_malicious": ", ".join(malicious[:10]),
+        "ml_tags": ", ".join(attrs["tags"][:12]),
+        "community": "Safe: {harmless}, Unsafe: {malicious}".format(**attrs["total_votes"]),
+        "first_seen": "2023-11-14T22:13:20Z",
+        "last_seen": "2024-03-09T16:00:00Z",
+    }
+
+def make_scan_obj(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Scan dict as returned by scan.get_scan()."""
+    stats = raw["data"]["attributes"]["last_analysis_stats"]
+    return {
+        "id": 1,
+        "input": "https://bench.example.test/login?next=" + "a" * 80,
+        "type": "url",
+        "risk": "High" if stats["malicious"] else "Low",
+        "summary": "VirusTotal: " + json.dumps(stats),
+        "timestamp": "2024-03-09 16:00:00",
+        "vt_details": make_vt_details(raw),
+    }
+
+def make_legacy_scan(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Scan record shaped like app.models.Scan.to_dict() for create_pdf_for_scan()."""
+    attrs = raw["data"]["attributes"]
+    stats = attrs["last_analysis_stats"]
+    return {
+        "url": "https://bench.example.test/login",
+        "verdict": "malicious" if stats["malicious"] else "clean",
+        "created_at": "2024-03-09T16:00:00",
+        "summary": " ".join(attrs["tags"]),
+        "vt_score": f"{stats['malicious']}/{sum(stats.values())}",
+        "urlscan_result": " ".join(attrs["outgoing_links"]),
+        "otx_pulses": 3,
+        "vt_details": {"last_analysis_stats": stats},
+        "av": [(k, v["category"]) for k, v in attrs["last_analysis_results"].items()],
+    }
+
+# ---------- targets ----------
+
+def _targets(workdir: Path) -> Dict[str, Callable[[Dict[str, Any]], None]]:
+    from app.report_builder import make_pdf_report
+    from app.report_pdf import build_report_pdf_bytes
+    from app.pdf import create_pdf_for_scan
+
+    metadata = {"Scan ID": 1, "Input": "https://bench.example.test/", "Type": "url",
+                "Risk Score": "High", "Summary": "bench", "Timestamp (UTC)": "2024-03-09 16:00:00"}
+
+    def run_make_pdf_report(raw):
+        make_pdf_report(str(workdir / "make_pdf_report.pdf"), "VirusLens — Bench Report", metadata, raw)
+
+    def run_build_report_pdf_bytes(raw):
+        build_report_pdf_bytes(make_scan_obj(raw))
+
+    def run_create_pdf_for_scan(raw):
+        legacy = make_legacy_scan(raw)
+        create_pdf_for_scan(1, lambda _id: legacy)  # writes under ./reports (cwd is workdir)
+
+    return {
+        "make_pdf_report": run_make_pdf_report,
+        "build_report_pdf_bytes": run_build_report_pdf_bytes,
+        "create_pdf_for_scan": run_create_pdf_for_scan,
+    }
+
+def _time(fn: Callable[[], None], repeat: int) -> List[float]:
+    fn()  # warm-up: imports, font metrics, style caches
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+def _peak_kib(fn: Callable[[], None]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+def run(sizes: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Return {"<target>/<size>": {"median_ms", "min_ms", "peak_kib"}}."""
+    results: Dict[str, Dict[str, float]] = {}
+    prev_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="vl-bench-") as tmp:
+        workdir = Path(tmp)
+        os.chdir(workdir)
+        try:
+            targets = _targets(workdir)
+            for size in sizes:
+                raw = make_vt_payload(*SIZES[size])
+                for name, target in targets.items():
+                    call = lambda: target(raw)  # noqa: E731
+                    times = _time(call, repeat)
+                    results[f"{name}/{size}"] = {
+                        "median_ms": round(statistics.median(times) * 1000, 2),
+                        "min_ms": round(min(times) * 1000, 2),
+                        "peak_kib": round(_peak_kib(call), 1),
+                    }
+        finally:
+            os.chdir(prev_cwd)
+    return results
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """List of human-readable regressions (median time or peak memory over baseline * threshold)."""
+    problems = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("median_ms", "peak_kib"):
+            if base.get(metric) and cur[metric] > base[metric] * threshold:
+                problems.append(f"{key} {metric}: {cur[metric]} > {base[metric]} x {threshold}")
+    return problems
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark VirusLens report rendering (offline).")
+    ap.add_argument("--sizes", default=",".join(SIZES), help="comma-separated subset of: " + ", ".join(SIZES))
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per target and size (default 5)")
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON path")
+    ap.add_argument("--threshold", type=float, default=float(os.getenv("VL_BENCH_THRESHOLD", "1.25")),
+                    help="fail when median time or peak memory exceeds baseline x threshold (default 1.25)")
+    ap.add_argument("--save-baseline", action="store_true", help="write results to --baseline and exit 0")
+    ap.add_argument("--json", type=Path, help="also write results to this file")
+    args = ap.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        ap.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results = run(sizes, max(1, args.repeat))
+
+    print(f"{'target/size':40} {'median ms':>10} {'min ms':>10} {'peak KiB':>10}")
+    for key, r in results.items():
+        print(f"{key:40} {r['median_ms']:>10} {r['min_ms']:>10} {r['peak_kib']:>10}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    problems = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    if problems:
+        print("\nREGRESSIONS:")
+        for p in problems:
+            print("  " + p)
+        return 1
+    print(f"\nNo regressions (threshold x{args.threshold}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# benchmarks/startup.py
+"""
+Startup profiler and import budget for the Streamlit entry points.
+
+Each entry point (main.py and every page) is executed once in a fresh
+interpreter with `-X importtime`, in Streamlit bare mode with MOCK_MODE on,
+which is what the first request after a scale-up pays. For each one we report
+wall time, total import time, the app's own import time (everything except
+streamlit and interpreter startup) and the slowest top-level imports.
+
+The budget check fails (exit 1) when
+  - a page imports a heavy dependency it is not allowed to load at startup
+    (HEAVY below; page-specific exceptions in ALLOWED_HEAVY), or
+  - the app's own import time (allowed heavy modules excluded) exceeds
+    --budget-ms (VL_STARTUP_BUDGET_MS).
+
+The heavy-module rule is machine-independent and is the part to rely on in
+CI; the millisecond budget is a coarse guard.
+
+Usage:
+    python -m benchmarks.startup                     # table + budget check
+    python -m benchmarks.startup --top 15            # more detail per page
+    python -m benchmarks.startup --raw pages/04_Reports.py   # dump raw -X importtime output
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+ENTRY_POINTS = (
+    "main.py",
+    "pages/01_Scan.py",
+    "pages/02_Bulk.py",
+    "pages/03_History.py",
+    "pages/04_Reports.py",
+    "pages/05_About.py",
+)
+
+# Dependencies that must only be imported at the point of use
+HEAVY = ("pandas", "numpy", "pyarrow", "reportlab", "requests", "httpx",
+         "sqlalchemy", "pydantic", "pydantic_settings")
+
+# entry point -> heavy modules it may import at startup
+ALLOWED_HEAVY: Dict[str, Tuple[str, ...]] = {
+    # the page *is* a table; st.dataframe serialises through pandas/pyarrow
+    "pages/03_History.py": ("pandas", "numpy", "pyarrow"),
+}
+
+# interpreter / framework imports not counted against the app budget
+RUNTIME_ROOTS = ("streamlit", "site")
+
+DEFAULT_BUDGET_MS = float(os.getenv("VL_STARTUP_BUDGET_MS", "150"))
+
+# Runs one page in bare mode; st.stop() and page errors must not hide the timings
+_RUNNER = r"""
+import sys, runpy, json
+sys.path.insert(0, {root!r})
+try:
+    runpy.run_path({page!r}, run_name="__main__")
+except BaseException as e:
+    sys.stderr.write("startup-profiler: page raised %s: %s\n" % (type(e).__name__, e))
+import_names = sorted(m for m in sys.modules)
+with open({out!r}, "w") as fh:
+    json.dump(import_names, fh)
+"""
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for every -X importtime line."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), depth))
+    return rows
+
+def _env(db_path: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("MOCK_MODE", "true")
+    env.setdefault("VL_DB_FILE", db_path)
+    env["VL_PRERENDER_REPORTS"] = "false"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(ROOT), env.get("PYTHONPATH")) if p)
+    return env
+
+def profile(page: str, workdir: Path) -> Dict[str, object]:
+    out = workdir / "modules.json"
+    code = _RUNNER.format(root=str(ROOT), page=str(ROOT / page), out=str(out))
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(ROOT), env=_env(str(workdir / "startup.db")),
+        capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    rows = parse_importtime(proc.stderr)
+    top = [r for r in rows if r[3] == 0]
+    total_us = sum(r[2] for r in top)
+    # allowed heavy imports are budgeted by ALLOWED_HEAVY, not by time
+    exempt = RUNTIME_ROOTS + ALLOWED_HEAVY.get(page, ())
+    runtime_us = sum(r[2] for r in top if r[0].split(".")[0] in exempt)
+    modules = json.loads(out.read_text()) if out.exists() else []
+    loaded = {m.split(".")[0] for m in modules}
+    return {
+        "page": page,
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(total_us / 1000, 1),
+        "app_import_ms": round((total_us - runtime_us) / 1000, 1),
+        "heavy": sorted(h for h in HEAVY if h in loaded),
+        "slowest": sorted(((r[0], round(r[2] / 1000, 1)) for r in top), key=lambda x: -x[1]),
+        "errors": [l for l in proc.stderr.splitlines() if l.startswith("startup-profiler:")],
+        "raw": proc.stderr,
+    }
+
+def check(result: Dict[str, object], budget_ms: float) -> List[str]:
+    problems = []
+    page = str(result["page"])
+    extra = [h for h in result["heavy"] if h not in ALLOWED_HEAVY.get(page, ())]
+    if extra:
+        problems.append(f"{page}: imports {', '.join(extra)} at startup")
+    if result["app_import_ms"] > budget_ms:
+        problems.append(f"{page}: app imports took {result['app_import_ms']} ms > budget {budget_ms} ms")
+    return problems
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Profile VirusLens page startup imports and enforce a budget.")
+    ap.add_argument("pages", nargs="*", default=list(ENTRY_POINTS), help="entry points (default: main.py and all pages)")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                    help=f"max app import time per page, streamlit/site excluded (default {DEFAULT_BUDGET_MS:g})")
+    ap.add_argument("--top", type=int, default=5, help="slowest top-level imports to list per page")
+    ap.add_argument("--raw", action="store_true", help="print the raw -X importtime output")
+    ap.add_argument("--json", type=Path, help="also write results to this file")
+    args = ap.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="vl-startup-") as tmp:
+        for page in args.pages:
+            results.append(profile(page, Path(tmp)))
+
+    problems: List[str] = []
+    print(f"{'entry point':24} {'wall ms':>9} {'imports ms':>11} {'app ms':>8}  heavy")
+    for r in results:
+        print(f"{r['page']:24} {r['wall_ms']:>9} {r['import_ms']:>11} {r['app_import_ms']:>8}  {', '.join(r['heavy']) or '-'}")
+        for name, ms in r["slowest"][:args.top]:
+            print(f"    {name:36} {ms:>8} ms")
+        for e in r["errors"]:
+            print(f"    {e}")
+        if args.raw:
+            print(r["raw"])
+        problems += check(r, args.budget_ms)
+
+    if args.json:
+        args.json.write_text(json.dumps([{k: v for k, v in r.items() if k != "raw"} for r in results], indent=2))
+    if problems:
+        print("\nSTARTUP BUDGET EXCEEDED:")
+        for p in problems:
+            print("  " + p)
+        return 1
+    print(f"\nWithin startup budget ({args.budget_ms:g} ms, no heavy imports).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
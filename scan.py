@@ -6,8 +6,11 @@ Provides:
 - init_db(db_path: Path | str | None) -> None
 - get_db_path() -> pathlib.Path
 - record_search(scan_type: str, input_value: str, summary: str = "", risk_score: str = "", vt_details: dict|None = None, db_path: Path|str|None = None) -> int
+- record_searches(records: list[dict], db_path) -> list[int]   (one transaction)
 - list_scans(limit: int = 200, db_path: Path|str|None = None) -> list[dict]
 - get_scan(scan_id: int, db_path: Path|str|None = None) -> dict|None
+- probe_schema(db_path) / list_scan_choices(limit, db_path) / get_scan_detail(scan_id, db_path)
+- query_scans(filters..., sort, descending, limit, offset, db_path) / count_scans(filters..., db_path) / scan_facets(db_path)
 
 Notes:
 - This module intentionally uses sqlite3 (std lib) for simplicity and portability.
@@ -120,6 +123,11 @@ def init_db(db_path: Optional[Path | str] = None) -> None:
     if 'created_at' not in existing_cols:
         cur.execute("ALTER TABLE scans ADD COLUMN created_at TEXT DEFAULT (datetime('now'))")
     
+    # Indexes for the History page filters / sorting (see query_scans)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_scans_created_at ON scans(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_scans_type ON scans(scan_type)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_scans_risk ON scans(risk_score)")
+
     # For backwards compatibility some forks used a 'history' table; create if missing (safe)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS history (
@@ -136,6 +144,51 @@ def init_db(db_path: Optional[Path | str] = None) -> None:
 
 # ---------- record / list / fetch --------------------------------------
 
+def _vt_json(vt_details: Optional[Dict[str, Any]]) -> Optional[str]:
+    if vt_details is None:
+        return None
+    try:
+        return json.dumps(vt_details, ensure_ascii=False)
+    except Exception:
+        try:
+            # try a simple fallback
+            return json.dumps(str(vt_details))
+        except Exception:
+            return None
+
+def _insert_scan(cur: sqlite3.Cursor, legacy_cols: bool, scan_type: str, input_value: str,
+                 summary: str, risk_score: str, vt_json: Optional[str], now: str) -> int:
+    """INSERT one scan (and its history row) on an open cursor; returns the scan id."""
+    if legacy_cols:
+        # Insert with target and status (for existing schema)
+        cur.execute("""
+            INSERT INTO scans (input, target, scan_type, status, risk_score, summary, vt_details, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (input_value, input_value, scan_type, "completed", str(risk_score or ""), summary or "", vt_json, now))
+    else:
+        # Insert without target and status (for new schema)
+        cur.execute("""
+            INSERT INTO scans (input, scan_type, risk_score, summary, vt_details, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (input_value, scan_type, str(risk_score or ""), summary or "", vt_json, now))
+    scan_id = cur.lastrowid
+    # Also insert into history table (for forks/pages that look for it)
+    try:
+        cur.execute("""
+            INSERT INTO history (input_value, scan_type, risk_score, summary, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (input_value, scan_type, str(risk_score or ""), summary or "", now))
+    except Exception:
+        # ignore history insertion failures
+        pass
+    return scan_id
+
+def _has_legacy_cols(cur: sqlite3.Cursor) -> bool:
+    # Check if target and status columns exist (for backward compatibility)
+    cur.execute("PRAGMA table_info(scans)")
+    existing_cols = {row[1] for row in cur.fetchall()}
+    return 'target' in existing_cols and 'status' in existing_cols
+
 def record_search(
     scan_type: str,
     input_value: str,
@@ -158,47 +211,13 @@ def record_search(
     if input_value is None:
         input_value = ""
 
-    vt_json = None
-    if vt_details is not None:
-        try:
-            vt_json = json.dumps(vt_details, ensure_ascii=False)
-        except Exception:
-            try:
-                # try a simple fallback
-                vt_json = json.dumps(str(vt_details))
-            except Exception:
-                vt_json = None
+    vt_json = _vt_json(vt_details)
 
     conn = _connect(db_path)
     cur = conn.cursor()
     now = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
     try:
-        # Check if target and status columns exist (for backward compatibility)
-        cur.execute("PRAGMA table_info(scans)")
-        existing_cols = {row[1] for row in cur.fetchall()}
-        
-        if 'target' in existing_cols and 'status' in existing_cols:
-            # Insert with target and status (for existing schema)
-            cur.execute("""
-                INSERT INTO scans (input, target, scan_type, status, risk_score, summary, vt_details, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (input_value, input_value, scan_type, "completed", str(risk_score or ""), summary or "", vt_json, now))
-        else:
-            # Insert without target and status (for new schema)
-            cur.execute("""
-                INSERT INTO scans (input, scan_type, risk_score, summary, vt_details, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (input_value, scan_type, str(risk_score or ""), summary or "", vt_json, now))
-        scan_id = cur.lastrowid
-        # Also insert into history table (for forks/pages that look for it)
-        try:
-            cur.execute("""
-                INSERT INTO history (input_value, scan_type, risk_score, summary, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (input_value, scan_type, str(risk_score or ""), summary or "", now))
-        except Exception:
-            # ignore history insertion failures
-            pass
+        scan_id = _insert_scan(cur, _has_legacy_cols(cur), scan_type, input_value, summary, risk_score, vt_json, now)
         conn.commit()
     except Exception as exc:
         conn.rollback()
@@ -209,6 +228,33 @@ def record_search(
 
     return scan_id
 
+def record_searches(records: List[Dict[str, Any]], db_path: Optional[Path | str] = None) -> List[int]:
+    """
+    Record many scans in one transaction (batch tools). Each record takes
+    record_search()'s keyword arguments: scan_type, input_value, summary,
+    risk_score, vt_details. Returns the scan ids in order; all or nothing.
+    """
+    if not records:
+        return []
+    conn = _connect(db_path)
+    cur = conn.cursor()
+    now = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        legacy = _has_legacy_cols(cur)
+        ids = [
+            _insert_scan(cur, legacy, r.get("scan_type", "unknown"), r.get("input_value") or "",
+                         r.get("summary", ""), r.get("risk_score", ""), _vt_json(r.get("vt_details")), now)
+            for r in records
+        ]
+        conn.commit()
+    except Exception as exc:
+        conn.rollback()
+        print(f"Failed to record scans to DB: {exc}", file=sys.stderr)
+        raise
+    finally:
+        conn.close()
+    return ids
+
 def list_scans(limit: int = 200, db_path: Optional[Path | str] = None) -> List[Dict[str, Any]]:
     """
     Return recent scans as a list of dicts (most recent first).
@@ -325,6 +371,267 @@ def get_scan(scan_id: int, db_path: Optional[Path | str] = None) -> Optional[Dic
     finally:
         conn.close()
 
+# ---------- schema probe (cached per DB file) ---------------------------
+
+# Column aliases seen across forks of the schema, in order of preference
+_COLUMN_ALIASES = {
+    "input": ("input", "input_value", "target", "url"),
+    "type": ("scan_type", "type"),
+    "risk": ("risk_score", "risk", "status", "verdict"),
+    "summary": ("summary", "result_json"),
+    "timestamp": ("created_at", "timestamp", "updated_at"),
+}
+_TABLE_CANDIDATES = ("scans", "history", "scan", "records", "results")
+
+# (path, inode, mtime_ns) -> probe result
+_SCHEMA_CACHE: Dict[tuple, Optional[Dict[str, Any]]] = {}
+
+def _file_identity(db_path: Path) -> Optional[tuple]:
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return (str(Path(db_path).resolve()), st.st_ino, st.st_mtime_ns)
+
+def _probe(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+    cur = conn.cursor()
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    tables = {r[0] for r in cur.fetchall()}
+    # the first candidate present, even when empty: an empty `scans` is the
+    # live table of a fresh database, not a reason to read a legacy `history`
+    chosen = next((tbl for tbl in _TABLE_CANDIDATES if tbl in tables), None)
+    if chosen is None:
+        return None
+
+    cur.execute(f"PRAGMA table_info({chosen})")
+    cols = {r[1] for r in cur.fetchall()}
+    plan: Dict[str, Any] = {"table": chosen, "id": "id" if "id" in cols else "rowid"}
+    for key, aliases in _COLUMN_ALIASES.items():
+        present = [c for c in aliases if c in cols]
+        plan[key] = f"COALESCE({', '.join(present)}, '')" if present else "''"
+    plan["details"] = "vt_details" if "vt_details" in cols else "NULL"
+    # bare column per field (first alias present) for WHERE / ORDER BY, so indexes apply
+    plan["raw"] = {key: next((c for c in aliases if c in cols), None) for key, aliases in _COLUMN_ALIASES.items()}
+    plan["raw"]["id"] = plan["id"]
+    return plan
+
+def probe_schema(db_path: Optional[Path | str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find the table holding scan records and the SQL expression for each field
+    the pages read (input, type, risk, summary, timestamp, details).
+    Probed once per DB file and cached by file identity (inode + mtime).
+    Returns None if the DB does not exist or holds no known table.
+    """
+    dbp = Path(db_path) if db_path is not None else get_db_path()
+    ident = _file_identity(dbp)
+    if ident is None:
+        return None
+    if ident in _SCHEMA_CACHE:
+        return _SCHEMA_CACHE[ident]
+    conn = sqlite3.connect(str(dbp))
+    try:
+        plan = _probe(conn)
+    except sqlite3.Error:
+        plan = None
+    finally:
+        conn.close()
+    # drop entries for older versions of the same file
+    for k in [k for k in _SCHEMA_CACHE if k[0] == ident[0]]:
+        del _SCHEMA_CACHE[k]
+    _SCHEMA_CACHE[ident] = plan
+    return plan
+
+def list_scan_choices(limit: int = 200, db_path: Optional[Path | str] = None) -> List[Dict[str, Any]]:
+    """
+    Return [{"id", "input"}] for the most recent scans - just what a picker needs.
+    Use get_scan_detail() for the full record of the chosen scan.
+    """
+    plan = probe_schema(db_path)
+    if not plan:
+        return []
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            f"SELECT {plan['id']} AS id, {plan['input']} AS input "
+            f"FROM {plan['table']} ORDER BY {plan['id']} DESC LIMIT ?",
+            (int(limit),),
+        )
+        return [{"id": r["id"], "input": r["input"] or ""} for r in cur.fetchall()]
+    except sqlite3.Error as exc:
+        print(f"list_scan_choices error: {exc}", file=sys.stderr)
+        return []
+    finally:
+        conn.close()
+
+def get_scan_detail(scan_id: int, db_path: Optional[Path | str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return one scan in the same shape as get_scan(), reading whichever table and
+    columns probe_schema() found. Only this call parses the vt_details blob.
+    """
+    plan = probe_schema(db_path)
+    if not plan:
+        return None
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            f"SELECT {plan['id']} AS id, {plan['input']} AS input, {plan['type']} AS type, "
+            f"{plan['risk']} AS risk, {plan['summary']} AS summary, "
+            f"{plan['timestamp']} AS timestamp, {plan['details']} AS vt_details "
+            f"FROM {plan['table']} WHERE {plan['id']} = ? LIMIT 1",
+            (int(scan_id),),
+        )
+        r = cur.fetchone()
+    except sqlite3.Error as exc:
+        print(f"get_scan_detail error: {exc}", file=sys.stderr)
+        return None
+    finally:
+        conn.close()
+    if not r:
+        return None
+    vt = None
+    try:
+        vt = json.loads(r["vt_details"]) if r["vt_details"] else None
+    except Exception:
+        vt = None
+    return {
+        "id": r["id"],
+        "input": r["input"] or "",
+        "type": r["type"] or "",
+        "risk": r["risk"] or "",
+        "summary": r["summary"] or "",
+        "timestamp": r["timestamp"] or "",
+        "vt_details": vt
+    }
+
+# ---------- filtered / sorted / paged history ---------------------------
+
+# sort keys accepted by query_scans()
+SORT_KEYS = ("id", "timestamp", "risk", "type", "input")
+
+def _history_filters(
+    plan: Dict[str, Any],
+    scan_types: Optional[List[str]] = None,
+    risks: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    search: Optional[str] = None,
+) -> tuple:
+    """WHERE clause + params for the History filters; fields missing from the schema are ignored."""
+    raw = plan["raw"]
+    where: List[str] = []
+    params: List[Any] = []
+    if scan_types and raw.get("type"):
+        where.append(f"{raw['type']} IN ({', '.join('?' * len(scan_types))})")
+        params += list(scan_types)
+    if risks and raw.get("risk"):
+        where.append(f"{raw['risk']} IN ({', '.join('?' * len(risks))})")
+        params += list(risks)
+    if since and raw.get("timestamp"):
+        where.append(f"{raw['timestamp']} >= ?")
+        params.append(str(since))
+    if until and raw.get("timestamp"):
+        # inclusive end date: everything before the start of the next day
+        where.append(f"{raw['timestamp']} < date(?, '+1 day')")
+        params.append(str(until))
+    if search and raw.get("input"):
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where.append(f"{raw['input']} LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+def query_scans(
+    scan_types: Optional[List[str]] = None,
+    risks: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    search: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = True,
+    limit: int = 50,
+    offset: int = 0,
+    db_path: Optional[Path | str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One page of scans matching the filters, filtered, sorted and paged in SQL.
+    Rows carry id, input, type, risk, summary, timestamp (no vt_details - use
+    get_scan() for the full record). since/until are "YYYY-MM-DD" (inclusive).
+    """
+    plan = probe_schema(db_path)
+    if not plan:
+        return []
+    where, params = _history_filters(plan, scan_types, risks, since, until, search)
+    order_col = plan["raw"].get(sort if sort in SORT_KEYS else "id") or plan["id"]
+    if sort == "risk" and plan["raw"].get("risk"):
+        # severity order rather than alphabetical
+        order_col = f"CASE {order_col} WHEN 'High' THEN 3 WHEN 'Medium' THEN 2 WHEN 'Low' THEN 1 ELSE 0 END"
+    direction = "DESC" if descending else "ASC"
+    sql = (
+        f"SELECT {plan['id']} AS id, {plan['input']} AS input, {plan['type']} AS type, "
+        f"{plan['risk']} AS risk, {plan['summary']} AS summary, {plan['timestamp']} AS timestamp "
+        f"FROM {plan['table']}{where} "
+        f"ORDER BY {order_col} {direction}, {plan['id']} {direction} LIMIT ? OFFSET ?"
+    )
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(sql, (*params, int(limit), max(0, int(offset))))
+        return [
+            {
+                "id": r["id"],
+                "input": r["input"] or "",
+                "type": r["type"] or "",
+                "risk": r["risk"] or "",
+                "summary": r["summary"] or "",
+                "timestamp": r["timestamp"] or "",
+            }
+            for r in cur.fetchall()
+        ]
+    except sqlite3.Error as exc:
+        print(f"query_scans error: {exc}", file=sys.stderr)
+        return []
+    finally:
+        conn.close()
+
+def count_scans(
+    scan_types: Optional[List[str]] = None,
+    risks: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    search: Optional[str] = None,
+    db_path: Optional[Path | str] = None,
+) -> int:
+    """Number of scans matching the same filters as query_scans()."""
+    plan = probe_schema(db_path)
+    if not plan:
+        return 0
+    where, params = _history_filters(plan, scan_types, risks, since, until, search)
+    conn = _connect(db_path)
+    try:
+        return int(conn.execute(f"SELECT COUNT(*) FROM {plan['table']}{where}", params).fetchone()[0])
+    except sqlite3.Error as exc:
+        print(f"count_scans error: {exc}", file=sys.stderr)
+        return 0
+    finally:
+        conn.close()
+
+def scan_facets(db_path: Optional[Path | str] = None) -> Dict[str, List[str]]:
+    """Distinct scan types and risk values, for filter widgets."""
+    plan = probe_schema(db_path)
+    out: Dict[str, List[str]] = {"types": [], "risks": []}
+    if not plan:
+        return out
+    conn = _connect(db_path)
+    try:
+        for key, field in (("types", "type"), ("risks", "risk")):
+            col = plan["raw"].get(field)
+            if col:
+                cur = conn.execute(f"SELECT DISTINCT {col} FROM {plan['table']} WHERE {col} IS NOT NULL AND {col} != '' ORDER BY 1")
+                out[key] = [str(r[0]) for r in cur.fetchall()]
+    except sqlite3.Error as exc:
+        print(f"scan_facets error: {exc}", file=sys.stderr)
+    finally:
+        conn.close()
+    return out
+
 # ---------- convenience / aliases --------------------------------------
 
 def get_scans(limit: int = 200, db_path: Optional[Path | str] = None) -> List[Dict[str, Any]]:
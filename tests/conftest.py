@@ -0,0 +1,34 @@
+# tests/conftest.py
+"""Shared fixtures: project root on sys.path, mock providers, a throwaway database."""
+from __future__ import annotations
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("MOCK_MODE", "true")
+os.environ.setdefault("VIRUSTOTAL_API_KEY", "test-key-0000000000000000000000000000")
+os.environ.setdefault("VL_PRERENDER_REPORTS", "false")
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fresh database file used as the app database for this test."""
+    from scan import init_db
+    path = tmp_path / "viruslens.db"
+    monkeypatch.setenv("VL_DB_FILE", str(path))
+    init_db(str(path))
+    return str(path)
+
+@pytest.fixture(autouse=True)
+def no_threat_feed(monkeypatch):
+    """Tests see no threat feed unless they build one."""
+    from app.utils import threat_feed
+    monkeypatch.setenv("VL_THREAT_FEED", "off")
+    threat_feed.reset_feed()
+    yield
+    threat_feed.reset_feed()
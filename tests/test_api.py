@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # fastapi.testclient needs it
+
+from fastapi.testclient import TestClient
+
+from app.api import app
+
+@pytest.fixture
+def client(db_path):
+    with TestClient(app) as c:  # runs the lifespan: init_db, init_jobs, the job runner
+        yield c
+
+def test_health_needs_no_key(client, monkeypatch):
+    monkeypatch.setenv("VL_API_KEY", "secret")
+    r = client.get("/health")
+    assert r.status_code == 200 and r.json()["status"] == "ok"
+    assert client.get("/history").status_code == 401
+    assert client.get("/history", headers={"X-API-Key": "secret"}).status_code == 200
+
+def test_scan_saves_to_history(client):
+    r = client.post("/scan", json={"ioc": " https://a.example/ "})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["overall_risk"] and body["scan_id"]
+    assert client.get(f"/history/{body['scan_id']}").status_code == 200
+    assert client.post("/scan", json={"ioc": "https://b.example/", "save": False}).json()["scan_id"] is None
+
+@pytest.mark.parametrize("payload", [
+    {"ioc": "example.org"},                         # not a URL or hash: no engine scans it
+    {"ioc": "10.0.0.1"},
+    {"ioc": "https://a.example/", "type": "domain"},
+])
+def test_scan_rejects_iocs_no_engine_scans(client, payload):
+    assert client.post("/scan", json=payload).status_code == 422
+
+def test_job_runs_to_done(client):
+    r = client.post("/jobs", json={"items": [{"input": "https://a.example/"}, {"input": "https://b.example/"}]})
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    deadline = time.monotonic() + 10
+    while (job := client.get(f"/jobs/{job_id}").json())["status"] not in ("done", "cancelled"):
+        assert time.monotonic() < deadline, job
+        time.sleep(0.05)
+    assert job["status"] == "done" and job["completed"] == 2
+    items = client.get(f"/jobs/{job_id}/items", params={"include_result": True}).json()["items"]
+    assert [i["input"] for i in items] == ["https://a.example/", "https://b.example/"]
+    assert all(i["scan_id"] for i in items)
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.delete("/jobs/nope").status_code == 404
+
+def test_scan_stream_sends_engine_events_then_the_result(client):
+    r = client.get("/scan/stream", params={"ioc": "https://a.example/", "format": "ndjson"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in r.text.splitlines() if line]
+    assert [e["event"] for e in events[:-1]] == ["engine"] * (len(events) - 1) and len(events) > 1
+    assert all("overall_risk_so_far" in e for e in events[:-1])
+    result = events[-1]
+    assert result["event"] == "result" and result["overall_risk"] and result["scan_id"]
+
+def test_scan_stream_sse_framing(client):
+    r = client.get("/scan/stream", params={"ioc": "https://a.example/", "save": False})
+    assert r.headers["content-type"].startswith("text/event-stream")
+    blocks = [b for b in r.text.split("\n\n") if b]
+    assert blocks[0].startswith("event: engine\ndata: ")
+    assert blocks[-1].startswith("event: result\ndata: ")
+    assert json.loads(blocks[-1].split("data: ", 1)[1])["scan_id"] is None
+    assert client.get("/scan/stream", params={"ioc": "example.org"}).status_code == 422
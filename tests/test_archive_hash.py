@@ -0,0 +1,71 @@
+import io
+import hashlib
+import tarfile
+import zipfile
+
+import pytest
+
+from app.utils import archive_hash
+from app.utils.archive_hash import bulk_rows, hash_paths, hash_uploads
+
+FILES = {"a.bin": b"alpha" * 1000, "dir/b.bin": b"bravo" * 3000, "c.txt": b"charlie"}
+
+def _zip() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in FILES.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+def _tar(mode: str = "w") -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode) as tf:
+        for name, data in FILES.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+def _digests(entries):
+    return {e["name"].split("/", 1)[1]: e["sha256"] for e in entries}
+
+WANT = {name: hashlib.sha256(data).hexdigest() for name, data in FILES.items()}
+
+@pytest.mark.parametrize("name,blob", [("s.zip", _zip()), ("s.tar", _tar()), ("s.tgz", _tar("w:gz"))])
+def test_archive_members_are_hashed(name, blob):
+    entries = hash_uploads([(name, blob)])
+    assert _digests(entries) == WANT
+    assert {r["label"] for r in bulk_rows(entries)} == {f"{name}/{n}" for n in FILES}
+
+def test_plain_upload_is_one_entry():
+    [entry] = hash_uploads([("x.exe", b"MZ" + b"\0" * 100)])
+    assert entry["sha256"] == hashlib.sha256(b"MZ" + b"\0" * 100).hexdigest()
+    assert entry["md5"] == hashlib.md5(b"MZ" + b"\0" * 100).hexdigest()
+
+def test_corrupt_zip_member_is_reported_not_raised():
+    blob = bytearray(_zip())
+    # damage the deflate stream of the first member (just past its local header and name)
+    start = 30 + len("a.bin")
+    blob[start:start + 20] = b"\xff" * 20
+    entries = hash_uploads([("bad.zip", bytes(blob))])
+    errors = [e for e in entries if "error" in e]
+    assert [e["name"] for e in errors] == ["bad.zip/a.bin"]
+    assert {e["name"] for e in entries if "sha256" in e} == {"bad.zip/dir/b.bin", "bad.zip/c.txt"}
+
+def test_truncated_compressed_tar_keeps_what_was_read():
+    blob = _tar("w:gz")
+    entries = hash_uploads([("cut.tgz", blob[: len(blob) // 2])])
+    assert any("error" in e for e in entries)
+    assert bulk_rows(entries) == [r for r in bulk_rows(entries) if r["input"] in WANT.values()]
+
+def test_truncated_plain_tar_is_reported(tmp_path):
+    path = tmp_path / "cut.tar"
+    path.write_bytes(_tar()[:1024 + 100])  # first header and part of its data
+    entries = hash_paths([path])
+    assert entries and all("error" in e or "sha256" in e for e in entries)
+
+def test_process_pool_path(monkeypatch):
+    monkeypatch.setattr(archive_hash, "INLINE_BYTES", 0)
+    entries = hash_uploads([("s.zip", _zip()), ("s.tar", _tar())], workers=2)
+    assert len(entries) == 2 * len(FILES)
+    assert all("sha256" in e for e in entries)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from app.utils.bulk_plan import NEAR_KEY, plan_bulk
+from app.utils.engines import aggregate_scan
+from app.utils.scan_results import save_result
+
+def _rows(*iocs):
+    return [{"input": i, "type": None} for i in iocs]
+
+def _inputs(groups):
+    return [[r["input"] for r in g] for g in groups]
+
+def test_identical_iocs_share_one_scan():
+    plan = plan_bulk(_rows("https://a.example/x?utm_source=mail", "https://a.example/x", "", "https://b.example/"),
+                     cluster=False)
+    assert plan.to_scan == 2 and plan.duplicates == 1
+    assert ["https://a.example/x?utm_source=mail", "https://a.example/x"] in _inputs(plan.groups)
+    assert [r["overall_risk"] for r in plan.offline] == ["N/A"]
+
+def test_near_duplicates_fold_into_one_representative():
+    plan = plan_bulk(_rows("https://p.test/u/123/reset", "https://p.test/u/456/reset", "https://p.test/about"),
+                     cluster=True)
+    assert plan.to_scan == 2 and plan.near_duplicates == 1
+    folded = next(g for g in plan.groups if len(g) == 2)
+    assert folded[1][NEAR_KEY] == "https://p.test/u/123/reset"
+    assert len(plan.prescores) == len(plan.groups)
+
+def test_domain_sharing_sees_urls_before_clustering():
+    urls = [f"https://shop.example.com/item/{n}" for n in range(1, 7)]
+    plan = plan_bulk(_rows(*urls, "https://other.example/"), share_domains=True, cluster=True)
+    assert len(plan.shares) == 1
+    share = plan.shares[0]
+    assert share.domain == "example.com"
+    assert len(share.samples) == 2 and len(share.inferred) == 4
+    assert _inputs(plan.groups) == [["https://other.example/"]]
+    assert plan.to_scan == 3
+
+def test_small_domains_are_not_shared():
+    plan = plan_bulk(_rows("https://a.example/1x", "https://a.example/2y"), share_domains=True, cluster=False)
+    assert plan.shares == [] and plan.to_scan == 2
+
+def test_history_answers_only_with_use_cache(db_path):
+    ioc = "https://seen.example/"
+    save_result(aggregate_scan(ioc, "url"), ioc, db_path=db_path, prerender=False)
+    rows = _rows(ioc, "https://new.example/")
+
+    plan = plan_bulk(rows)
+    assert plan.to_scan == 2 and plan.offline == []
+
+    plan = plan_bulk(rows, use_cache=True)
+    assert _inputs(plan.groups) == [["https://new.example/"]]
+    assert [(r["input"], bool(r["cached"])) for r in plan.offline] == [(ioc, True)]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from app import cli
+from scan import count_scans
+
+def _run(argv):
+    out, err = io.StringIO(), io.StringIO()
+    status = cli.run(cli.build_parser().parse_args(argv), out=out, err=err)
+    return status, [json.loads(line) for line in out.getvalue().splitlines()], err.getvalue()
+
+@pytest.fixture
+def iocs(tmp_path):
+    path = tmp_path / "iocs.txt"
+    path.write_text("# feed\nhttps://a.example/\n\nhttps://b.example/x\nhttps://c.example/y\n", encoding="utf-8")
+    return path
+
+def test_scans_saves_and_checkpoints(iocs, db_path, tmp_path):
+    ckpt = tmp_path / "run.ckpt"
+    status, records, _ = _run([str(iocs), "--db", db_path, "--checkpoint", str(ckpt), "-q"])
+    assert status == 0
+    assert sorted(r["index"] for r in records) == [0, 1, 2]
+    assert all(r["overall_risk"] for r in records)
+    assert count_scans(db_path=db_path) == 3
+    assert json.loads(ckpt.read_text())["done_below"] == 3
+
+    status, records, err = _run([str(iocs), "--db", db_path, "--checkpoint", str(ckpt), "--resume"])
+    assert status == 0 and records == []
+    assert "skipped 3" in err
+    assert count_scans(db_path=db_path) == 3
+
+def test_engine_errors_are_failures_and_retried_on_resume(iocs, db_path, tmp_path, monkeypatch):
+    real = cli.scan_one
+
+    def flaky(ioc, ioc_type=None):
+        res = real(ioc, ioc_type)
+        if "b.example" in ioc:
+            res["engines"] = [{"engine": "VirusTotal", "summary": {"error": "429 Too Many Requests"}}]
+        return res
+
+    ckpt = tmp_path / "run.ckpt"
+    monkeypatch.setattr(cli, "scan_one", flaky)
+    status, records, _ = _run([str(iocs), "--db", db_path, "--checkpoint", str(ckpt), "-q"])
+    assert status == 1
+    failed = [r for r in records if "error" in r]
+    assert [(r["index"], r["error"]) for r in failed] == [(1, "VirusTotal: 429 Too Many Requests")]
+    assert count_scans(db_path=db_path) == 2
+    state = json.loads(ckpt.read_text())
+    assert state["done_below"] == 1 and state["done"] == [2]
+
+    monkeypatch.setattr(cli, "scan_one", real)
+    status, records, _ = _run([str(iocs), "--db", db_path, "--checkpoint", str(ckpt), "--resume", "-q"])
+    assert status == 0
+    assert [r["index"] for r in records] == [1]
+    assert count_scans(db_path=db_path) == 3
+
+def test_resume_refuses_other_inputs(iocs, tmp_path):
+    ckpt = tmp_path / "run.ckpt"
+    assert _run([str(iocs), "--no-save", "--checkpoint", str(ckpt), "-q"])[0] == 0
+    other = tmp_path / "other.txt"
+    other.write_text("https://d.example/\n", encoding="utf-8")
+    status, records, err = _run([str(other), "--no-save", "--checkpoint", str(ckpt), "--resume"])
+    assert status == 2 and records == []
+    assert "different inputs" in err
+
+def test_missing_input_file_exits_2(tmp_path):
+    status, records, err = _run([str(tmp_path / "nope.txt"), "--no-save"])
+    assert status == 2 and records == []
+    assert err.startswith("error: cannot read")
+
+def test_unscannable_lines_fail_instead_of_scoring_low(tmp_path):
+    path = tmp_path / "mixed.txt"
+    path.write_text("https://a.example/\nexample.org\n10.0.0.1\n", encoding="utf-8")
+    status, records, _ = _run([str(path), "--no-save", "-q"])
+    assert status == 1
+    by_index = {r["index"]: r for r in records}
+    assert by_index[0]["overall_risk"]
+    assert "no engine scans" in by_index[1]["error"] and "no engine scans" in by_index[2]["error"]
+
+def test_type_choices_are_scannable_types():
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args(["-t", "domain"])
+
+@pytest.mark.parametrize("inputs", [[], ["-"]])
+def test_checkpoint_refuses_stdin(inputs, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        cli.main([*inputs, "--no-save", "--checkpoint", str(tmp_path / "run.ckpt")])
+    assert exc.value.code == 2 and "not stdin" in capsys.readouterr().err
+    assert not (tmp_path / "run.ckpt").exists()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import pytest
+
+from app.utils import engines
+from scan import count_scans
+from viruslens.client import Client, ScanError, is_retriable
+
+@pytest.mark.parametrize("error, retriable", [
+    ("status 429", True),
+    ("status 503", True),
+    ("status 404", False),
+    ("503 Server Error: Service Unavailable for url: https://vt.example/", True),
+    ("429 Client Error: Too Many Requests for url: https://vt.example/", True),
+    ("401 Client Error: Unauthorized for url: https://vt.example/", False),
+    ("403 Client Error: Forbidden for url: https://vt.example/", False),
+    ("Hash not found", False),
+    ("HTTPSConnectionPool(host='vt.example', port=443): Read timed out.", True),
+])
+def test_is_retriable(error, retriable):
+    assert is_retriable(error) is retriable
+
+@pytest.fixture
+def failing_vt(monkeypatch):
+    """VirusTotal fails once with the given error; retries succeed. Returns the retry call count."""
+    state = {"error": "", "calls": 0}
+
+    def first_pass(ioc, ioc_type=None):
+        yield {"engine": "VirusTotal", "summary": {"error": state["error"]}}
+
+    def retry():
+        state["calls"] += 1
+        return {"engine": "VirusTotal", "summary": {"malicious": 2}}
+
+    monkeypatch.setattr(engines, "iter_scan", first_pass)
+    monkeypatch.setattr(engines, "planned_engines", lambda ioc, t: [("VirusTotal", retry)])
+    return state
+
+def test_transient_errors_are_retried(db_path, failing_vt):
+    failing_vt["error"] = "503 Server Error: Service Unavailable for url: https://vt.example/"
+    with Client(db_path=db_path, backoff=0, save=False) as vl:
+        res = vl.scan("https://a.example/")
+    assert failing_vt["calls"] == 1
+    assert res["overall_risk"] == "High"
+
+def test_permanent_errors_are_not_retried_saved_or_cached(db_path, failing_vt):
+    failing_vt["error"] = "401 Client Error: Unauthorized for url: https://vt.example/"
+    with Client(db_path=db_path, backoff=0) as vl:
+        with pytest.raises(ScanError, match="401 Client Error"):
+            vl.scan("https://a.example/")
+        assert vl.lookup_cached(["https://a.example/"]) == {"https://a.example/": None}
+    assert failing_vt["calls"] == 0
+    assert count_scans(db_path=db_path) == 0
+
+def test_errors_left_after_retries_are_not_a_verdict(db_path, monkeypatch):
+    def always_429(ioc, ioc_type=None):
+        yield {"engine": "VirusTotal", "summary": {"error": "status 429"}}
+
+    monkeypatch.setattr(engines, "iter_scan", always_429)
+    monkeypatch.setattr(engines, "_run_engine", lambda name, call: {"engine": name, "summary": {"error": "status 429"}})
+    with Client(db_path=db_path, backoff=0, retries=2) as vl:
+        results = list(vl.scan_many(["https://a.example/"]))
+        assert results == [{"input": "https://a.example/", "error": "VirusTotal: status 429"}]
+        assert vl.lookup_cached(["https://a.example/"])["https://a.example/"] is None
+    assert count_scans(db_path=db_path) == 0
+
+def test_unscannable_iocs_are_rejected(db_path):
+    with Client(db_path=db_path) as vl:
+        with pytest.raises(ScanError, match="no engine scans"):
+            vl.scan("example.org")
+        assert [r["input"] for r in vl.scan_many(["10.0.0.1"]) if "error" in r] == ["10.0.0.1"]
+    assert count_scans(db_path=db_path) == 0
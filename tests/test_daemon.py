@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from app.daemon import LookupService
+from scan import count_scans
+
+URL = "https://a.example/"
+
+def _scan_result(ioc, ioc_type=None, error=None):
+    summary = {"error": error} if error else {"malicious": 1}
+    return {"input": ioc, "type": ioc_type or "url", "overall_risk": "Low" if error else "High",
+            "engines": [{"engine": "VirusTotal", "summary": summary}]}
+
+@pytest.fixture
+def service(db_path):
+    svc = LookupService(db_path, workers=2)
+    yield svc
+    svc.pool.shutdown(wait=True)
+
+def _handle(svc, request):
+    return asyncio.run(svc.handle(request if isinstance(request, str) else json.dumps(request)))
+
+def test_errored_scans_are_reported_not_cached(service, db_path, monkeypatch):
+    monkeypatch.setattr("app.utils.engines.aggregate_scan", lambda ioc, t=None: _scan_result(ioc, t, "status 429"))
+    resp = _handle(service, {"id": 1, "iocs": [URL], "scan": True})
+    assert resp["ok"] and resp["results"] == [
+        {"ioc": URL, "type": "url", "overall_risk": None, "error": "VirusTotal: status 429"}]
+    assert count_scans(db_path=db_path) == 0
+    assert _handle(service, URL)["overall_risk"] is None  # still unknown, not a cached "Low"
+
+def test_plain_line_lookup(service, db_path):
+    from app.utils.scan_results import save_result
+    scan_id = save_result(_scan_result(URL), db_path=db_path, prerender=False)
+    service.cache.refresh(force=True)
+    hit = _handle(service, URL + "\n")
+    assert (hit["ioc"], hit["overall_risk"], hit["scan_id"]) == (URL, "High", scan_id)
+    assert _handle(service, "https://other.example/") == {"ioc": "https://other.example/", "type": "url", "overall_risk": None}
+
+def test_batched_lookup_scans_misses_live(service, db_path, monkeypatch):
+    monkeypatch.setattr("app.utils.engines.aggregate_scan", lambda ioc, t=None: _scan_result(ioc, t))
+    resp = _handle(service, {"id": 7, "iocs": [URL, "not an ioc"], "scan": True})
+    assert resp["id"] == 7 and resp["ok"]
+    scanned, unknown = resp["results"]
+    assert (scanned["overall_risk"], scanned["source"]) == ("High", "scan")
+    assert (unknown["type"], unknown["overall_risk"]) == ("unknown", None)
+    assert count_scans(db_path=db_path) == 1
+    assert _handle(service, URL)["overall_risk"] == "High"
+
+def test_async_scan_answers_pending(service, monkeypatch):
+    import threading
+    release = threading.Event()
+
+    def slow(ioc, t=None):
+        release.wait(5)
+        return _scan_result(ioc, t)
+
+    monkeypatch.setattr("app.utils.engines.aggregate_scan", slow)
+    resp = _handle(service, {"id": 1, "iocs": [URL], "scan": "async"})
+    assert resp["results"][0]["overall_risk"] == "pending"
+    assert _handle(service, URL)["overall_risk"] == "pending"
+    release.set()
+    service.pool.shutdown(wait=True)
+    assert _handle(service, URL)["overall_risk"] == "High"
+
+def test_bad_requests(service):
+    assert _handle(service, "{nope")["ok"] is False
+    assert _handle(service, {"id": 1, "op": "frobnicate"})["error"] == "unknown op 'frobnicate'"
+    assert _handle(service, {"id": 2, "iocs": "x"})["ok"] is False
+    assert _handle(service, {"id": 3, "op": "ping"}) == {"id": 3, "ok": True}
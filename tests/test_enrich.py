@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.enrich import PENDING, MissScanner, enrich_batch
+from app.utils.result_cache import ResultCache
+from app.utils.scan_results import save_result
+from scan import count_scans
+
+KNOWN = "https://known.example/"
+NEW = "https://new.example/"
+
+def _res(ioc, ioc_type="url", risk="High", error=None):
+    summary = {"error": error} if error else {"malicious": 1 if risk == "High" else 0}
+    return {"input": ioc, "type": ioc_type, "overall_risk": "Low" if error else risk,
+            "engines": [{"engine": "VirusTotal", "summary": summary}]}
+
+@pytest.fixture
+def cache(db_path):
+    save_result(_res(KNOWN, risk="Medium"), db_path=db_path, prerender=False)
+    c = ResultCache(db_path, refresh_seconds=float("inf"))
+    c.refresh(force=True)
+    return c
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Stubbed aggregate_scan; maps ioc -> error message for the scans that should fail."""
+    errors = {}
+    monkeypatch.setattr("app.utils.engines.aggregate_scan", lambda ioc, t=None: _res(ioc, t, error=errors.get(ioc)))
+    return errors
+
+def _events(ndjson):
+    return [json.loads(line) for line in ndjson.splitlines()]
+
+def test_hits_are_annotated_without_scanning(cache):
+    batch = [("proxy.log", f"GET {KNOWN} 200"), ("app.json", json.dumps({"msg": "no iocs"}))]
+    hit, plain = _events(enrich_batch(batch, cache, scanner=None))
+    assert hit["source"] == "proxy.log" and hit["message"] == f"GET {KNOWN} 200"
+    assert hit["viruslens"]["overall_risk"] == "Medium"
+    assert hit["viruslens"]["iocs"][0]["scan_id"] is not None
+    assert plain == {"msg": "no iocs"}
+    assert _events(enrich_batch(batch, cache, scanner=None, only_matches=True)) == [hit]
+
+def test_misses_are_pending_then_answered_and_saved(cache, db_path, scans):
+    scanner = MissScanner(cache, workers=1, db_path=db_path)
+    line = json.dumps({"url": NEW, "also": KNOWN})
+    event, = _events(enrich_batch([("app.json", line)], cache, scanner))
+    assert event["url"] == NEW
+    assert event["viruslens"]["overall_risk"] == "Medium"  # the worst known verdict so far
+    assert [i["overall_risk"] for i in event["viruslens"]["iocs"]] == [PENDING, "Medium"]
+    scanner.close()
+    assert scanner.scanned == 1
+    assert count_scans(db_path=db_path) == 2
+    event, = _events(enrich_batch([("app.json", line)], cache, scanner=None))
+    assert event["viruslens"]["overall_risk"] == "High"
+
+def test_errored_scans_stay_pending_and_are_retried(cache, db_path, scans):
+    scans[NEW] = "status 429"
+    scanner = MissScanner(cache, workers=1, db_path=db_path)
+    enrich_batch([("s", NEW)], cache, scanner)
+    scanner.pool.shutdown(wait=True)
+    scanner.flush()
+    assert scanner.scanned == 0 and scanner.pending == set()
+    assert count_scans(db_path=db_path) == 1  # only the seeded scan
+    event, = _events(enrich_batch([("s", NEW)], cache, scanner=None))
+    assert event["viruslens"]["overall_risk"] == PENDING
+
+    scanner = MissScanner(cache, workers=1, db_path=db_path)
+    del scans[NEW]
+    assert scanner.submit(("url", NEW))
+    scanner.close()
+    assert cache.lookup("url", NEW).overall_risk == "High"
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import csv
+import io
+
+from app.utils.export import iter_export, iter_scan_batches
+from app.utils.scan_results import SUMMARY_LIMIT, save_result, summarize_engines
+from scan import record_search
+
+def _rows(db_path):
+    return [r for batch in iter_scan_batches(db_path) for r in batch]
+
+def test_engine_columns_survive_a_truncated_summary(db_path):
+    res = {
+        "input": "https://shop.example.com/a", "type": "url", "overall_risk": "High",
+        "engines": [
+            {"engine": "Domain samples", "summary": {"sampled": [f"https://shop.example.com/{n}" for n in range(100)]}},
+            {"engine": "VirusTotal", "summary": {"malicious": 3, "suspicious": 1, "harmless": 60}},
+            {"engine": "AlienVault OTX", "summary": {"pulses": 2, "malicious": 1}},
+        ],
+    }
+    assert len(summarize_engines(res)) == SUMMARY_LIMIT  # VirusTotal is cut off the display text
+    save_result(res, db_path=db_path, prerender=False)
+    row = _rows(db_path)[0]
+    assert (row["vt_malicious"], row["vt_suspicious"], row["vt_harmless"]) == (3, 1, 60)
+    assert (row["otx_pulses"], row["otx_malicious"]) == (2, 1)
+
+def test_older_scans_fall_back_to_the_summary_text(db_path):
+    record_search("url", "https://old.example/", summary='VirusTotal: {"malicious": 2, "harmless": 5}',
+                  risk_score="High", db_path=db_path)
+    row = _rows(db_path)[0]
+    assert (row["vt_malicious"], row["vt_harmless"]) == (2, 5)
+
+def test_csv_export_has_a_header_and_one_line_per_scan(db_path):
+    for n in range(3):
+        record_search("url", f"https://e{n}.example/", summary="", risk_score="Low", db_path=db_path)
+    text = b"".join(iter_export("csv", db_path=db_path, batch_size=2)).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [r["input"] for r in rows] == [f"https://e{n}.example/" for n in range(3)]
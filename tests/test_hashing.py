@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import hashlib
+import io
+
+from app.utils.hashing import hash_file, hash_stream
+
+DATA = bytes(range(256)) * 1000  # 256 KB, several chunks at the sizes below
+
+class _ReadOnly:
+    """A file object without readinto(), like some upload wrappers."""
+
+    def __init__(self, data: bytes):
+        self._fh = io.BytesIO(data)
+
+    def read(self, n: int = -1) -> bytes:
+        return self._fh.read(n)
+
+def _expected(data: bytes):
+    return (hashlib.md5(data).hexdigest(), hashlib.sha1(data).hexdigest(), hashlib.sha256(data).hexdigest(), len(data))
+
+def test_digests_match_hashlib_across_chunks():
+    d = hash_stream(io.BytesIO(DATA), chunk_size=64 * 1024 + 1)
+    assert (d.md5, d.sha1, d.sha256, d.size) == _expected(DATA)
+
+def test_plain_read_objects_and_files(tmp_path):
+    d = hash_stream(_ReadOnly(DATA), chunk_size=100_000)
+    assert (d.md5, d.sha1, d.sha256, d.size) == _expected(DATA)
+    path = tmp_path / "sample.bin"
+    path.write_bytes(DATA)
+    assert hash_file(path) == d
+
+def test_empty_input_and_label():
+    d = hash_stream(io.BytesIO(b""))
+    assert d.size == 0 and d.sha256 == hashlib.sha256(b"").hexdigest()
+    assert d.label("a.exe") == f"a.exe (SHA256: {d.sha256}, SHA1: {d.sha1}, MD5: {d.md5})"
+    assert d.label() == f"SHA256: {d.sha256}, SHA1: {d.sha1}, MD5: {d.md5}"
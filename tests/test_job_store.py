@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import pytest
+
+from app.utils import job_store, prerender
+from app.utils.job_store import cancel_job, claim_item, create_job, get_job, init_jobs, job_items, run_item
+
+@pytest.fixture
+def jobs_db(db_path):
+    init_jobs(db_path)
+    return db_path
+
+def test_job_runs_to_done_without_prerendering(jobs_db, monkeypatch):
+    queued = []
+    monkeypatch.setattr(prerender, "queue_report", lambda *a, **k: queued.append(a))
+    job_id = create_job([{"input": "https://a.example/"}, {"input": "  "}, {"input": "https://b.example/"}], db_path=jobs_db)
+    assert get_job(job_id, db_path=jobs_db)["status"] == job_store.QUEUED
+    while (item := claim_item(db_path=jobs_db)) is not None:
+        run_item(item, db_path=jobs_db)
+    job = get_job(job_id, db_path=jobs_db)
+    assert job["status"] == job_store.DONE and job["completed"] == 3
+    items = job_items(job_id, db_path=jobs_db)
+    assert [i["input"] for i in items] == ["https://a.example/", "", "https://b.example/"]
+    assert items[0]["scan_id"] and items[0]["overall_risk"]
+    assert queued == []
+
+def test_scan_errors_are_recorded_on_the_item(jobs_db, monkeypatch):
+    def boom(ioc, ioc_type=None):
+        raise RuntimeError("provider down")
+    monkeypatch.setattr("app.utils.engines.aggregate_scan", boom)
+    job_id = create_job([{"input": "https://a.example/"}], db_path=jobs_db)
+    run_item(claim_item(db_path=jobs_db), db_path=jobs_db)
+    item = job_items(job_id, db_path=jobs_db)[0]
+    assert item["status"] == job_store.FAILED and item["error"] == "provider down"
+
+def test_cancel_drops_queued_items(jobs_db):
+    job_id = create_job([{"input": "https://a.example/"}, {"input": "https://b.example/"}], db_path=jobs_db)
+    claimed = claim_item(db_path=jobs_db)
+    assert cancel_job(job_id, db_path=jobs_db)
+    assert claim_item(db_path=jobs_db) is None
+    counts = get_job(job_id, db_path=jobs_db)["counts"]
+    assert counts == {job_store.RUNNING: 1, job_store.CANCELLED: 1}
+    assert claimed["idx"] == 0
+    assert not cancel_job("missing", db_path=jobs_db)
+
+def _expire_leases(db_path):
+    conn = job_store._connect(db_path)
+    with conn:
+        conn.execute("UPDATE api_job_items SET lease_until = 0 WHERE status = ?", (job_store.RUNNING,))
+    conn.close()
+
+def test_expired_leases_are_claimed_again(jobs_db):
+    job_id = create_job([{"input": "https://a.example/"}], db_path=jobs_db)
+    first = claim_item(db_path=jobs_db)
+    assert claim_item(db_path=jobs_db) is None  # leased to the first worker
+    _expire_leases(jobs_db)  # that worker died
+    again = claim_item(db_path=jobs_db)
+    assert (again["job_id"], again["idx"]) == (first["job_id"], first["idx"])
+    run_item(again, db_path=jobs_db)
+    assert get_job(job_id, db_path=jobs_db)["status"] == job_store.DONE
+
+def test_cancel_while_an_item_runs_keeps_the_job_cancelled(jobs_db):
+    job_id = create_job([{"input": "https://a.example/"}, {"input": "https://b.example/"}], db_path=jobs_db)
+    running = claim_item(db_path=jobs_db)
+    cancel_job(job_id, db_path=jobs_db)
+    run_item(running, db_path=jobs_db)  # the running item still finishes
+    job = get_job(job_id, db_path=jobs_db)
+    assert job["status"] == job_store.CANCELLED
+    assert job["counts"] == {job_store.DONE: 1, job_store.CANCELLED: 1}
+
+def test_last_finished_item_closes_the_job(jobs_db):
+    job_id = create_job([{"input": "https://a.example/"}, {"input": "https://b.example/"}], db_path=jobs_db)
+    a, b = claim_item(db_path=jobs_db), claim_item(db_path=jobs_db)
+    assert get_job(job_id, db_path=jobs_db)["status"] == job_store.RUNNING
+    job_store.finish_item(a, error="boom", db_path=jobs_db)
+    assert get_job(job_id, db_path=jobs_db)["status"] == job_store.RUNNING
+    job_store.finish_item(b, result={"overall_risk": "Low"}, db_path=jobs_db)
+    job = get_job(job_id, db_path=jobs_db)
+    assert job["status"] == job_store.DONE and job["completed"] == 2
+
+def test_engine_errors_fail_the_item(jobs_db, db_path, monkeypatch):
+    monkeypatch.setattr("app.utils.engines.aggregate_scan", lambda ioc, t=None: {
+        "input": ioc, "type": t, "overall_risk": "Low",
+        "engines": [{"engine": "VirusTotal", "summary": {"error": "status 429"}}]})
+    job_id = create_job([{"input": "https://a.example/"}], db_path=jobs_db)
+    run_item(claim_item(db_path=jobs_db), db_path=jobs_db)
+    item = job_items(job_id, db_path=jobs_db)[0]
+    assert (item["status"], item["overall_risk"], item["scan_id"]) == (job_store.FAILED, None, None)
+    assert item["error"] == "VirusTotal: status 429"
+    from scan import count_scans
+    assert count_scans(db_path=db_path) == 0
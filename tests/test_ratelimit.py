@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from app.utils import engines, ratelimit
+from app.utils.ratelimit import TokenBucket
+
+class _FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        return None
+
+@pytest.fixture
+def limited(monkeypatch):
+    """VirusTotal limited to a burst of 3, providers replaced by a recorder."""
+    monkeypatch.setenv("VL_RATE_VIRUSTOTAL", "3/min")
+    monkeypatch.setattr(engines, "is_mock_mode", lambda: False)
+    fake = _FakeSession()
+    monkeypatch.setattr(engines, "http_session", lambda: fake)
+    ratelimit.reset_limiters()
+    yield fake
+    ratelimit.reset_limiters()
+
+def test_parse_units_and_burst():
+    b = TokenBucket.parse("4/min")
+    assert b.rate == pytest.approx(4 / 60) and b.capacity == 4
+    b = TokenBucket.parse("10/s:2")
+    assert b.rate == 10 and b.capacity == 2
+    with pytest.raises(ValueError):
+        TokenBucket.parse("4/fortnight")
+
+def test_bucket_drains_and_times_out():
+    b = TokenBucket(rate=0.01, capacity=2)
+    assert b.try_acquire() and b.try_acquire()
+    assert not b.try_acquire()
+    assert b.acquire(timeout=0.01) is False
+
+def test_env_name():
+    assert ratelimit._env_name("urlscan.io") == "VL_RATE_URLSCAN_IO"
+    assert ratelimit._env_name("AlienVault OTX") == "VL_RATE_ALIENVAULT_OTX"
+
+def test_each_request_takes_a_token(limited):
+    s = engines.EngineSession({"x-apikey": "k"}, engine="VirusTotal")
+    s.post("https://vt.example/urls")
+    s.get("https://vt.example/analyses/1")
+    s.get("https://vt.example/urls/abc")
+    assert len(limited.calls) == 3
+    assert not ratelimit.engine_limiter("VirusTotal").try_acquire()
+
+def test_unnamed_session_is_not_limited(limited):
+    s = engines.EngineSession({})
+    for _ in range(5):
+        s.get("https://example.com/")
+    assert ratelimit.engine_limiter("VirusTotal").try_acquire()
+
+def test_mock_mode_is_never_limited(limited, monkeypatch):
+    monkeypatch.setattr(engines, "is_mock_mode", lambda: True)
+    s = engines.EngineSession({}, engine="VirusTotal")
+    for _ in range(5):
+        s.get("https://vt.example/")
+    assert ratelimit.engine_limiter("VirusTotal").try_acquire()
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from reportlab.platypus import Paragraph
+
+from app import report_builder
+from app.report_builder import H1, make_pdf_report
+
+def test_long_title_wraps(tmp_path, monkeypatch):
+    stories = []
+    monkeypatch.setattr(report_builder.SimpleDocTemplate, "build", lambda self, story, *a, **k: stories.append(story))
+    title = "VirusLens Report - https://very-long.example.com/" + "segment/" * 30 + "?q=<b>&"
+    make_pdf_report(str(tmp_path / "r.pdf"), title, {"Scan ID": 1}, {})
+    head = stories[0][0]
+    assert isinstance(head, Paragraph)
+    _, height = head.wrap(400, 1000)
+    assert height >= 2 * H1.leading
+
+def test_report_is_written(tmp_path):
+    path = tmp_path / "out" / "r.pdf"
+    make_pdf_report(str(path), "Report", {"Scan ID": 7, "Input": "https://a.example/"}, {})
+    assert path.read_bytes().startswith(b"%PDF")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.utils import prerender, report_cache
+from app.utils.report_cache import get_cached_report, prune, store_report
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setattr(report_cache, "CACHE_DIR", path)
+    return path
+
+def _scan(scan_id, risk="Low"):
+    return {"id": scan_id, "input": f"https://{scan_id}.example/", "risk": risk, "vt_details": None}
+
+def test_rescanned_report_replaces_the_old_file(cache_dir):
+    old = store_report(_scan(7), b"old")
+    other = store_report(_scan(70), b"other")  # same id prefix digits, different scan
+    assert get_cached_report(_scan(7)) == b"old"
+    new = store_report(_scan(7, risk="High"), b"new")
+    assert new != old and not old.exists() and other.exists()
+    assert get_cached_report(_scan(7)) is None  # the old content's key misses
+    assert get_cached_report(_scan(7, risk="High")) == b"new"
+    assert sorted(p.name for p in cache_dir.iterdir()) == sorted([new.name, other.name])  # no .tmp left
+
+def test_vt_details_none_and_empty_share_an_entry(cache_dir):
+    store_report(_scan(1), b"pdf")
+    assert get_cached_report({**_scan(1), "vt_details": {}}) == b"pdf"
+
+def test_prune_keeps_the_newest_entries(cache_dir):
+    paths = [store_report(_scan(i), b"x") for i in range(5)]
+    for age, p in enumerate(reversed(paths)):
+        os.utime(p, (1_000_000 - age, 1_000_000 - age))  # paths[4] newest
+    prune(max_entries=2)
+    assert [p.exists() for p in paths] == [False, False, False, True, True]
+    prune(max_entries=10)
+    assert len(list(cache_dir.glob("report_*.pdf"))) == 2
+
+def test_prune_without_a_cache_dir(cache_dir):
+    prune(max_entries=1)  # nothing rendered yet
+    assert not cache_dir.exists()
+
+def test_render_into_cache_renders_once(cache_dir, db_path, monkeypatch):
+    from app.utils.scan_results import save_result
+    renders = []
+    monkeypatch.setattr("app.report_pdf.build_report_pdf_bytes", lambda obj: renders.append(obj["id"]) or b"%PDF")
+    scan_id = save_result({"input": "https://a.example/", "type": "url", "overall_risk": "Low", "engines": []},
+                          db_path=db_path, prerender=False)
+    first = prerender._render_into_cache(scan_id, db_path)
+    assert prerender._render_into_cache(scan_id, db_path) == first
+    assert renders == [scan_id] and open(first, "rb").read() == b"%PDF"
+    assert prerender._render_into_cache(scan_id + 1, db_path) is None
+
+def test_queue_report_is_skipped_when_disabled(monkeypatch):
+    monkeypatch.setenv("VL_PRERENDER_REPORTS", "false")
+    assert prerender.queue_report(1) is None
+    monkeypatch.setenv("VL_PRERENDER_REPORTS", "true")
+    assert prerender.queue_report(0) is None  # nothing saved, nothing to render
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from app.utils import resources, secrets
+
+@pytest.fixture(autouse=True)
+def fresh_resources():
+    resources.clear_resources()
+    yield
+    resources.clear_resources()
+
+def test_config_without_a_key_is_rechecked(monkeypatch):
+    keys = iter([RuntimeError("VIRUSTOTAL_API_KEY is not set"), "k" * 64])
+
+    def lookup():
+        k = next(keys)
+        if isinstance(k, Exception):
+            raise k
+        return k
+
+    monkeypatch.setattr(secrets, "get_vt_api_key", lookup)
+    first = resources.app_config()
+    assert first.vt_api_key is None and "not set" in first.vt_error
+    second = resources.app_config()
+    assert second.vt_api_key == "k" * 64 and second.vt_error is None
+    assert resources.app_config() is second  # resolved: cached from now on
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+
+from app.utils.result_cache import ResultCache
+from app.utils.scan_results import save_result
+
+def _res(ioc, risk="Low", error=None, t="url"):
+    summary = {"error": error} if error else {"malicious": 1 if risk == "High" else 0}
+    return {"input": ioc, "type": t, "overall_risk": risk, "engines": [{"engine": "VirusTotal", "summary": summary}]}
+
+def test_history_is_indexed_except_errored_scans(db_path):
+    good = save_result(_res("https://good.example/", "High"), db_path=db_path, prerender=False)
+    save_result(_res("https://timeout.example/", error="Read timed out."), db_path=db_path, prerender=False)
+    cache = ResultCache(db_path)
+    cache.refresh(force=True)
+    assert cache.lookup("url", "https://good.example/").scan_id == good
+    assert cache.lookup("url", "https://timeout.example/") is None
+
+def test_errored_rescan_keeps_the_older_verdict(db_path):
+    save_result(_res("https://a.example/", "High"), db_path=db_path, prerender=False)
+    save_result(_res("https://a.example/", error="status 429"), db_path=db_path, prerender=False)
+    cache = ResultCache(db_path)
+    cache.refresh(force=True)
+    assert cache.lookup("url", "https://a.example/").overall_risk == "High"
+
+def test_put_result_skips_errored_results(db_path):
+    cache = ResultCache(db_path)
+    assert cache.put_result(_res("https://a.example/", error="status 503")) is None
+    assert cache.lookup("url", "https://a.example/") is None
+    assert cache.put_result(_res("https://a.example/", "Medium")).overall_risk == "Medium"
+    assert cache.lookup("url", "https://a.example/").source == "scan"
+
+def test_file_scans_answer_by_each_digest_and_expire(db_path):
+    md5 = "44d88612fea8a8f36de82e1278abb02f"
+    label = f"eicar.com (SHA256: {'a' * 64}, SHA1: {'b' * 40}, MD5: {md5.upper()})"
+    save_result(_res(label, "High", t="hash"), db_path=db_path, prerender=False)
+    cache = ResultCache(db_path)
+    cache.refresh(force=True)
+    assert cache.lookup("hash", md5).overall_risk == "High"
+    assert cache.lookup("hash", "b" * 40) is not None
+    cache.ttl = 1
+    assert cache._fresh(cache.lookup("hash", md5), time.time() + 3600) is None
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from scan import count_scans, get_scan, query_scans, record_search, record_searches
+
+def _seed(db_path):
+    record_search("url", "https://a.example/50%_off", risk_score="Low", db_path=db_path)
+    record_search("hash", "44d88612fea8a8f36de82e1278abb02f", risk_score="High", db_path=db_path)
+    record_searches([
+        {"scan_type": "url", "input_value": "https://b.example/", "risk_score": "Medium"},
+        {"scan_type": "url", "input_value": "https://c.example/500off", "risk_score": "High"},
+    ], db_path=db_path)
+
+def test_filters_and_counts_agree(db_path):
+    _seed(db_path)
+    rows = query_scans(scan_types=["url"], db_path=db_path)
+    assert [r["input"] for r in rows] == ["https://c.example/500off", "https://b.example/", "https://a.example/50%_off"]
+    assert count_scans(scan_types=["url"], db_path=db_path) == 3
+    assert count_scans(risks=["High"], db_path=db_path) == 2
+    assert count_scans(since="2000-01-01", until="2999-12-31", db_path=db_path) == 4
+    assert count_scans(until="2000-01-01", db_path=db_path) == 0
+
+def test_search_treats_wildcards_literally(db_path):
+    _seed(db_path)
+    assert [r["input"] for r in query_scans(search="50%_", db_path=db_path)] == ["https://a.example/50%_off"]
+
+def test_risk_sorts_by_severity_and_pages(db_path):
+    _seed(db_path)
+    risks = [r["risk"] for r in query_scans(sort="risk", db_path=db_path)]
+    assert risks == ["High", "High", "Medium", "Low"]
+    page = query_scans(sort="risk", limit=2, offset=2, db_path=db_path)
+    assert [r["risk"] for r in page] == ["Medium", "Low"]
+
+def test_get_scan_round_trips_details(db_path):
+    scan_id = record_search("url", "https://d.example/", summary="s", risk_score="Low",
+                            vt_details={"reputation": "0"}, db_path=db_path)
+    scan = get_scan(scan_id, db_path=db_path)
+    assert scan["vt_details"] == {"reputation": "0"}
+    assert get_scan(scan_id + 100, db_path=db_path) is None
+
+def test_probe_prefers_scans_even_when_empty(db_path):
+    import sqlite3
+    from scan import probe_schema
+    conn = sqlite3.connect(db_path)
+    with conn:  # init_db creates both tables; only the legacy one has rows
+        conn.execute("INSERT INTO history (input_value, risk_score) VALUES ('https://old.example/', 'High')")
+    conn.close()
+    assert probe_schema(db_path)["table"] == "scans"
+    assert count_scans(db_path=db_path) == 0
+
+def test_probe_falls_back_to_history_without_scans(tmp_path):
+    import sqlite3
+    from scan import probe_schema
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE history (id INTEGER PRIMARY KEY, input_value TEXT, risk_score TEXT)")
+        conn.execute("INSERT INTO history (input_value, risk_score) VALUES ('https://old.example/', 'High')")
+    conn.close()
+    assert probe_schema(path)["table"] == "history"
+    assert [r["input"] for r in query_scans(db_path=path)] == ["https://old.example/"]
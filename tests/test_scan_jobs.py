@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from app.utils import scan_jobs
+from app.utils.scan_jobs import BulkJob, ScanHandle, submit_bulk, submit_scan
+
+def _engine(name, malicious=0, suspicious=0):
+    return {"engine": name, "summary": {"malicious": malicious, "suspicious": suspicious}}
+
+def test_partial_and_pending_track_arrivals():
+    h = ScanHandle(ioc="https://a.example/", ioc_type="url", label="a", expected=["VirusTotal", "urlscan.io"])
+    assert h.pending() == ["VirusTotal", "urlscan.io"]
+    assert h.partial()["engines"] == [] and h.partial()["overall_risk"] == "Low"
+    h.engines.append(_engine("urlscan.io", suspicious=1))
+    assert h.pending() == ["VirusTotal"]
+    assert h.partial()["overall_risk"] == "Medium"
+    h.engines.append(_engine("VirusTotal", malicious=2))
+    assert h.pending() == []
+    partial = h.partial()
+    assert partial["overall_risk"] == "High"
+    assert [e["engine"] for e in partial["engines"]] == ["VirusTotal", "urlscan.io"]  # ENGINE_ORDER, not arrival
+
+def test_result_and_error_wait_for_the_future():
+    h = ScanHandle(ioc="x", ioc_type="url", label="x")
+    assert not h.done() and h.result() is None and h.error() is None
+    h.future = Future()
+    assert not h.done() and h.result() is None
+    h.future.set_exception(RuntimeError("down"))
+    assert h.done() and h.result() is None and str(h.error()) == "down"
+
+def test_submitted_scan_finishes_with_every_expected_engine():
+    h = submit_scan("https://a.example/", "url")
+    assert h.expected
+    res = h.future.result(timeout=10)
+    assert h.done() and h.result() == res and h.error() is None
+    assert h.pending() == []
+    assert h.partial() == res
+
+def test_bulk_throughput_and_eta(monkeypatch):
+    now = {"t": 100.0}
+    monkeypatch.setattr(scan_jobs, "time", SimpleNamespace(time=lambda: now["t"]))
+    job = BulkJob(rows=[{"input": str(i)} for i in range(10)], submitted_at=100.0)
+    assert job.throughput() == 0.0 and job.eta() is None  # no elapsed time, no results
+    now["t"] = 104.0
+    assert job.eta() is None  # running, nothing finished yet
+    job.results.extend({} for _ in range(2))
+    assert job.throughput() == 0.5 and job.eta() == 16.0
+    job.future = Future()
+    job.future.set_result(10)
+    job.finished_at = 105.0
+    now["t"] = 200.0  # the rate stops at finished_at
+    job.results.extend({} for _ in range(8))
+    assert job.throughput() == 2.0 and job.eta() == 0.0
+
+def test_submitted_bulk_job_keeps_every_row():
+    rows = [{"input": "https://a.example/"}, {"input": ""}, {"input": "https://b.example/"}]
+    job = submit_bulk(rows)
+    assert job.future.result(timeout=10) == 3
+    assert job.done() and job.total == 3 and job.eta() == 0.0
+    assert sorted(r["input"] for r in job.results) == ["", "https://a.example/", "https://b.example/"]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from app.utils.session_memo import ResultMemo, memo_key
+
+def test_key_ignores_whitespace_and_engine_order():
+    assert memo_key(" https://a.example/\n", "url", ["urlscan.io", "VirusTotal"]) == \
+        memo_key("https://a.example/", "url", ("VirusTotal", "urlscan.io"))
+    # a different engine set or type is a different scan
+    assert memo_key("https://a.example/", "url", ["VirusTotal"]) != memo_key("https://a.example/", "url", ["VirusTotal", "urlscan.io"])
+    assert memo_key("abc", "hash", []) != memo_key("abc", "url", [])
+
+def test_least_recently_used_is_evicted():
+    memo = ResultMemo(max_entries=2)
+    a, b, c = (memo_key(f"https://{n}.example/", "url", ["VirusTotal"]) for n in "abc")
+    memo.put(a, "A")
+    memo.put(b, "B")
+    assert memo.get(a) == "A"  # a is now the most recent
+    memo.put(c, "C")
+    assert len(memo) == 2 and memo.get(b) is None
+    assert [k for k, _ in memo.recent()] == [c, a]
+    memo.put(a, "A2")  # replacing refreshes instead of growing
+    assert len(memo) == 2 and [v for _, v in memo.recent()] == ["A2", "C"]
+    memo.drop(a)
+    memo.drop(a)
+    assert [v for _, v in memo.recent()] == ["C"]
+
+def test_size_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("VL_SESSION_MEMO_SIZE", "3")
+    assert ResultMemo().max_entries == 3
+    monkeypatch.setenv("VL_SESSION_MEMO_SIZE", "lots")
+    assert ResultMemo().max_entries == 32
+    monkeypatch.setenv("VL_SESSION_MEMO_SIZE", "0")
+    assert ResultMemo().max_entries == 1
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import threat_feed
+from app.utils.bulk_plan import plan_bulk
+from app.utils.engines import aggregate_scan
+from app.utils.threat_feed import ThreatFeed, build_feed
+
+EICAR_MD5 = "44d88612fea8a8f36de82e1278abb02f"
+
+@pytest.fixture
+def feed_dir(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "hashes.txt").write_text(f"# md5\n{EICAR_MD5.upper()}\n", encoding="utf-8")
+    (src / "hosts").write_text("0.0.0.0 evil.example  # ads\n127.0.0.1 localhost\n", encoding="utf-8")
+    (src / "urls.csv").write_text("https://Phish.test/login#frag,2024-01-01\n", encoding="utf-8")
+    out = tmp_path / "feed"
+    manifest = build_feed(sorted(src.iterdir()), out_dir=out)
+    assert manifest["counts"] == {"hash": 1, "domain": 1, "url": 1}  # "localhost" is not a domain
+    return out
+
+@pytest.fixture
+def feed(feed_dir):
+    f = ThreatFeed(feed_dir)
+    yield f
+    f.close()
+
+def test_exact_and_parent_domain_matches(feed):
+    assert feed.match(EICAR_MD5).source == "hashes.txt"
+    assert feed.match("https://phish.test/login#frag").matched_type == "url"
+    hit = feed.match("https://a.b.evil.example/x")
+    assert (hit.matched_type, hit.matched, hit.source) == ("domain", "evil.example", "hosts")
+    assert feed.match("https://notevil.example/") is None
+    assert feed.match("not an indicator") is None
+
+def test_listed_iocs_are_answered_offline(feed_dir, monkeypatch):
+    monkeypatch.setenv("VL_THREAT_FEED", str(feed_dir))
+    threat_feed.reset_feed()
+    res = aggregate_scan("https://www.evil.example/pay", "url")
+    assert res["overall_risk"] == "High"
+    assert [e["engine"] for e in res["engines"]] == [threat_feed.ENGINE_NAME]
+
+    plan = plan_bulk([{"input": EICAR_MD5}, {"input": "https://clean.example/"}])
+    assert [r["input"] for r in plan.offline] == [EICAR_MD5]
+    assert plan.offline[0]["offline"] is True and plan.to_scan == 1
+
+def test_feed_off_means_no_feed(monkeypatch):
+    monkeypatch.setenv("VL_THREAT_FEED", "off")
+    threat_feed.reset_feed()
+    assert threat_feed.feed_dir() is None
+    assert threat_feed.feed_match(EICAR_MD5) is None
+
+def test_first_lookup_loads_the_feed_right_after_start(feed_dir, monkeypatch):
+    monkeypatch.setattr(threat_feed, "time", SimpleNamespace(monotonic=lambda: 5.0))  # process just started
+    monkeypatch.setenv("VL_THREAT_FEED", str(feed_dir))
+    threat_feed.reset_feed()
+    assert threat_feed.feed_match(EICAR_MD5).source == "hashes.txt"
+
+def test_reload_closes_the_replaced_feed(feed_dir, monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(threat_feed, "time", SimpleNamespace(monotonic=lambda: clock["now"]))
+    monkeypatch.setenv("VL_THREAT_FEED", str(feed_dir))
+    threat_feed.reset_feed()
+    old = threat_feed.get_feed()
+    manifest = feed_dir / "feed.json"
+    os.utime(manifest, (manifest.stat().st_atime, manifest.stat().st_mtime + 60))  # "rebuilt"
+    clock["now"] += 10
+    assert threat_feed.get_feed() is old  # not checked again yet
+    clock["now"] += threat_feed.RELOAD_CHECK_SECONDS
+    new = threat_feed.get_feed()
+    assert new is not old and not old._bloom.closed  # lookups in flight may still use it
+    clock["now"] += threat_feed.RELOAD_CHECK_SECONDS
+    assert threat_feed.get_feed() is new
+    assert old._bloom.closed and old._index.closed and all(fh.closed for fh in old._files)
+    threat_feed.reset_feed()
+    assert new._bloom.closed
+
+def test_a_broken_feed_is_not_loaded(feed_dir):
+    (feed_dir / "feed.idx").write_bytes(b"garbage" * 4)
+    with pytest.raises(ValueError):
+        ThreatFeed(feed_dir)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from app.utils import assets, ui
+
+def test_font_is_linked_not_imported():
+    html = ui.build_theme_css()
+    assert "@import" not in html
+    assert f'<link rel="stylesheet" href="{ui.FONT_CSS_URL}">' in html
+
+def test_background_is_opt_in(monkeypatch):
+    monkeypatch.setattr(assets, "static_serving_enabled", lambda: True)
+    monkeypatch.delenv("VL_THEME_BACKGROUND", raising=False)
+    assert "viruslens-bg" not in ui.build_theme_css()
+    monkeypatch.setenv("VL_THEME_BACKGROUND", "1")
+    assert "viruslens-bg" in ui.build_theme_css()
@@ -0,0 +1,22 @@
+from app.utils.url_clusters import canonical_url, mask, template_key
+
+def test_canonical_url_drops_tracking_and_sorts_query():
+    assert canonical_url("HTTPS://Example.com:443/a?b=2&utm_source=x&a=1&fbclid=z#frag") == "https://example.com/a?a=1&b=2"
+
+def test_ids_and_tokens_are_masked():
+    a = template_key("https://phish.test/u/123/reset?token=9f86d081884c7d65&lang=en")
+    b = template_key("https://phish.test/u/98765/reset?token=0a1b2c3d4e5f6789&lang=en")
+    assert a == b == "phish.test/u/{n}/reset?lang=en&token={hex}"
+    assert mask("550e8400-e29b-41d4-a716-446655440000") == "{uuid}"
+    assert mask("aGVsbG8xMjM0NTY3ODkwQWJjZA") == "{token}"
+
+def test_versioned_files_in_one_directory_stay_apart():
+    benign = template_key("https://cdn.example.com/js/jquery-3.6.0.min.js")
+    evil = template_key("https://cdn.example.com/js/evilpayload-1.0.0.min.js")
+    assert benign != evil
+    assert benign == "cdn.example.com/js/jquery-3.6.0.min.js"
+
+def test_file_names_and_low_entropy_words_are_kept():
+    assert mask("installer2024setup.exe") == "installer2024setup.exe"
+    assert mask("setup-2-1") == "setup-2-1"
+    assert mask("loginloginlogin12") == "loginloginlogin12"
@@ -0,0 +1,16 @@
+# BEGIN: ensure project root is importable
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# END: ensure project root is importable
+
+# viruslens/__init__.py
+"""
+VirusLens as a library: `from viruslens import Client`.
+See viruslens/client.py.
+"""
+from viruslens.client import Client, ScanError, is_retriable
+
+__all__ = ["Client", "ScanError", "is_retriable"]
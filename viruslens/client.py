@@ -0,0 +1,239 @@
+# viruslens/client.py
+"""
+Library API over the VirusLens engines, cache and storage.
+
+    from viruslens import Client
+
+    with Client() as vl:
+        res = vl.scan("https://example.com")
+        for res in vl.scan_many(open("iocs.txt"), concurrency=8):
+            ...
+        known = vl.lookup_cached(["https://example.com", "44d88612fea8a8f36de82e1278abb02f"])
+        for row in vl.export_history(since="2025-01-01"):
+            ...
+
+Everything runs in-process on the same code paths as the UI: the shared HTTP
+pool, per-engine VL_RATE_* limits, the scans table (results are saved unless
+save=False) and the in-memory result cache. What callers used to hand-roll is
+built in:
+  - engines that fail transiently (timeouts, connection errors, HTTP
+    429/5xx) are retried with exponential backoff and jitter; permanent
+    answers ("Hash not found", 401, 404 and every other 4xx) are not;
+  - a result whose engines still report errors after the retries, or an IOC
+    no engine scans, raises ScanError: it is never saved or cached as a
+    verdict;
+  - scan_many keeps a bounded number of scans in flight and yields results
+    as they complete;
+  - `rate` paces scans started by this client ("4/min", "2/s").
+"""
+from __future__ import annotations
+import re
+import time
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# "status 503" (engine summaries) or "401 Client Error: Unauthorized for url: ..." (requests' raise_for_status)
+_STATUS = re.compile(r"^(?:status (\d{3})$|(\d{3}) (?:Client|Server) Error\b)")
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class ScanError(Exception):
+    """A scan could not be run at all (as opposed to one engine reporting an error)."""
+
+    def __init__(self, ioc: str, error: BaseException):
+        super().__init__(f"{ioc}: {error}")
+        self.ioc = ioc
+        self.error = error
+
+def is_retriable(error: str) -> bool:
+    """Whether an engine's summary["error"] looks transient."""
+    text = str(error or "")
+    if "not found" in text.lower():
+        return False
+    m = _STATUS.match(text)
+    if m:
+        return int(m.group(1) or m.group(2)) in _RETRY_STATUS
+    return True  # other raised exceptions: timeouts, connection resets
+
+class Client:
+    """
+    In-process VirusLens client. Thread-safe; reuse one instance.
+
+    db_path   database file (default: the app's viruslens.db / VL_DB_FILE)
+    save      store scans in the history (default True)
+    retries   extra attempts for engines that failed transiently
+    backoff   first retry delay in seconds, doubled per attempt (max 60)
+    rate      optional cap on scans started by this client, e.g. "4/min"
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path | str] = None,
+        save: bool = True,
+        retries: int = 3,
+        backoff: float = 1.0,
+        rate: Optional[str] = None,
+        max_workers: int = 8,
+    ):
+        from scan import get_db_path, init_db
+        from app.utils.ratelimit import TokenBucket
+        self.db_path = str(db_path or get_db_path())
+        self.save = save
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.limiter = TokenBucket.parse(rate) if rate else None
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        init_db(self.db_path)
+
+    # ----- lifecycle -----
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="viruslens-client")
+            return self._pool
+
+    @property
+    def cache(self):
+        from app.utils.result_cache import result_cache
+        return result_cache(self.db_path)
+
+    # ----- scanning -----
+
+    def _run_engines(self, ioc: str, ioc_type: str) -> List[Dict[str, Any]]:
+        from app.utils.engines import iter_scan, planned_engines, _run_engine
+        engines = {e.get("engine"): e for e in iter_scan(ioc, ioc_type)}
+        for attempt in range(self.retries):
+            failed = {name for name, e in engines.items()
+                      if "error" in (e.get("summary") or {}) and is_retriable(e["summary"]["error"])}
+            if not failed:
+                break
+            delay = min(60.0, self.backoff * (2 ** attempt))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            for name, call in planned_engines(ioc, ioc_type):
+                if name in failed:
+                    engines[name] = _run_engine(name, call)
+        return list(engines.values())
+
+    def scan(self, ioc: str, ioc_type: Optional[str] = None, save: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Scan one IOC; returns the aggregate_scan() result plus "scan_id" when
+        saved. Raises ScanError if the scan could not run: no engine scans the
+        IOC's type, or an engine still reports an error after the retries
+        (such results are neither saved nor cached).
+        """
+        from app.utils.engines import build_result, detect_ioc_type, engine_errors, planned_engines
+        from app.utils.scan_results import save_result
+        ioc = (ioc or "").strip()
+        t = ioc_type or detect_ioc_type(ioc)
+        if not planned_engines(ioc, t):
+            raise ScanError(ioc, ValueError(f"no engine scans this IOC (type {t})"))
+        if self.limiter is not None:
+            self.limiter.acquire()
+        try:
+            res = build_result(ioc, t, self._run_engines(ioc, t))
+        except Exception as e:
+            raise ScanError(ioc, e) from e
+        errors = engine_errors(res)
+        if errors:
+            raise ScanError(ioc, RuntimeError(errors))
+        scan_id = None
+        if self.save if save is None else save:
+            scan_id = save_result(res, ioc, db_path=self.db_path, prerender=False)
+        self.cache.put_result(res, scan_id)
+        res["scan_id"] = scan_id
+        return res
+
+    def scan_many(
+        self,
+        iocs: Iterable[str],
+        concurrency: int = 4,
+        ioc_type: Optional[str] = None,
+        save: Optional[bool] = None,
+        skip_cached: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Scan IOCs with up to `concurrency` in flight and yield each result as it
+        completes. Blank lines are skipped; IOCs that fail (including those no
+        engine scans or whose engines errored) come back as {"input", "error"}
+        instead of raising. skip_cached=True yields a cached
+        verdict ({"input", "type", "overall_risk", "scan_id", "cached": True})
+        instead of rescanning known IOCs. Input is read lazily.
+        """
+        concurrency = max(1, min(concurrency, self.max_workers))
+        pool = self._executor()
+        inflight: Dict[Future, str] = {}
+
+        def finished(fut: Future, ioc: str) -> Dict[str, Any]:
+            try:
+                return fut.result()
+            except ScanError as e:
+                return {"input": ioc, "error": str(e.error)}
+
+        try:
+            for raw in iocs:
+                ioc = (raw or "").strip()
+                if not ioc:
+                    continue
+                if skip_cached:
+                    hit = self.lookup_cached([ioc])[ioc]
+                    if hit is not None:
+                        yield {"input": ioc, "type": hit["type"], "overall_risk": hit["overall_risk"],
+                               "scan_id": hit["scan_id"], "cached": True}
+                        continue
+                inflight[pool.submit(self.scan, ioc, ioc_type, save)] = ioc
+                while len(inflight) >= concurrency:
+                    done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield finished(fut, inflight.pop(fut))
+            while inflight:
+                done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield finished(fut, inflight.pop(fut))
+        finally:
+            # consumer stopped early: do not start what is still queued
+            for fut in inflight:
+                fut.cancel()
+
+    # ----- cache / history -----
+
+    def lookup_cached(self, iocs: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Known verdicts without scanning: {ioc: verdict dict or None}. One
+        batched lookup against the in-memory cache of the scan history.
+        """
+        from app.utils.engines import detect_ioc_type
+        from app.utils.result_cache import normalize
+        pairs = [(detect_ioc_type(i), (i or "").strip()) for i in iocs]
+        found = self.cache.lookup_many(pairs)
+        out: Dict[str, Optional[Dict[str, Any]]] = {}
+        for t, ioc in pairs:
+            v = found.get(normalize(ioc, t))
+            out[ioc] = v.as_dict() if v is not None else None
+        return out
+
+    def export_history(self, since: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stored scans, oldest first, as flat dicts (the export columns). Reads
+        in batches with one cursor, so memory stays flat for any history size.
+        `since` is "YYYY-MM-DD[ HH:MM:SS]".
+        """
+        from app.utils.export import iter_scan_batches
+        for batch in iter_scan_batches(self.db_path, batch_size=batch_size, since=since):
+            yield from batch